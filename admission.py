@@ -0,0 +1,197 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+
+import metrics
+
+# Admission control in front of the model API.
+#
+# A request needs a free concurrency slot and a token from a bucket refilled
+# at the API quota. Requests that cannot start right away wait in a bounded
+# queue served round-robin across sessions, so one busy session cannot starve
+# the others; a request that finds the queue full, or waits longer than its
+# timeout, is turned away with Overloaded instead of being sent to the API to
+# fail. Waiters can be threads or coroutines.
+
+MODEL_RPM = float(os.getenv("HEALORA_MODEL_RPM", "60"))
+MODEL_BURST = int(os.getenv("HEALORA_MODEL_BURST", "10"))
+MODEL_CONCURRENCY = int(os.getenv("HEALORA_MODEL_CONCURRENCY", "16"))
+MODEL_QUEUE_SIZE = int(os.getenv("HEALORA_MODEL_QUEUE_SIZE", "100"))
+MODEL_QUEUE_PER_SESSION = 2
+MODEL_QUEUE_TIMEOUT = float(os.getenv("HEALORA_MODEL_QUEUE_TIMEOUT", "20"))
+MODEL_RETRIES = 2
+BASE_RETRY_DELAY = 0.5
+MAX_RETRY_DELAY = 4.0
+
+# Rate limiting and server-side failures are worth retrying
+RETRYABLE_CODES = {408, 429, 500, 502, 503, 504}
+
+class Overloaded(Exception):
+    pass
+
+def is_retryable(error):
+    code = getattr(error, "code", None)
+    if callable(code):
+        code = code()
+    try:
+        return int(code) in RETRYABLE_CODES
+    except (TypeError, ValueError):
+        return False
+
+# Full-jitter exponential backoff before retry number `attempt` (1-based)
+def retry_delay(attempt):
+    return random.uniform(0, min(MAX_RETRY_DELAY, BASE_RETRY_DELAY * 2 ** attempt))
+
+class TokenBucket:
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.updated = clock()
+
+    # Takes a token and returns 0, or returns the seconds until one is available
+    def take(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class _Waiter:
+    __slots__ = ("session_id", "wake", "granted")
+
+    def __init__(self, session_id, wake):
+        self.session_id = session_id
+        self.wake = wake
+        self.granted = False
+
+class ModelGate:
+    def __init__(self, rpm=MODEL_RPM, burst=MODEL_BURST, concurrency=MODEL_CONCURRENCY,
+                 queue_size=MODEL_QUEUE_SIZE, per_session=MODEL_QUEUE_PER_SESSION):
+        # rpm <= 0 turns the rate limit off
+        self.bucket = TokenBucket(rpm / 60.0, burst) if rpm > 0 else None
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.per_session = per_session
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self.queues = OrderedDict()
+        self.timer = None
+
+    def _start_now(self):
+        if self.in_flight >= self.concurrency:
+            return False
+        if self.bucket is not None and self.bucket.take() > 0:
+            return False
+        self.in_flight += 1
+        return True
+
+    # Hand free slots and tokens to waiting sessions in turn (called with the lock held)
+    def _dispatch(self):
+        while self.queues and self.in_flight < self.concurrency:
+            if self.bucket is not None:
+                delay = self.bucket.take()
+                if delay > 0:
+                    if self.timer is None:
+                        self.timer = threading.Timer(delay, self._refill)
+                        self.timer.daemon = True
+                        self.timer.start()
+                    return
+            session_id, queue = next(iter(self.queues.items()))
+            waiter = queue.popleft()
+            if queue:
+                self.queues.move_to_end(session_id)
+            else:
+                del self.queues[session_id]
+            self.waiting -= 1
+            self.in_flight += 1
+            waiter.granted = True
+            waiter.wake()
+
+    def _refill(self):
+        with self.lock:
+            self.timer = None
+            self._dispatch()
+
+    def _enqueue(self, session_id, wake):
+        queue = self.queues.get(session_id)
+        if self.waiting >= self.queue_size or (queue and len(queue) >= self.per_session):
+            metrics.admission.inc("rejected")
+            raise Overloaded("model queue is full")
+        waiter = _Waiter(session_id, wake)
+        self.queues.setdefault(session_id, deque()).append(waiter)
+        self.waiting += 1
+        return waiter
+
+    # Gives up on a waiter; returns True if it was granted a slot meanwhile
+    def _abandon(self, waiter):
+        with self.lock:
+            if waiter.granted:
+                return True
+            queue = self.queues[waiter.session_id]
+            queue.remove(waiter)
+            if not queue:
+                del self.queues[waiter.session_id]
+            self.waiting -= 1
+        metrics.admission.inc("timed_out")
+        return False
+
+    # Blocks until the request may start; timeout=0 only takes a free slot
+    def acquire(self, session_id, timeout=MODEL_QUEUE_TIMEOUT):
+        start = time.perf_counter()
+        event = threading.Event()
+        with self.lock:
+            if not self.queues and self._start_now():
+                metrics.admission.inc("admitted")
+                return
+            if timeout <= 0:
+                metrics.admission.inc("rejected")
+                raise Overloaded("no model capacity free")
+            waiter = self._enqueue(session_id, event.set)
+            self._dispatch()
+        if not event.wait(timeout) and not self._abandon(waiter):
+            raise Overloaded("timed out waiting for the model")
+        metrics.admission_wait_seconds.observe(time.perf_counter() - start)
+        metrics.admission.inc("admitted")
+
+    async def acquire_async(self, session_id, timeout=MODEL_QUEUE_TIMEOUT):
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+        with self.lock:
+            if not self.queues and self._start_now():
+                metrics.admission.inc("admitted")
+                return
+            if timeout <= 0:
+                metrics.admission.inc("rejected")
+                raise Overloaded("no model capacity free")
+            wake = lambda: loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(True))
+            waiter = self._enqueue(session_id, wake)
+            self._dispatch()
+        try:
+            await asyncio.wait_for(asyncio.shield(granted), timeout)
+        except asyncio.TimeoutError:
+            if not self._abandon(waiter):
+                raise Overloaded("timed out waiting for the model")
+        except asyncio.CancelledError:
+            if self._abandon(waiter):
+                self.release()
+            raise
+        metrics.admission_wait_seconds.observe(time.perf_counter() - start)
+        metrics.admission.inc("admitted")
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+            self._dispatch()
+
+    def stats(self):
+        with self.lock:
+            return {"in_flight": self.in_flight, "waiting": self.waiting, "sessions_waiting": len(self.queues)}
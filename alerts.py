@@ -0,0 +1,99 @@
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import metrics
+
+# Dedicated send path for emergency meeting alerts.
+#
+# Alerts do not wait behind booking emails in the outbox or for a handler
+# thread: ALERT_SENDERS threads of their own send them, each with the Gmail
+# service and its own connection prepared at startup, so not even the first
+# alert pays for building them. Latency is measured from the user confirming
+# the meeting to Gmail accepting the alert and checked against
+# ALERT_SLO_SECONDS. The sender connections time out after ALERT_TIMEOUT
+# seconds, and the user waits no longer than that for the send either. An
+# alert whose send fails, or that no sender took within ALERT_TIMEOUT, goes to
+# the outbox with ALERT_PRIORITY, ahead of every booking email.
+
+ALERT_SLO_SECONDS = float(os.getenv("HEALORA_ALERT_SLO", "2"))
+# Longest wait for Gmail to accept an alert, in seconds
+ALERT_TIMEOUT = 2 * ALERT_SLO_SECONDS
+ALERT_SENDERS = 2
+ALERT_PRIORITY = 10
+# Alerts the latency quantiles are computed over
+RECENT_ALERTS = 1000
+
+logger = logging.getLogger("healora")
+
+alert_seconds = metrics.Histogram("healora_alert_seconds", "Emergency alert latency, from confirmation to sent.")
+alerts = metrics.Counter("healora_alerts_total", "Emergency alerts sent within the SLO, past it, or failed.",
+                         label="outcome")
+
+class AlertSender:
+    def __init__(self, transport, senders=ALERT_SENDERS, slo=ALERT_SLO_SECONDS, timeout=ALERT_TIMEOUT):
+        self.transport = transport
+        self.senders = senders
+        self.slo = slo
+        self.timeout = timeout
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.recent = deque(maxlen=RECENT_ALERTS)
+        self.threads = []
+
+    def start(self):
+        with self.lock:
+            if self.threads:
+                return
+            self.threads = [threading.Thread(target=self._run, name=f"alert-sender-{i}", daemon=True)
+                            for i in range(self.senders)]
+        for thread in self.threads:
+            thread.start()
+
+    def _run(self):
+        try:
+            self.transport.warm(timeout=self.timeout)
+        except Exception:
+            logger.warning("could not prepare the alert send path", exc_info=True)
+        while True:
+            future, message, started = self.queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                with metrics.email_send_seconds.time("emergency"):
+                    result = self.transport.send(message)
+            except Exception as e:
+                alerts.inc("failed")
+                future.set_exception(e)
+                continue
+            self._record(time.perf_counter() - started)
+            future.set_result(result)
+
+    def _record(self, seconds):
+        alert_seconds.observe(seconds)
+        alerts.inc("within_slo" if seconds <= self.slo else "slo_missed")
+        with self.lock:
+            self.recent.append(seconds)
+
+    # Future of sending a message built by create_message; started is the
+    # time.perf_counter() at which the user confirmed the meeting. Cancelling
+    # the future withdraws an alert still waiting for a sender, and fails once
+    # a sender has taken it.
+    def send(self, message, started=None):
+        self.start()
+        future = Future()
+        self.queue.put((future, message, time.perf_counter() if started is None else started))
+        return future
+
+    # Median and p99 latency of the latest alerts, and the SLO, in seconds
+    def stats(self):
+        with self.lock:
+            recent = sorted(self.recent)
+        if not recent:
+            return {"p50": 0.0, "p99": 0.0, "slo": self.slo}
+        return {"p50": recent[len(recent) // 2], "p99": recent[min(len(recent) - 1, int(len(recent) * 0.99))],
+                "slo": self.slo}
@@ -1,33 +1,37 @@
 import gradio as gr
-import google.generativeai as genai
+import asyncio
 import os
 from datetime import datetime
-import plotly.express as px
-import pandas as pd
-from langdetect import detect
 import random
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 import base64
 from email.mime.text import MIMEText
 import re
-import json
-
-# Configure Gemini API (expects GEMINI_API_KEY in Hugging Face secrets)
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-
-# Gmail API configuration (expects GMAIL_ADDRESS, GMAIL_TOKEN_JSON in secrets)
-GMAIL_ADDRESS = os.getenv("GMAIL_ADDRESS")
-GMAIL_TOKEN_JSON = os.getenv("GMAIL_TOKEN_JSON")
-
-# Initialize Gmail API client
-def get_gmail_service():
-    try:
-        creds = Credentials.from_authorized_user_info(json.loads(GMAIL_TOKEN_JSON))
-        return build("gmail", "v1", credentials=creds)
-    except Exception as e:
-        raise Exception(f"Failed to initialize Gmail API: {str(e)}")
+import zipfile
+import logging
+import threading
+import time
+import uuid
+import metrics
+from chat_render import generate_chat_display
+from chat_history import MOOD_LABELS, append_turn, history_length, set_reply, turns
+from gmail_client import GMAIL_ADDRESS, gmail_client
+from outbox import Outbox
+from availability import create_slot_index
+from hedging import hedged_stream
+from alerts import ALERT_PRIORITY, ALERT_TIMEOUT, AlertSender
+from admission import MODEL_QUEUE_TIMEOUT, MODEL_RETRIES, ModelGate, Overloaded, is_retryable, retry_delay
+from crisis import CRISIS, screen_message
+from language import detect_language, load_detector
+from prompts import PromptTemplates
+from mood_analytics import MOOD_CODES, append_mood, ensure_mood_journal, journal_size, mood_trend_figure
+from mood_aggregates import (coping_frame, create_mood_aggregates, dashboard_figures, first_dashboard_day,
+                             mood_frames, pop_follow_up)
+from session_store import conversation_label, create_session_store
+from remote_store import STORE_URL
+from data_export import arrow_available, default_format, export_to_file, import_session
+from response_cache import RESPONSE_CACHE_ENABLED, ResponseCache
+from context_window import (PromptTokenMetrics, apply_summary, format_context, interim_summary, local_summary,
+                            new_context_summary, plan_context, summary_prompt)
 
 # Coping Strategies Library
 coping_strategies = {
@@ -95,146 +99,453 @@ therapists = {
     }
 }
 
-# Initialize Gemini model
-model = genai.GenerativeModel("learnlm-1.5-pro-experimental", 
-                             generation_config={"temperature": 0.7, "max_output_tokens": 200})
-
-# Chatbot function
-def chatbot_function(message, mood, conversation_mode, region, state):
-    if "chat_history" not in state:
-        state["chat_history"] = []
-    if "conversation_archive" not in state:
-        state["conversation_archive"] = []
-    if "current_conversation_id" not in state:
-        state["current_conversation_id"] = 0
-    
-    history = state["chat_history"]
-    
-    try:
-        lang = detect(message) if message.strip() else "en"
-    except:
-        lang = "en"
-    
-    if mood and mood != "Select mood (optional)":
-        history.append([f"I'm feeling {mood.lower()}.", None])
-    
-    history.append([message, None])
-    
-    tone_instruction = {
-        "Calm": "Respond in a soothing, gentle tone to promote relaxation.",
-        "Motivational": "Use an uplifting, encouraging tone to inspire confidence.",
-        "Neutral": "Maintain a balanced, empathetic tone."
-    }.get(conversation_mode, "Maintain a balanced, empathetic tone.")
-    
-    prompt = f"""
-    You are Healora, a compassionate mental health support chatbot. Engage in a supportive conversation with the user based on their input: {message}. 
-    - Provide empathetic, sensitive responses in the user's language (detected as {lang}).
-    - {tone_instruction}
-    - If signs of distress are detected, suggest coping strategies relevant to their mood or input.
-    - Recommend professional resources tailored to the user's region ({region}).
-    - Keep responses concise, warm, and encouraging.
-    """
-    
+MODEL_NAME = "learnlm-1.5-pro-experimental"
+# Faster models a reply is hedged to, in order, when the one before has not
+# started replying within HEALORA_HEDGE_AFTER seconds ("" turns hedging off)
+FALLBACK_MODELS = [name for name in os.getenv("HEALORA_FALLBACK_MODELS", "gemini-1.5-flash").split(",") if name]
+
+# Initialize Gemini model (set HEALORA_FAKE_MODEL=1 to use the offline stand-in).
+# google.generativeai is imported on first use; the model is warmed in the
+# background once the interface is built, so startup does not wait for it.
+# The fake stands in for the fallback models with HEALORA_FAKE_FALLBACK_LATENCY,
+# and HEALORA_FAKE_SLOW_RATE of its primary requests take
+# HEALORA_FAKE_SLOW_LATENCY seconds to start.
+def create_model(system_instruction=None, name=MODEL_NAME):
+    if os.getenv("HEALORA_FAKE_MODEL"):
+        from fakes import FakeGenerativeModel
+        quota = os.getenv("HEALORA_FAKE_QUOTA")
+        if name != MODEL_NAME:
+            return FakeGenerativeModel(latency=float(os.getenv("HEALORA_FAKE_FALLBACK_LATENCY", "0.05")),
+                                       quota=int(quota) if quota else None, system_instruction=system_instruction)
+        return FakeGenerativeModel(latency=float(os.getenv("HEALORA_FAKE_LATENCY", "0.05")),
+                                   quota=int(quota) if quota else None, system_instruction=system_instruction,
+                                   slow_rate=float(os.getenv("HEALORA_FAKE_SLOW_RATE", "0")),
+                                   slow_latency=float(os.getenv("HEALORA_FAKE_SLOW_LATENCY", "0")))
+    import google.generativeai as genai
+    # Configure Gemini API (expects GEMINI_API_KEY in Hugging Face secrets)
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    return genai.GenerativeModel(name, 
+                                 generation_config={"temperature": 0.7, "max_output_tokens": 200},
+                                 system_instruction=system_instruction)
+
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = create_model()
+    return _model
+
+# The summary model, built on a worker thread if the warm-up has not built it yet
+async def get_model_async():
+    return _model if _model is not None else await asyncio.to_thread(get_model)
+
+# Reply model for a conversation style and region, with their instructions as its system instruction
+_reply_models = {}
+
+def get_reply_model(conversation_mode, region, name=MODEL_NAME):
+    key = templates.key(conversation_mode, region)
+    model = _reply_models.get((key, name))
+    if model is None:
+        with _model_lock:
+            model = _reply_models.get((key, name))
+            if model is None:
+                model = _reply_models[(key, name)] = create_model(templates.system[key], name)
+    return model
+
+# The reply model followed by its fallback models
+def get_reply_models(conversation_mode, region):
+    return [get_reply_model(conversation_mode, region, name) for name in [MODEL_NAME] + FALLBACK_MODELS]
+
+# Reply models for a chat turn. Until the warm-up has built them they are built
+# on a worker thread, as building the first one imports google.generativeai
+# under _model_lock and would otherwise hold up the event loop.
+async def get_reply_models_async(conversation_mode, region):
+    key = templates.key(conversation_mode, region)
+    if all((key, name) in _reply_models for name in [MODEL_NAME] + FALLBACK_MODELS):
+        return get_reply_models(conversation_mode, region)
+    return await asyncio.to_thread(get_reply_models, conversation_mode, region)
+
+# The summary model and the reply models of every conversation style and region
+def warm_models():
+    get_model()
+    for tone, region in templates.system:
+        get_reply_models(tone, region)
+
+# Started with the server, not on import, so importing app (as the benchmarks
+# do) never claims messages from the outbox
+def warm_up():
+    threading.Thread(target=warm_models, name="model-warmup", daemon=True).start()
+    threading.Thread(target=load_detector, name="language-warmup", daemon=True).start()
+    # With a shared outbox, every replica drains messages other replicas queued
+    outbox.start()
+    alert_sender.start()
+
+# Concurrent chat turns served on the event loop per process
+CHAT_CONCURRENCY_LIMIT = int(os.getenv("HEALORA_CHAT_CONCURRENCY", "64"))
+# Concurrency of every other event, and events waiting in the Gradio queue
+EVENT_CONCURRENCY_LIMIT = int(os.getenv("HEALORA_EVENT_CONCURRENCY", "8"))
+GRADIO_QUEUE_SIZE = int(os.getenv("HEALORA_QUEUE_SIZE", "256"))
+
+FALLBACK_RESPONSE = "I'm here for you. Could you share a bit more so I can support you better?"
+BUSY_RESPONSE = ("A lot of people are reaching out right now, so I couldn't answer in time. "
+                 "Please send your message again in a moment. If you need help right away, "
+                 "use the Emergency Resources button.")
+
+logger = logging.getLogger("healora")
+
+# Rate limit, concurrency cap and fair queue in front of the model API
+model_gate = ModelGate()
+
+# Client timeout of a model request, in seconds (None keeps the client's default)
+def request_options(request_timeout):
+    return {"request_options": {"timeout": request_timeout}} if request_timeout else {}
+
+# Model request through the admission gate, retried with jittered backoff on
+# rate limiting and server errors. Raises Overloaded if the gate turns it away.
+async def generate_async(prompt, session_id, timeout=MODEL_QUEUE_TIMEOUT, model=None):
+    for attempt in range(1, MODEL_RETRIES + 2):
+        await model_gate.acquire_async(session_id, timeout)
+        try:
+            return await (model or get_model()).generate_content_async(prompt)
+        except Exception as e:
+            if attempt > MODEL_RETRIES or not is_retryable(e):
+                raise
+            logger.warning("model request failed (%s), retrying", e)
+            metrics.model_retries.inc()
+        finally:
+            model_gate.release()
+        await asyncio.sleep(retry_delay(attempt))
+
+# Streamed reply text; the admission slot is held until the stream ends, and
+# a request is only retried if it failed before the first chunk
+async def generate_stream(prompt, session_id, model=None, timeout=MODEL_QUEUE_TIMEOUT, request_timeout=None):
+    for attempt in range(1, MODEL_RETRIES + 2):
+        await model_gate.acquire_async(session_id, timeout)
+        streamed = False
+        try:
+            response = await (model or get_model()).generate_content_async(prompt, stream=True,
+                                                                         **request_options(request_timeout))
+            async for chunk in response:
+                streamed = True
+                yield chunk.text
+            return
+        except Exception as e:
+            if streamed or attempt > MODEL_RETRIES or not is_retryable(e):
+                raise
+            logger.warning("model request failed (%s), retrying", e)
+            metrics.model_retries.inc()
+        finally:
+            model_gate.release()
+        await asyncio.sleep(retry_delay(attempt))
+
+# Reply stream hedged down the reply model cascade (see hedging.py). Only the
+# first request waits for admission; a hedge is sent only if a slot is free,
+# so hedging never adds to a queue that is already backed up.
+def generate_reply_stream(prompt, session_id, models):
+    def start(model, index):
+        return lambda remaining: generate_stream(prompt, session_id, model, 0 if index else min(MODEL_QUEUE_TIMEOUT, remaining),
+                                                 request_timeout=remaining)
+    return hedged_stream([start(model, index) for index, model in enumerate(models)])
+
+# Session data store (gr.State only carries the session ID)
+session_store = create_session_store()
+
+# Load the session data for the current browser session
+def get_session(state):
+    if "session_id" not in state:
+        state["session_id"] = uuid.uuid4().hex
+    return session_store.get(state["session_id"])
+
+# Store call from an async handler. Calls to the network store (HEALORA_STORE_URL)
+# run on a worker thread, so a slow store never holds up the event loop.
+async def store_call(fn, *args):
+    if STORE_URL:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+# Persist the session data for the current browser session
+def save_session(state, session):
+    session_store.save(state["session_id"], session)
+
+# Index the completed turn for search and persist the session
+def finish_turn(state, session):
+    session_store.index_turn(state["session_id"], session)
+    save_session(state, session)
+
+# Optional cache of model replies for common messages (HEALORA_RESPONSE_CACHE=1)
+response_cache = ResponseCache() if RESPONSE_CACHE_ENABLED else None
+
+# Cache key for a turn, or None when the reply must not come from the cache.
+# Messages flagged by the crisis/distress screen always get a fresh reply, and
+# so do messages sent with a mood or with earlier turns.
+def response_cache_key(message, lang, conversation_mode, region, context, screening, mood=None):
+    if response_cache is None or context or mood:
+        return None
+    if screening:
+        response_cache.skip()
+        return None
+    return response_cache.key(message, lang, conversation_mode, region)
+
+# Mood name selected in the dropdown, or None
+def selected_mood(mood):
+    return mood.lower() if mood and mood != "Select mood (optional)" else None
+
+# Record the user's turn, with the selected mood as part of it
+def start_turn(message, mood, session):
+    history = session["chat_history"]
+    append_turn(history, message, selected_mood(mood), datetime.now())
+    return history
+
+# Crisis resources shown before the model reply when the local screen flags a crisis
+def crisis_banner(screening, region):
+    if screening != CRISIS:
+        return ""
+    return show_emergency_resources(region) + "\n\n"
+
+# Prompt size per request
+prompt_metrics = PromptTokenMetrics()
+
+# Fold turns that left the context window into the rolling summary.
+# Summaries never wait for the model: without a free slot the local summary is used.
+async def update_summary_async(summary, entries, session_id):
     try:
-        response = model.generate_content(prompt)
-        response_text = response.text
+        with metrics.model_seconds.time("summary"):
+            text = (await generate_async(summary_prompt(summary, entries), session_id, timeout=0,
+                                         model=await get_model_async())).text
+    except Overloaded:
+        text = local_summary(summary, entries)
     except Exception:
-        response_text = "I'm here for you. Could you share a bit more so I can support you better?"
-    
+        logger.warning("summary request failed, using the local summary", exc_info=True)
+        metrics.errors.inc("summary")
+        text = local_summary(summary, entries)
+    apply_summary(summary, text, entries)
+
+# Count a turn answered with FALLBACK_RESPONSE after a failed model request
+def record_model_failure():
+    logger.warning("model request failed, sending the fallback reply", exc_info=True)
+    metrics.errors.inc("reply")
+    metrics.fallback_responses.inc()
+
+# Count a turn turned away by the model gate
+def record_overload():
+    logger.info("model busy, asking the user to try again")
+    metrics.busy_responses.inc()
+
+# Prompts and resource markdown precomputed per conversation style and region
+templates = PromptTemplates(regional_resources)
+
+# Coping strategy and regional resources appended after the model reply; the
+# strategy shown is noted in the session so the next logged mood counts as its outcome
+def support_footer(mood, region, screening=None, session=None):
+    footer = ""
     if mood and mood != "Select mood (optional)":
         mood_key = mood.lower()
         if mood_key in coping_strategies:
-            strategy = random.choice(coping_strategies[mood_key])
-            response_text += f"\n\n**Coping Strategy**: {strategy}"
+            index = random.randrange(len(coping_strategies[mood_key]))
+            footer += f"\n\n**Coping Strategy**: {coping_strategies[mood_key][index]}"
+            if session is not None:
+                note_coping_strategy(session, mood_key, index)
     
-    region_key = region if region in regional_resources else "Global"
-    resources = "\n\n**Recommended Resources**:\n" + "\n".join(regional_resources[region_key])
-    response_text += resources
+    if screening != CRISIS:
+        footer += templates.resources_markdown(region)
+    return footer
+
+# Streaming chatbot function: yields the chat display as reply chunks arrive
+# Stage timings for each chunk: "generate" is the wait for the chunk, "render" the display update.
+# A summary update runs as a task beside the reply stream and is awaited before saving.
+# With render=False (the JSON API) nothing is rendered: the only yield is
+# (status, reply) once the turn is saved, status being "ok", "busy" or "fallback".
+async def chatbot_function_stream(message, mood, conversation_mode, region, state, render=True):
+    metrics.chat_turns.inc()
+    timer = metrics.StageTimer()
+    screening = screen_message(message)
+    timer.lap("screen")
+    session = await store_call(get_session, state)
+    history = start_turn(message, mood, session)
+    banner = crisis_banner(screening, region)
+    timer.lap("load")
+    if banner and render:
+        set_reply(history, banner)
+        yield generate_chat_display(history, streaming=True), state
+        timer = metrics.StageTimer()
+    lang = detect_language(message, session)
+    timer.lap("language")
+    summary = session.setdefault("context_summary", new_context_summary())
+    fold, recent = plan_context(turns(history, 0, -1), summary)
+    context = format_context(interim_summary(summary, fold) if fold else summary, recent)
+    summarizing = asyncio.create_task(update_summary_async(summary, fold, state["session_id"])) if fold else None
+    timer.lap("context")
+    prompt = templates.user_prompt(message, lang, context, selected_mood(mood))
+    cache_key = response_cache_key(message, lang, conversation_mode, region, context, screening, selected_mood(mood))
+    response_text = response_cache.get(cache_key) if cache_key else None
+    timer.lap("prompt")
+    status = "ok"
     
-    history[-1][1] = response_text
-    state["chat_history"] = history
+    if response_text is None:
+        prompt_metrics.record(prompt, templates.system_tokens[templates.key(conversation_mode, region)])
+        response_text = ""
+        start = time.perf_counter()
+        try:
+            models = await get_reply_models_async(conversation_mode, region)
+            async for text in generate_reply_stream(prompt, state["session_id"], models):
+                if not response_text:
+                    metrics.model_first_chunk_seconds.observe(time.perf_counter() - start)
+                response_text += text
+                timer.lap("generate")
+                if render:
+                    set_reply(history, banner + response_text)
+                    display = generate_chat_display(history, streaming=True)
+                    timer.lap("render")
+                    yield display, state
+                    timer = metrics.StageTimer()
+            metrics.model_seconds.observe(time.perf_counter() - start, "reply")
+            if cache_key:
+                response_cache.put(cache_key, response_text)
+        except Overloaded:
+            record_overload()
+            response_text = BUSY_RESPONSE
+            status = "busy"
+        except Exception:
+            if response_text:
+                logger.warning("reply stream failed after %d characters", len(response_text), exc_info=True)
+                metrics.errors.inc("reply_stream")
+            else:
+                record_model_failure()
+                response_text = FALLBACK_RESPONSE
+                status = "fallback"
+        timer.lap("generate")
     
-    chat_display = generate_chat_display(history)
+    reply = banner + response_text + await store_call(support_footer, mood, region, screening, session)
+    set_reply(history, reply)
+    if summarizing:
+        await summarizing
+        timer.lap("summary")
+    await store_call(finish_turn, state, session)
+    timer.lap("save")
     
-    return chat_display, state
-
-# Generate chat display with left/right alignment and black text
-def generate_chat_display(history):
-    chat_display = """
-    <style>
-        .chat-container { max-width: 600px; margin: auto; }
-        .message { margin: 10px 0; padding: 10px; border-radius: 10px; width: 80%; color: #000000; }
-        .bot-message { background-color: #3A3B3C; float: left; clear: both; }
-        .user-message { background-color: #192734; float: right; clear: both; }
-    </style>
-    <div class='chat-container'>
-    """
-    for user_msg, bot_msg in history:
-        if user_msg:
-            chat_display += f"<div class='message user-message'><strong>You</strong>: {user_msg}</div>"
-        if bot_msg:
-            chat_display += f"<div class='message bot-message'><strong>Healora</strong>: {bot_msg}</div>"
-    chat_display += "</div>"
-    return chat_display
+    if not render:
+        yield status, reply
+        return
+    display = generate_chat_display(history)
+    timer.lap("render")
+    yield display, state
+
+# One chat turn for the JSON API (chat_api.py). API sessions are kept apart
+# from browser sessions, so a caller-chosen ID can never reach a browser's.
+async def api_chat_turn(session_id, message, mood, conversation_mode, region):
+    session_id = session_id or uuid.uuid4().hex
+    state = {"session_id": f"api-{session_id}"}
+    async for status, reply in chatbot_function_stream(message, mood, conversation_mode, region, state, render=False):
+        pass
+    return {"session_id": session_id, "reply": reply, "status": status}
 
 # Clear chat history
 def clear_chat(state):
-    state["chat_history"] = []
+    session = get_session(state)
+    session_store.clear_conversation(state["session_id"], session)
     return "", state
 
 # Start new conversation
 def new_conversation(state):
-    if state["chat_history"]:
-        state["conversation_archive"].append({
-            "id": state["current_conversation_id"],
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "history": state["chat_history"]
-        })
-        state["current_conversation_id"] += 1
-        state["chat_history"] = []
-    return "", update_conversation_dropdown(state), state
+    session = get_session(state)
+    if history_length(session["chat_history"]):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        session_store.archive_conversation(state["session_id"], session, timestamp)
+    return "", update_conversation_dropdown(session), state
+
+# Dropdown choices are (label, conversation ID) pairs; the ID is the stable key
+CURRENT_CONVERSATION = "current"
+
+def archive_label(conv):
+    return conv.get("label") or conversation_label(conv["id"], conv["timestamp"])
 
 # Update conversation dropdown
-def update_conversation_dropdown(state):
-    choices = ["Current Conversation"] + [
-        f"Conversation {conv['id']} ({conv['timestamp']})" 
-        for conv in state["conversation_archive"]
+def update_conversation_dropdown(session):
+    choices = [("Current Conversation", CURRENT_CONVERSATION)] + [
+        (archive_label(conv), str(conv["id"])) for conv in session["conversation_archive"]
     ]
-    return gr.update(choices=choices, value="Current Conversation")
+    return gr.update(choices=choices, value=CURRENT_CONVERSATION)
 
-# Load selected conversation
+# Load selected conversation by ID (archived histories are read from the store on demand)
 def load_conversation(selected_conversation, state):
-    if selected_conversation == "Current Conversation":
-        return generate_chat_display(state["chat_history"]), state
-    else:
-        for conv in state["conversation_archive"]:
-            if f"Conversation {conv['id']} ({conv['timestamp']})" == selected_conversation:
-                return generate_chat_display(conv["history"]), state
-        return generate_chat_display(state["chat_history"]), state
+    session = get_session(state)
+    if selected_conversation and selected_conversation != CURRENT_CONVERSATION:
+        history = session_store.load_conversation(state["session_id"], int(selected_conversation))
+        if history_length(history):
+            return generate_chat_display(history), state
+    return generate_chat_display(session["chat_history"]), state
+
+# Search the current and archived conversations of this session
+def search_conversations(query, state):
+    if not query or not query.strip():
+        return "Enter words to search for.", state
+    session = get_session(state)
+    results = session_store.search(state["session_id"], query)
+    if not results:
+        return f"No conversations mention \"{query.strip()}\".", state
+    labels = {conv["id"]: archive_label(conv) for conv in session["conversation_archive"]}
+    labels[session["current_conversation_id"]] = "Current Conversation"
+    lines = [f"- **{labels.get(conversation_id, f'Conversation {conversation_id}')}**: {snippet}"
+             for conversation_id, snippet in results]
+    return "\n".join(lines), state
+
+# Population mood counters shared across sessions and workers
+mood_aggregates = create_mood_aggregates()
+
+# Update the population counters; a failure there never fails the user's action
+def record_aggregate(method, *args):
+    try:
+        getattr(mood_aggregates, method)(*args)
+    except Exception:
+        logger.warning("could not update the mood aggregates", exc_info=True)
+        metrics.errors.inc("mood_aggregates")
+
+def note_coping_strategy(session, mood_key, index):
+    code = MOOD_CODES[mood_key]
+    session["coping_shown"] = {"mood": code, "strategy": index, "time": time.time()}
+    record_aggregate("record_strategy", code, index)
 
 # Mood journal function
-def log_mood(mood, state):
+def log_mood(mood, region, state):
     if mood and mood != "Select mood (optional)":
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        state["mood_journal"].append({"timestamp": timestamp, "mood": mood.lower()})
+        session = get_session(state)
+        mood_key = mood.lower()
+        append_mood(ensure_mood_journal(session), mood_key)
+        region_key = templates.key(None, region)[1]
+        record_aggregate("record_mood", datetime.now().strftime("%Y-%m-%d"), region_key,
+                         MOOD_CODES.get(mood_key, MOOD_CODES["other"]), pop_follow_up(session, time.time()))
+        save_session(state, session)
         return "Mood logged successfully!", state
     return "Please select a mood to log.", state
 
 # Mood trend visualization
 def show_mood_trends(state):
-    if not state["mood_journal"]:
+    session = get_session(state)
+    journal = ensure_mood_journal(session)
+    if not journal_size(journal):
         return "No moods logged yet.", state
-    df = pd.DataFrame(state["mood_journal"])
-    fig = px.line(df, x="timestamp", y="mood", title="Mood Trends Over Time", markers=True)
-    return fig, state
+    return mood_trend_figure(journal), state
 
 # Emergency resources
 def show_emergency_resources(region):
-    region_key = region if region in regional_resources else "Global"
-    return f"**Crisis Support ({region_key})**:\n" + "\n".join(regional_resources[region_key])
+    return templates.emergency_markdown(region)
+
+# Booked slots shared across sessions and workers
+slot_index = create_slot_index()
+
+def is_valid_date(date):
+    try:
+        datetime.strptime(date or "", "%Y-%m-%d")
+        return True
+    except ValueError:
+        return False
 
-# Get available times and therapist details
-def get_therapist_details(therapist):
+# Get available times and therapist details (only free slots once a date is entered)
+def get_therapist_details(therapist, date=None):
     if therapist and therapist in therapists:
         details = f"""
         **Therapist Details**:
@@ -242,7 +553,12 @@ def get_therapist_details(therapist):
         - Specialty: {therapists[therapist]["specialty"]}
         - Email: {therapists[therapist]["email"]}
         """
-        return gr.update(choices=therapists[therapist]["times"], value=None), details
+        times = therapists[therapist]["times"]
+        if is_valid_date(date):
+            times = slot_index.free_times(therapist, date, times)
+            if not times:
+                details += f"\n        No free time slots on {date}. Please choose another date.\n        "
+        return gr.update(choices=times, value=None), details
     return gr.update(choices=[], value=None), "Please select a therapist."
 
 # Create MIME message for Gmail API
@@ -254,18 +570,31 @@ def create_message(to, subject, message_text):
     raw = base64.urlsafe_b64encode(message.as_bytes()).decode()
     return {"raw": raw}
 
-# Send emails using Gmail API
-def send_emails(therapist, time_slot, date, user_email, therapist_email, appointment_note, chat_history, state):
-    if "failed_emails" not in state:
-        state["failed_emails"] = []
-    
-    # Format chat history for email
-    chat_history_text = "Chat History:\n"
-    for user_msg, bot_msg in chat_history:
+# Email transport (set HEALORA_FAKE_GMAIL=1 to record emails instead of sending them)
+if os.getenv("HEALORA_FAKE_GMAIL"):
+    from fakes import FakeGmailClient
+    gmail_client = FakeGmailClient(latency=float(os.getenv("HEALORA_FAKE_GMAIL_LATENCY", "0")))
+
+# Durable outbox drained by a background worker
+outbox = Outbox(gmail_client)
+
+# Emergency alerts are sent on threads of their own, prepared at startup
+alert_sender = AlertSender(gmail_client)
+
+# Chat history as text for the therapist's email, with the mood selected with each message
+def format_chat_history(chat_history):
+    speakers = tuple(f"You ({label})" for label in MOOD_LABELS) + ("You",)
+    lines = ["Chat History:"]
+    for user_msg, bot_msg, mood in turns(chat_history):
         if user_msg:
-            chat_history_text += f"You: {user_msg}\n"
+            lines.append(f"{speakers[mood if mood is not None else -1]}: {user_msg}")
         if bot_msg:
-            chat_history_text += f"Healora: {bot_msg}\n"
+            lines.append(f"Healora: {bot_msg}")
+    return "\n".join(lines) + "\n"
+
+# Queue appointment emails for the outbox worker
+def queue_emails(therapist, time_slot, date, user_email, therapist_email, appointment_note, chat_history):
+    chat_history_text = format_chat_history(chat_history)
     
     therapist_body = f"""
 Dear {therapist},
@@ -305,29 +634,10 @@ Healora
     """
     user_message = create_message(user_email, "Appointment Confirmation", user_body)
     
-    try:
-        service = get_gmail_service()
-        therapist_result = service.users().messages().send(userId="me", body=therapist_message).execute()
-        user_result = service.users().messages().send(userId="me", body=user_message).execute()
-        return True, ""
-    except HttpError as e:
-        error_msg = f"Gmail API error: {str(e)}"
-        state["failed_emails"].append({
-            "therapist_email": {"to": therapist_email, "subject": "New Appointment", "body": therapist_body},
-            "user_email": {"to": user_email, "subject": "Appointment Confirmation", "body": user_body},
-            "error": error_msg,
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
-        return False, error_msg
-    except Exception as e:
-        error_msg = f"Unexpected error: {str(e)}"
-        state["failed_emails"].append({
-            "therapist_email": {"to": therapist_email, "subject": "New Appointment", "body": therapist_body},
-            "user_email": {"to": user_email, "subject": "Appointment Confirmation", "body": user_body},
-            "error": error_msg,
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
-        return False, error_msg
+    return outbox.enqueue([
+        (therapist_email, "New Appointment", therapist_message),
+        (user_email, "Appointment Confirmation", user_message)
+    ])
 
 # Schedule appointment
 def schedule_appointment(therapist, time_slot, date, user_email, appointment_note, state):
@@ -355,12 +665,22 @@ def schedule_appointment(therapist, time_slot, date, user_email, appointment_not
         "appointment_note": appointment_note,
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }
-    state["appointments"].append(appointment)
+    session = get_session(state)
+    if not slot_index.reserve(therapist, date, time_slot, state["session_id"]):
+        return f"{therapist} is already booked on {date} at {time_slot}. Please choose another time slot.", state
+    session["appointments"].append(appointment)
     
     therapist_email = therapists[therapist]["email"]
-    success, error_msg = send_emails(therapist, time_slot, date, user_email, therapist_email, appointment_note, state["chat_history"], state)
-    if success:
-        return f"Appointment booked with {therapist} on {date} at {time_slot}.", state
+    try:
+        appointment["email_ids"] = queue_emails(therapist, time_slot, date, user_email, therapist_email, appointment_note, session["chat_history"])
+    except Exception:
+        logger.exception("could not queue appointment emails")
+        metrics.errors.inc("queue_emails")
+        appointment["email_ids"] = []
+    save_session(state, session)
+    if appointment["email_ids"]:
+        return (f"Appointment booked with {therapist} on {date} at {time_slot}. "
+                f"A confirmation email is on its way to {user_email}."), state
     else:
         return (f"Appointment booked with {therapist} on {date} at {time_slot}. "
                 f"Emails from {GMAIL_ADDRESS} could not be sent. "
@@ -388,7 +708,8 @@ def request_emergency_meeting(therapist, user_name, gender, age, user_email, sta
     
     Would you like to start the meeting now?
     """
-    state["emergency_meeting"] = {
+    session = get_session(state)
+    session["emergency_meeting"] = {
         "therapist": therapist,
         "user_name": user_name,
         "gender": gender,
@@ -396,15 +717,19 @@ def request_emergency_meeting(therapist, user_name, gender, age, user_email, sta
         "user_email": user_email,
         "meeting_link": meeting_link
     }
+    save_session(state, session)
     return confirmation_message, gr.update(visible=True), state
 
-# Confirm emergency meeting
-def confirm_emergency_meeting(confirm, state):
-    if "emergency_meeting" not in state:
+# Confirm emergency meeting. The alert goes out on the dedicated alert path
+# (alerts.py); its latency is measured from here.
+async def confirm_emergency_meeting(confirm, state):
+    started = time.perf_counter()
+    session = await store_call(get_session, state)
+    if "emergency_meeting" not in session:
         return "No emergency meeting requested.", state
     
     if confirm == "Yes":
-        meeting_info = state["emergency_meeting"]
+        meeting_info = session["emergency_meeting"]
         therapist = meeting_info["therapist"]
         user_name = meeting_info["user_name"]
         gender = meeting_info["gender"]
@@ -430,24 +755,99 @@ Healora
         """
         alert_message = create_message(therapist_email, "Emergency Meeting Request", alert_body)
         
+        # Hand the alert to the outbox so it keeps being retried, ahead of booking emails
+        def queue_alert():
+            metrics.emails.inc("retry")
+            outbox.enqueue([(therapist_email, "Emergency Meeting Request", alert_message)], priority=ALERT_PRIORITY)
+        
+        # A hung send must not hold up the confirmation past ALERT_TIMEOUT
+        sending = alert_sender.send(alert_message, started)
         try:
-            service = get_gmail_service()
-            service.users().messages().send(userId="me", body=alert_message).execute()
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(sending)), ALERT_TIMEOUT)
+            metrics.emails.inc("sent")
             return f"Emergency meeting alert sent to {therapist}. Join the meeting at {meeting_link}.", state
-        except Exception as e:
-            state["failed_emails"].append({
-                "therapist_email": {"to": therapist_email, "subject": "Emergency Meeting Request", "body": alert_body},
-                "error": str(e),
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            })
-            return (f"Failed to send emergency meeting alert to {therapist}. "
-                    f"Please contact {therapist_email} directly with the meeting link: {meeting_link}."), state
+        except asyncio.TimeoutError:
+            if not sending.cancel():
+                # Already being sent: it is queued only if that send fails, so
+                # the therapist never gets the alert twice
+                logger.warning("emergency alert still sending after %.1fs", ALERT_TIMEOUT)
+                sending.add_done_callback(lambda done: done.exception() is not None and queue_alert())
+                return (f"Your emergency meeting alert to {therapist} is on its way; it will be retried "
+                        f"if it cannot be delivered. Join the meeting at {meeting_link}, and if {therapist} "
+                        f"has not joined soon, contact {therapist_email} directly."), state
+            logger.warning("emergency alert not picked up within %.1fs, queued for retry", ALERT_TIMEOUT)
+        except Exception:
+            logger.warning("emergency alert send failed, queued for retry", exc_info=True)
+        queue_alert()
+        return (f"Failed to send emergency meeting alert to {therapist}. "
+                f"Please contact {therapist_email} directly with the meeting link: {meeting_link}."), state
     else:
         return "Emergency meeting cancelled.", state
 
+# Export formats offered in the interface; Parquet and Arrow need pyarrow, which
+# is only looked up here and imported on the first export or import
+EXPORT_FORMATS = [("Parquet", "parquet"), ("Arrow", "arrow"), ("JSON Lines", "jsonl")] if arrow_available() \
+    else [("JSON Lines", "jsonl")]
+
+# Export mood journal, archived conversations and appointments as a zip of tables
+def export_data(export_format, state):
+    session = get_session(state)
+    ensure_mood_journal(session)
+    path = export_to_file(session_store, state["session_id"], session, export_format or default_format())
+    return path, state
+
+# (therapist, date, time) of an upcoming appointment's slot, or None for a
+# past appointment or one that is not for a slot of the therapist list
+def upcoming_slot(appointment):
+    therapist, date, time_slot = appointment["therapist"], appointment["date"], appointment["time"]
+    if therapist not in therapists or time_slot not in therapists[therapist]["times"] or not is_valid_date(date):
+        return None
+    return (therapist, date, time_slot) if date >= datetime.now().strftime("%Y-%m-%d") else None
+
+def upcoming_slots(appointments):
+    return {slot for slot in map(upcoming_slot, appointments) if slot}
+
+# Reserve the slots of restored appointments; returns the appointments to keep.
+# Slots in held are the session's already. An upcoming appointment whose slot
+# someone else has booked since the export is left out, so no slot is double-booked.
+def reserve_restored(appointments, held, session_id):
+    kept = []
+    for appointment in appointments:
+        slot = upcoming_slot(appointment)
+        if slot and slot not in held and not slot_index.reserve(*slot, session_id):
+            continue
+        kept.append(appointment)
+    return kept
+
+# Restore mood journal, archived conversations and appointments from an export.
+# The import works on a copy of the session, swapped in only once it succeeded.
+def import_data(file, state):
+    if not file:
+        return "Choose an export file to import.", gr.update(), state
+    previous = get_session(state)
+    held = upcoming_slots(previous["appointments"])
+    session = dict(previous)
+    try:
+        counts = import_session(session_store, state["session_id"], session, file,
+                                book=lambda appointments: reserve_restored(appointments, held, state["session_id"]))
+    except ImportError:
+        return "This export is in Parquet or Arrow format, which needs pyarrow installed.", gr.update(), state
+    except (zipfile.BadZipFile, ValueError, KeyError):
+        logger.warning("could not import %s", file, exc_info=True)
+        return "That file is not a Healora export.", gr.update(), state
+    # Slots of replaced appointments that the restored ones do not hold again
+    for slot in held - upcoming_slots(session["appointments"]):
+        slot_index.release(*slot, state["session_id"])
+    message = (f"Restored {counts.get('mood_entries', 0)} mood entries, {counts.get('conversations', 0)} conversations "
+               f"and {counts.get('appointments', 0)} appointments.")
+    if counts.get("skipped_appointments"):
+        message += (f" {counts['skipped_appointments']} upcoming appointments were not restored because their time "
+                    f"slot has been booked by someone else since the export. Please book a new time for them.")
+    return message, update_conversation_dropdown(session), state
+
 # Gradio Interface
 with gr.Blocks(title="Healora: Mental Health Support Chatbot") as demo:
-    state = gr.State({"chat_history": [], "conversation_archive": [], "current_conversation_id": 0, "mood_journal": [], "appointments": [], "failed_emails": []})
+    state = gr.State({})
     
     gr.Markdown("# Healora: Your Safe Space for Healing and Hope")
     gr.Markdown("I'm here to listen and support you. Feel free to share how you're feeling.")
@@ -471,12 +871,20 @@ with gr.Blocks(title="Healora: Mental Health Support Chatbot") as demo:
     
     with gr.Row():
         conversation_dropdown = gr.Dropdown(
-            choices=["Current Conversation"],
+            choices=[("Current Conversation", CURRENT_CONVERSATION)],
             label="Select Conversation",
-            value="Current Conversation"
+            value=CURRENT_CONVERSATION
         )
         new_conversation_btn = gr.Button("New Conversation")
     
+    with gr.Row():
+        search_box = gr.Textbox(
+            placeholder="e.g., sleep, exams",
+            label="Search Past Conversations"
+        )
+        search_btn = gr.Button("Search")
+    search_results = gr.Markdown("")
+    
     chatbot = gr.HTML(
         label="Conversation",
         value=""
@@ -490,8 +898,8 @@ with gr.Blocks(title="Healora: Mental Health Support Chatbot") as demo:
         submit_btn = gr.Button("Send")
         clear_btn = gr.Button("Clear Chat")
     
-    emergency_btn = gr.Button("Emergency Resources")
-    emergency_output = gr.Markdown("")
+    resources_btn = gr.Button("Emergency Resources")
+    resources_output = gr.Markdown("")
     
     with gr.Accordion("Mood Journal"):
         log_mood_btn = gr.Button("Log Mood")
@@ -526,6 +934,18 @@ with gr.Blocks(title="Healora: Mental Health Support Chatbot") as demo:
         schedule_btn = gr.Button("Book Appointment")
         schedule_output = gr.Textbox(label="Booking Status", interactive=False)
     
+    with gr.Accordion("Your Data", open=False):
+        export_format = gr.Radio(
+            choices=EXPORT_FORMATS,
+            label="Export Format",
+            value=default_format()
+        )
+        export_btn = gr.Button("Export Mood Journal, Conversations and Appointments")
+        export_file = gr.File(label="Export", interactive=False)
+        import_file = gr.File(label="Import an Export", file_types=[".zip"], type="filepath")
+        import_btn = gr.Button("Restore from Export")
+        import_output = gr.Textbox(label="Import Status", interactive=False)
+    
     with gr.Accordion("Request Emergency Meeting"):
         emergency_therapist = gr.Dropdown(
             choices=list(therapists.keys()),
@@ -556,14 +976,18 @@ with gr.Blocks(title="Healora: Mental Health Support Chatbot") as demo:
         )
     
     submit_btn.click(
-        fn=chatbot_function,
+        fn=chatbot_function_stream,
         inputs=[user_input, mood, conversation_mode, region, state],
-        outputs=[chatbot, state]
+        outputs=[chatbot, state],
+        concurrency_limit=CHAT_CONCURRENCY_LIMIT,
+        concurrency_id="chat"
     )
     user_input.submit(
-        fn=chatbot_function,
+        fn=chatbot_function_stream,
         inputs=[user_input, mood, conversation_mode, region, state],
-        outputs=[chatbot, state]
+        outputs=[chatbot, state],
+        concurrency_limit=CHAT_CONCURRENCY_LIMIT,
+        concurrency_id="chat"
     )
     clear_btn.click(
         fn=clear_chat,
@@ -580,14 +1004,26 @@ with gr.Blocks(title="Healora: Mental Health Support Chatbot") as demo:
         inputs=[conversation_dropdown, state],
         outputs=[chatbot, state]
     )
-    emergency_btn.click(
+    search_btn.click(
+        fn=search_conversations,
+        inputs=[search_box, state],
+        outputs=[search_results, state]
+    )
+    search_box.submit(
+        fn=search_conversations,
+        inputs=[search_box, state],
+        outputs=[search_results, state]
+    )
+    # Emergency events skip the queue, so they never wait behind chat turns
+    resources_btn.click(
         fn=show_emergency_resources,
         inputs=region,
-        outputs=emergency_output
+        outputs=resources_output,
+        queue=False
     )
     log_mood_btn.click(
         fn=log_mood,
-        inputs=[mood, state],
+        inputs=[mood, region, state],
         outputs=[mood_log_output, state]
     )
     mood_trend_btn.click(
@@ -597,7 +1033,12 @@ with gr.Blocks(title="Healora: Mental Health Support Chatbot") as demo:
     )
     therapist.change(
         fn=get_therapist_details,
-        inputs=therapist,
+        inputs=[therapist, date],
+        outputs=[time_slot, therapist_details]
+    )
+    date.blur(
+        fn=get_therapist_details,
+        inputs=[therapist, date],
         outputs=[time_slot, therapist_details]
     )
     schedule_btn.click(
@@ -608,12 +1049,24 @@ with gr.Blocks(title="Healora: Mental Health Support Chatbot") as demo:
     emergency_btn.click(
         fn=request_emergency_meeting,
         inputs=[emergency_therapist, user_name, gender, age, emergency_email, state],
-        outputs=[emergency_output, confirm_buttons, state]
+        outputs=[emergency_output, confirm_buttons, state],
+        queue=False
     )
     confirm_buttons.change(
         fn=confirm_emergency_meeting,
         inputs=[confirm_buttons, state],
-        outputs=[emergency_output, state]
+        outputs=[emergency_output, state],
+        queue=False
+    )
+    export_btn.click(
+        fn=export_data,
+        inputs=[export_format, state],
+        outputs=[export_file, state]
+    )
+    import_btn.click(
+        fn=import_data,
+        inputs=[import_file, state],
+        outputs=[import_output, conversation_dropdown, state]
     )
 
     gr.Markdown("""
@@ -624,5 +1077,91 @@ with gr.Blocks(title="Healora: Mental Health Support Chatbot") as demo:
     - [Crisis Text Line](https://www.crisistextline.org/)
     """)
 
+# Chat events run up to CHAT_CONCURRENCY_LIMIT at a time, every other event up to EVENT_CONCURRENCY_LIMIT
+demo.queue(max_size=GRADIO_QUEUE_SIZE, default_concurrency_limit=EVENT_CONCURRENCY_LIMIT)
+
+# Population mood dashboard for the clinical team, mounted at /dashboard. It
+# reads only the aggregate counters, so it costs the same however many moods
+# were logged. It is served only behind a login, so only when
+# HEALORA_DASHBOARD_PASSWORD is set.
+DASHBOARD_USER = os.getenv("HEALORA_DASHBOARD_USER", "clinician")
+DASHBOARD_PASSWORD = os.getenv("HEALORA_DASHBOARD_PASSWORD")
+
+def show_population_moods(region):
+    today = datetime.now().date()
+    rows = mood_aggregates.daily(first_dashboard_day(today))
+    if not rows:
+        return "No moods logged in the last 30 days.", None, None, None
+    distribution, daily, scores = mood_frames(rows, today, region)
+    counts_fig, score_fig = dashboard_figures(daily, scores, region)
+    return "", distribution, counts_fig, score_fig
+
+def show_coping_outcomes():
+    shown, outcomes = mood_aggregates.coping()
+    return coping_frame(shown, outcomes, coping_strategies)
+
+with gr.Blocks(title="Healora Mood Dashboard") as dashboard:
+    gr.Markdown("# Healora Mood Dashboard\nMoods logged by all users over the last 30 days. "
+                "Only counts per region and day are kept, never who logged them.")
+    with gr.Tab("Mood by region and day"):
+        dashboard_region = gr.Dropdown(choices=["All"] + list(regional_resources), value="All", label="Region")
+        population_status = gr.Markdown("")
+        distribution_output = gr.Dataframe(label="Share of each mood by region", interactive=False)
+        daily_moods_output = gr.Plot()
+        mood_scores_output = gr.Plot()
+    with gr.Tab("After coping strategies"):
+        gr.Markdown("The next mood a user logged within a day of being shown a coping strategy, "
+                    "compared with the mood it was shown for.")
+        coping_output = gr.Dataframe(label="Coping strategy outcomes", interactive=False)
+    refresh_btn = gr.Button("Refresh")
+
+    population_outputs = [population_status, distribution_output, daily_moods_output, mood_scores_output]
+    for event in (dashboard.load, refresh_btn.click, dashboard_region.change):
+        event(fn=show_population_moods, inputs=dashboard_region, outputs=population_outputs)
+    for event in (dashboard.load, refresh_btn.click):
+        event(fn=show_coping_outcomes, outputs=coping_output)
+
+# Size of the in-memory tiers and queues, read when /metrics is scraped
+metrics.Gauge("healora_sessions_cached", "Sessions held in the in-memory LRU tier.", lambda: len(session_store.cache))
+metrics.Gauge("healora_outbox_messages", "Outbox messages by status.", outbox.stats, label="status")
+metrics.Gauge("healora_model_gate", "Model requests in flight and waiting for admission.", model_gate.stats, label="state")
+metrics.Gauge("healora_alert_latency_seconds", "Emergency alert latency quantiles over recent alerts, and the SLO.",
+              alert_sender.stats, label="quantile")
+if response_cache is not None:
+    metrics.Gauge("healora_response_cache", "Response cache hits, misses, bypassed lookups, entries and hit rate.",
+                  response_cache.stats, label="stat")
+metrics.Gauge("healora_prompt_tokens_mean", "Mean estimated per-turn prompt tokens per model request.",
+              lambda: prompt_metrics.stats()["mean_tokens"])
+metrics.Gauge("healora_system_tokens_mean", "Mean estimated system instruction tokens per model request.",
+              lambda: prompt_metrics.stats()["mean_system_tokens"])
+
+# Gradio app with the Prometheus metrics endpoint alongside it at /metrics,
+# and, when their secrets are set, the JSON chat API at /v1 and the mood dashboard at /dashboard
+def create_server():
+    from fastapi import FastAPI
+    from fastapi.responses import PlainTextResponse
+    from chat_api import API_KEY, create_chat_router
+    server = FastAPI()
+    # Callers choose their session IDs, so the API is only served behind a key
+    if API_KEY:
+        server.include_router(create_chat_router(api_chat_turn), prefix="/v1")
+    else:
+        logger.info("HEALORA_API_KEY is not set, so the chat API is not served")
+
+    @server.get("/metrics", response_class=PlainTextResponse)
+    def metrics_endpoint():
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+    # Mounted before the interface, whose mount at / would match it first
+    if DASHBOARD_PASSWORD:
+        gr.mount_gradio_app(server, dashboard, path="/dashboard", auth=(DASHBOARD_USER, DASHBOARD_PASSWORD))
+    else:
+        logger.info("HEALORA_DASHBOARD_PASSWORD is not set, so the mood dashboard is not served")
+    app = gr.mount_gradio_app(server, demo, path="/")
+    warm_up()
+    return app
+
 if __name__ == "__main__":
-    demo.launch()
+    import uvicorn
+    uvicorn.run(create_server(), host=os.getenv("GRADIO_SERVER_NAME", "127.0.0.1"),
+                port=int(os.getenv("GRADIO_SERVER_PORT", "7860")))
@@ -0,0 +1,67 @@
+import os
+import sqlite3
+import threading
+import time
+
+from remote_store import STORE_URL, RemoteSlotIndex
+
+# Therapist availability shared by every session and worker.
+#
+# Each booked (therapist, date, time) slot is one row whose primary key is the
+# slot itself, so reserving is a single INSERT that SQLite makes atomic: of two
+# concurrent bookings for the same slot, exactly one succeeds. Free slots for
+# a date come from one primary-key range lookup plus a set membership test per
+# slot, however many appointments exist. With HEALORA_STORE_URL set the index
+# lives in the network store instead, shared by every replica.
+
+SLOTS_DB_PATH = os.getenv("HEALORA_SLOTS_DB", "healora_slots.db")
+
+class SlotIndex:
+    def __init__(self, path=SLOTS_DB_PATH):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS slots ("
+                "therapist TEXT NOT NULL, date TEXT NOT NULL, time TEXT NOT NULL, "
+                "session_id TEXT NOT NULL, reserved REAL NOT NULL, "
+                "PRIMARY KEY (therapist, date, time))"
+            )
+
+    # Returns True if the slot was free and is now held by session_id
+    def reserve(self, therapist, date, time_slot, session_id):
+        try:
+            with self.lock, self.conn:
+                self.conn.execute(
+                    "INSERT INTO slots (therapist, date, time, session_id, reserved) VALUES (?, ?, ?, ?, ?)",
+                    (therapist, date, time_slot, session_id, time.time())
+                )
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    # Frees a slot held by session_id; returns True if it was held
+    def release(self, therapist, date, time_slot, session_id):
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM slots WHERE therapist = ? AND date = ? AND time = ? AND session_id = ?",
+                (therapist, date, time_slot, session_id)
+            )
+        return cursor.rowcount > 0
+
+    def booked_times(self, therapist, date):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT time FROM slots WHERE therapist = ? AND date = ?", (therapist, date)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    # Slots from time_slots that are still free on date, in their original order
+    def free_times(self, therapist, date, time_slots):
+        booked = self.booked_times(therapist, date)
+        return [time_slot for time_slot in time_slots if time_slot not in booked]
+
+# Slot index configured by HEALORA_STORE_URL or HEALORA_SLOTS_DB
+def create_slot_index(path=SLOTS_DB_PATH, url=STORE_URL):
+    return RemoteSlotIndex(url) if url else SlotIndex(path)
@@ -0,0 +1,124 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mood_aggregates import MoodAggregates, coping_frame, dashboard_figures, first_dashboard_day, mood_frames
+from mood_analytics import MOODS
+
+# Cost of the population mood dashboard as logged moods accumulate.
+#
+# For each total event count, moods are spread over --days days and four
+# regions, and --follow-up of them follow a coping strategy. "rescan" builds
+# the dashboard the way it would be without counters: group every raw event
+# (kept column-wise in memory, so no session loading is counted) by day,
+# region and mood, then build the same frames and figures. "counters" reads
+# the materialized counters from SQLite and builds the same frames and
+# figures. Both are best of --repeat. Stores are filled with their counts in
+# bulk; logging cost per event is then measured by recording --sample more
+# events one at a time through MoodAggregates on top of the largest store.
+#
+# Usage: python benchmarks/bench_aggregates.py [--events 1000,10000,100000,1000000] [--days 365]
+
+REGIONS = ["USA", "India", "UK", "Global"]
+STRATEGIES = {mood: ["first", "second"] for mood in MOODS}
+
+def generate(count, days, follow_up, seed=0):
+    rng = random.Random(seed)
+    today = date.today()
+    day_names = [(today - timedelta(days=offset)).isoformat() for offset in range(days)]
+    events = {"day": [], "region": [], "mood": [], "shown": []}
+    for _ in range(count):
+        events["day"].append(rng.choice(day_names))
+        events["region"].append(rng.choice(REGIONS))
+        events["mood"].append(rng.randrange(len(MOODS)))
+        events["shown"].append([rng.randrange(len(MOODS)), rng.randrange(2)] if rng.random() < follow_up else None)
+    return events
+
+# Counters for the events, inserted in bulk
+def fill(store, events):
+    daily, shown, outcomes = {}, {}, {}
+    for day, region, mood, follow_up in zip(events["day"], events["region"], events["mood"], events["shown"]):
+        daily[(day, region, mood)] = daily.get((day, region, mood), 0) + 1
+        if follow_up:
+            shown[tuple(follow_up)] = shown.get(tuple(follow_up), 0) + 1
+            key = (*follow_up, mood)
+            outcomes[key] = outcomes.get(key, 0) + 1
+    with store.conn:
+        store.conn.executemany("INSERT INTO mood_daily VALUES (?, ?, ?, ?)", [(*k, v) for k, v in daily.items()])
+        store.conn.executemany("INSERT INTO coping_shown VALUES (?, ?, ?)", [(*k, v) for k, v in shown.items()])
+        store.conn.executemany("INSERT INTO coping_outcomes VALUES (?, ?, ?, ?)",
+                               [(*k, v) for k, v in outcomes.items()])
+
+def render(rows, shown, outcomes, today):
+    distribution, daily, scores = mood_frames(rows, today)
+    dashboard_figures(daily, scores)
+    coping_frame(shown, outcomes, STRATEGIES)
+
+def rescan(events, today):
+    import pandas as pd
+    frame = pd.DataFrame({"day": events["day"], "region": events["region"], "mood": events["mood"]})
+    frame = frame[frame["day"] >= first_dashboard_day(today)]
+    rows = frame.groupby(["day", "region", "mood"]).size().reset_index().values.tolist()
+    shown, outcomes = {}, {}
+    for mood, follow_up in zip(events["mood"], events["shown"]):
+        if follow_up:
+            shown[tuple(follow_up)] = shown.get(tuple(follow_up), 0) + 1
+            key = (*follow_up, mood)
+            outcomes[key] = outcomes.get(key, 0) + 1
+    render(rows, [[*k, v] for k, v in shown.items()], [[*k, v] for k, v in outcomes.items()], today)
+
+def counters(store, today):
+    shown, outcomes = store.coping()
+    render(store.daily(first_dashboard_day(today)), shown, outcomes, today)
+
+def best(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", default="1000,10000,100000,1000000")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--follow-up", type=float, default=0.3)
+    parser.add_argument("--sample", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    today = date.today()
+    # Warm up imports and plotly's templates
+    warm = generate(100, args.days, args.follow_up)
+    rescan(warm, today)
+
+    print(f"moods over {args.days} days, {len(REGIONS)} regions, {args.follow_up:.0%} after a coping strategy")
+    print(f"{'events':>10} {'rescan (ms)':>12} {'counters (ms)':>14} {'counter rows':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in map(int, args.events.split(",")):
+            events = generate(count, args.days, args.follow_up)
+            store = MoodAggregates(os.path.join(tmp, f"aggregates-{count}.db"))
+            fill(store, events)
+            rows = store.conn.execute("SELECT COUNT(*) FROM mood_daily").fetchone()[0]
+            print(f"{count:>10} {best(lambda: rescan(events, today), args.repeat) * 1000:>12.1f} "
+                  f"{best(lambda: counters(store, today), args.repeat) * 1000:>14.1f} {rows:>13}")
+
+        sample = generate(args.sample, args.days, args.follow_up, seed=1)
+        timings = []
+        for day, region, mood, follow_up in zip(sample["day"], sample["region"], sample["mood"], sample["shown"]):
+            start = time.perf_counter()
+            store.record_mood(day, region, mood, follow_up)
+            timings.append(time.perf_counter() - start)
+        print(f"record_mood on {count} events: median {statistics.median(timings) * 1e6:.0f} us, "
+              f"p99 {sorted(timings)[int(len(timings) * 0.99)] * 1e6:.0f} us per event")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Throughput of the JSON chat API with a fake model.
+#
+# The server (uvicorn with the Gradio app and the API, as `python app.py`
+# runs it) is started in its own process. N messages from N sessions are then
+# sent three ways: one POST /v1/chat at a time, --clients concurrent POST
+# /v1/chat calls, and a single POST /v1/chat/batch of all N. For comparison,
+# "handler" runs the chat handler in-process without HTTP, as the chat box
+# uses it (rendering the display for every chunk) and as the API does
+# (render=False), after a warm-up pass. Client and server share the machine's
+# cores.
+#
+# Usage: python benchmarks/bench_api.py [--messages 200] [--clients 16] [--latency 0.05] [--port 7871]
+
+API_KEY = "bench-api-key"
+
+def server_env(args):
+    env = dict(os.environ)
+    env.update({
+        "HEALORA_FAKE_MODEL": "1",
+        "HEALORA_FAKE_GMAIL": "1",
+        "HEALORA_FAKE_LATENCY": str(args.latency),
+        "HEALORA_SESSION_DB": ":memory:",
+        "HEALORA_OUTBOX_DB": ":memory:",
+        "HEALORA_SLOTS_DB": ":memory:",
+        "HEALORA_AGGREGATES_DB": ":memory:",
+        "HEALORA_MODEL_RPM": "0",
+        "HEALORA_MODEL_CONCURRENCY": "1000",
+        "HEALORA_API_CONCURRENCY": str(args.concurrency),
+        "HEALORA_API_KEY": API_KEY,
+        "GRADIO_SERVER_PORT": str(args.port)
+    })
+    return env
+
+def wait_for_server(url, process):
+    import httpx
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("server exited")
+        try:
+            httpx.get(url + "/metrics", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.5)
+    raise RuntimeError("server did not start")
+
+def item(index):
+    return {"session_id": f"bench-{index}", "message": f"I've been feeling low this week ({index})",
+            "tone": "Calm", "region": "Global"}
+
+async def sequential(client, url, count):
+    for index in range(count):
+        (await client.post(url + "/v1/chat", json=item(index))).raise_for_status()
+
+async def concurrent(client, url, count, clients):
+    indexes = iter(range(count))
+
+    async def worker():
+        for index in indexes:
+            (await client.post(url + "/v1/chat", json=item(index))).raise_for_status()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+
+async def batch(client, url, count):
+    lines = 0
+    async with client.stream("POST", url + "/v1/chat/batch", json={"items": [item(i) for i in range(count)]}) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            lines += bool(line)
+    assert lines == count, lines
+
+def handler_run(args):
+    os.environ.update(server_env(args))
+    import app
+    from language import load_detector
+    load_detector()
+
+    async def run(count, render, prefix):
+        limit = asyncio.Semaphore(args.concurrency)
+
+        async def turn(index):
+            async with limit:
+                async for _ in app.chatbot_function_stream(item(index)["message"], "", "Calm", "Global",
+                                                           {"session_id": f"{prefix}-{index}"}, render=render):
+                    pass
+        start = time.perf_counter()
+        await asyncio.gather(*(turn(i) for i in range(count)))
+        return time.perf_counter() - start
+
+    async def runs():
+        # Same warm-up as the server gets
+        await run(args.messages, True, "warm-up")
+        return await run(args.messages, True, "ui"), await run(args.messages, False, "api")
+    print(*asyncio.run(runs()))
+
+async def client_runs(args, url):
+    import httpx
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    async with httpx.AsyncClient(timeout=600, limits=limits, headers={"Authorization": f"Bearer {API_KEY}"}) as client:
+        # Warm up the server: language profiles, reply models
+        await batch(client, url, 4)
+        results = {}
+        for name, run in (("single, sequential", lambda: sequential(client, url, args.messages)),
+                          (f"single, {args.clients} clients", lambda: concurrent(client, url, args.messages, args.clients)),
+                          ("batch NDJSON", lambda: batch(client, url, args.messages))):
+            start = time.perf_counter()
+            await run()
+            results[name] = time.perf_counter() - start
+        return results
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--port", type=int, default=7871)
+    parser.add_argument("--handler", action="store_true")
+    args = parser.parse_args()
+    if args.handler:
+        handler_run(args)
+        return
+
+    url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "app.py")], env=server_env(args), cwd=ROOT,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_server(url, server)
+        results = asyncio.run(client_runs(args, url))
+    finally:
+        server.terminate()
+        server.wait()
+    output = subprocess.run([sys.executable, __file__, "--handler"] + sys.argv[1:], check=True,
+                            capture_output=True, text=True).stdout
+    rendered, unrendered = map(float, output.strip().splitlines()[-1].split())
+    results["handler, rendered"] = rendered
+    results["handler, render=False"] = unrendered
+
+    print(f"{args.messages} messages, fake model {args.latency * 1000:.0f} ms per chunk, "
+          f"API concurrency {args.concurrency}")
+    print(f"{'path':<32} {'seconds':>8} {'msgs/s':>8}")
+    for name, seconds in results.items():
+        print(f"{name:<32} {seconds:>8.2f} {args.messages / seconds:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_history import append_turn, set_reply
+from session_store import SESSION_LIMITS, MemoryBackend, SessionStore, SQLiteBackend, new_session_data
+
+# Archive load and search for users with a full conversation archive.
+#
+# Builds sessions with the maximum number of archived conversations, indexing
+# each turn as it is added, then times loading a conversation by ID and
+# searching across the archive, against scanning every stored history.
+# Usage: python benchmarks/bench_archive.py [sessions] [turns per conversation]
+
+# Common words plus a long tail, drawn with a Zipf-like distribution
+WORDS = ("i feel the and to my a it is of me that with work sleep tired friends family exams "
+         "anxious breathing walk music journal panic deadline sister brother school therapy calm").split()
+WORDS += [f"word{i}" for i in range(5000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(WORDS))]
+
+def sentence(rng, length):
+    return " ".join(rng.choices(WORDS, WEIGHTS, k=length))
+
+def fill(store, session_id, conversations, turns, rng):
+    data = new_session_data()
+    index_time = 0.0
+    for _ in range(conversations):
+        for _ in range(turns):
+            append_turn(data["chat_history"], sentence(rng, 12))
+            set_reply(data["chat_history"], "I hear you. " + sentence(rng, 30))
+            start = time.perf_counter()
+            store.index_turn(session_id, data)
+            index_time += time.perf_counter() - start
+        store.archive_conversation(session_id, data, "2025-01-01 00:00:00")
+    return index_time
+
+def timed(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return (time.perf_counter() - start) / repeats * 1000, result
+
+def scan_search(store, session_id, data, word):
+    hits = []
+    for conv in data["conversation_archive"]:
+        history = store.load_conversation(session_id, conv["id"])
+        if any(word in user_msg or word in (bot_msg or "") for user_msg, bot_msg in zip(history["user"], history["bot"])):
+            hits.append(conv["id"])
+    return hits
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    conversations = SESSION_LIMITS["conversation_archive"]
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, backend in [("memory", MemoryBackend()), ("sqlite", SQLiteBackend(os.path.join(tmp, "sessions.db")))]:
+            store = SessionStore(backend)
+            index_time = sum(fill(store, f"user-{i}", conversations, turns, rng) for i in range(sessions))
+            session_id = "user-0"
+            data = store.get(session_id)
+            target = data["conversation_archive"][conversations // 2]["id"]
+            load_ms, _ = timed(lambda: store.load_conversation(session_id, target), 200)
+            search_ms, results = timed(lambda: store.search(session_id, "sister panic"), 50)
+            prefix_ms, _ = timed(lambda: store.search(session_id, "breat"), 50)
+            scan_ms, _ = timed(lambda: scan_search(store, session_id, data, "sister"), 5)
+            print(f"{name}: {sessions} sessions x {conversations} conversations x {turns} turns")
+            print(f"  index a turn          {index_time / (sessions * conversations * turns) * 1e6:8.1f} us")
+            print(f"  load by ID            {load_ms:8.3f} ms")
+            print(f"  search (2 words)      {search_ms:8.3f} ms  ({len(results)} conversations)")
+            print(f"  search (prefix)       {prefix_ms:8.3f} ms")
+            print(f"  scan every history    {scan_ms:8.3f} ms")
+
+if __name__ == "__main__":
+    main()
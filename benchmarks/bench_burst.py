@@ -0,0 +1,100 @@
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Burst test of model admission control against a fake model with a rate quota.
+#
+# Each burst sends one chat turn from N sessions at once. "ungated" sends every
+# request straight to the model without retries, as before admission control;
+# "gated" goes through the token bucket, fair queue and retries. For each burst
+# size the table shows how many users got a model reply, were asked to try
+# again, or got the canned fallback, and the turn latency.
+#
+# Usage: python benchmarks/bench_burst.py [--quota 20] [--sizes 10,25,50,100,200,400]
+#        [--latency 0.05] [--timeout 10]
+
+def configure(args, tmp):
+    os.environ["HEALORA_FAKE_MODEL"] = "1"
+    os.environ["HEALORA_FAKE_GMAIL"] = "1"
+    os.environ["HEALORA_SESSION_DB"] = ":memory:"
+    os.environ["HEALORA_OUTBOX_DB"] = os.path.join(tmp, "outbox.db")
+    os.environ["HEALORA_SLOTS_DB"] = os.path.join(tmp, "slots.db")
+    os.environ["HEALORA_AGGREGATES_DB"] = os.path.join(tmp, "aggregates.db")
+    os.environ["HEALORA_MODEL_QUEUE_TIMEOUT"] = str(args.timeout)
+    # Admission control alone: no hedged requests, and no reply deadline before the admission timeout
+    os.environ["HEALORA_FALLBACK_MODELS"] = ""
+    os.environ["HEALORA_REPLY_DEADLINE"] = str(args.timeout + 60)
+    # One warning per failed request would drown the table
+    logging.getLogger("healora").setLevel(logging.ERROR)
+
+async def burst(app, size):
+    async def turn(index):
+        state = {}
+        start = time.perf_counter()
+        async for _ in app.chatbot_function_stream(f"I feel overwhelmed today ({index})", "", "Calm", "Global", state):
+            pass
+        reply = app.get_session(state)["chat_history"]["bot"][-1]
+        return time.perf_counter() - start, reply
+    return await asyncio.gather(*(turn(index) for index in range(size)))
+
+def summarize(app, label, size, results, model):
+    from fakes import DEFAULT_FAKE_REPLY
+    latencies = sorted(latency for latency, _ in results)
+    replied = sum(reply.startswith(DEFAULT_FAKE_REPLY[:20]) for _, reply in results)
+    busy = sum(reply.startswith(app.BUSY_RESPONSE[:20]) for _, reply in results)
+    fallback = len(results) - replied - busy
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    print(f"{label:<9} {size:>6} {replied / size:>8.0%} {busy / size:>8.0%} {fallback / size:>9.0%} "
+          f"{quantiles[49] * 1000:>9.0f} {quantiles[98] * 1000:>9.0f} {model.rejected:>6}")
+
+async def run(args):
+    from admission import ModelGate
+    from fakes import FakeGenerativeModel
+    print(f"fake model quota {args.quota} requests/s, admission timeout {args.timeout}s")
+    print(f"{'mode':<9} {'burst':>6} {'replied':>8} {'busy':>8} {'fallback':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'429s':>6}")
+    retries = app_module.MODEL_RETRIES
+    for size in args.sizes:
+        for label in ("ungated", "gated"):
+            model = FakeGenerativeModel(latency=args.latency, quota=args.quota)
+            # Summaries and every (tone, region) reply model share the one quota
+            app_module._model = model
+            app_module._reply_models.clear()
+            app_module.create_model = lambda system_instruction=None, name=None: model
+            if label == "ungated":
+                app_module.model_gate = ModelGate(rpm=0, concurrency=10 ** 6, queue_size=10 ** 6)
+                app_module.MODEL_RETRIES = 0
+            else:
+                # Refill plus burst stay within the quota over any one-second window
+                app_module.model_gate = ModelGate(rpm=args.quota * 60 * 0.9, burst=max(1, args.quota // 10),
+                                                  concurrency=args.concurrency, queue_size=args.queue_size)
+                app_module.MODEL_RETRIES = retries
+            summarize(app_module, label, size, await burst(app_module, size), model)
+            # Let the fake quota window empty before the next burst
+            await asyncio.sleep(1.1)
+
+def main():
+    global app_module
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quota", type=int, default=20)
+    parser.add_argument("--sizes", default="10,25,50,100,200,400")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--queue-size", type=int, default=500)
+    args = parser.parse_args()
+    args.sizes = [int(size) for size in args.sizes.split(",")]
+    with tempfile.TemporaryDirectory() as tmp:
+        configure(args, tmp)
+        import app as app_module
+        asyncio.run(run(args))
+        app_module.outbox.stop()
+
+if __name__ == "__main__":
+    main()
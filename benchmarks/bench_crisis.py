@@ -0,0 +1,94 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crisis import CRISIS, DISTRESS, screen_message
+
+# Throughput and recall of the local crisis/distress screen over a labeled corpus.
+# Usage: python benchmarks/bench_crisis.py [repeats]
+
+LABELED_MESSAGES = [
+    ("I want to kill myself", CRISIS),
+    ("I've been thinking about suicide a lot lately", CRISIS),
+    ("Sometimes I feel suicidal at night", CRISIS),
+    ("I just want to end it all", CRISIS),
+    ("everyone would be better off without me", CRISIS),
+    ("I don’t want to live anymore", CRISIS),
+    ("I can't go on like this", CRISIS),
+    ("I cut myself again yesterday", CRISIS),
+    ("I keep thinking about self-harm", CRISIS),
+    ("I wish I was dead", CRISIS),
+    ("thinking of taking an overdose", CRISIS),
+    ("There is no reason to live", CRISIS),
+    ("Quiero morir, ya no aguanto", CRISIS),
+    ("Estoy pensando en suicidarme", CRISIS),
+    ("J'ai envie de mourir", CRISIS),
+    ("Je veux me suicider", CRISIS),
+    ("Ich will sterben", CRISIS),
+    ("Ich denke an Selbstmord", CRISIS),
+    ("Eu quero morrer", CRISIS),
+    ("Vou me matar", CRISIS),
+    ("मैं आत्महत्या के बारे में सोच रहा हूँ", CRISIS),
+    ("मैं मरना चाहता हूँ", CRISIS),
+    ("main marna chahta hoon", CRISIS),
+    ("ab jeena nahi chahti", CRISIS),
+    ("I feel completely hopeless", DISTRESS),
+    ("I feel worthless at work", DISTRESS),
+    ("I can't cope with my exams", DISTRESS),
+    ("I had a panic attack this morning", DISTRESS),
+    ("It feels like nobody cares about me", DISTRESS),
+    ("Me siento sin esperanza", DISTRESS),
+    ("Ich kann nicht mehr", DISTRESS),
+    ("Não aguento mais essa situação", DISTRESS),
+    ("Je suis désespérée", DISTRESS),
+    ("main bahut akela mehsoos karta hoon", DISTRESS),
+    ("hi", None),
+    ("ok", None),
+    ("I had a good day today!", None),
+    ("Can you recommend a breathing exercise?", None),
+    ("I'm a bit stressed about my presentation", None),
+    ("Thanks, that helped a lot", None),
+    ("How do I book an appointment?", None),
+    ("I feel anxious before flights", None),
+    ("My sister is visiting this weekend", None),
+    ("Estoy un poco cansado hoy", None),
+    ("Je suis content de te parler", None),
+    ("Heute war ein guter Tag", None),
+    ("आज मैं खुश हूँ", None),
+    ("aaj mera din accha tha", None),
+]
+
+def run(repeats):
+    true_positive = false_negative = false_positive = 0
+    misses = []
+    for message, label in LABELED_MESSAGES:
+        result = screen_message(message)
+        if label is not None:
+            if result is not None:
+                true_positive += 1
+            else:
+                false_negative += 1
+                misses.append(message)
+        elif result is not None:
+            false_positive += 1
+            misses.append(message)
+
+    messages = [message for message, _ in LABELED_MESSAGES]
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for message in messages:
+            screen_message(message)
+    elapsed = time.perf_counter() - start
+    total = repeats * len(messages)
+
+    print(f"messages screened: {total}")
+    print(f"throughput: {total / elapsed:,.0f} messages/s ({elapsed / total * 1e6:.2f} us/message)")
+    print(f"recall: {true_positive / (true_positive + false_negative):.3f}")
+    print(f"precision: {true_positive / max(1, true_positive + false_positive):.3f}")
+    for message in misses:
+        print(f"misclassified: {message}")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,230 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Emergency meeting latency under a saturating chat load, against the real
+# server (`python app.py`) with a fake model and fake Gmail.
+#
+# --chat-clients clients (in a process of their own) send chat turns through
+# the Gradio queue back to back, more than the chat concurrency limit and the
+# model can serve, so the queue stays full. Meanwhile a probe requests and confirms an emergency
+# meeting every --interval seconds, alternating between two lanes: "queue"
+# sends both events through the Gradio queue like every event before, and
+# "priority" calls them directly, as the interface now does. The latency is
+# from sending the confirmation to the reply that the alert was sent,
+# checked against --slo at p99; a request turned away by the full queue, or
+# not answered within a minute, counts as failed. Also reports the server's
+# own alert latency quantiles from /metrics and the chat load served meanwhile.
+#
+# Usage: python benchmarks/bench_emergency.py [--chat-clients 300] [--duration 60] [--interval 0.5]
+#        [--latency 0.2] [--gmail-latency 0.1] [--slo 2] [--port 7873]
+
+def server_env(args, tmp):
+    env = dict(os.environ)
+    env.update({
+        "HEALORA_FAKE_MODEL": "1",
+        "HEALORA_FAKE_GMAIL": "1",
+        "HEALORA_FAKE_LATENCY": str(args.latency),
+        "HEALORA_FAKE_GMAIL_LATENCY": str(args.gmail_latency),
+        "HEALORA_SESSION_DB": ":memory:",
+        "HEALORA_OUTBOX_DB": os.path.join(tmp, "outbox.db"),
+        "HEALORA_SLOTS_DB": os.path.join(tmp, "slots.db"),
+        "HEALORA_AGGREGATES_DB": os.path.join(tmp, "aggregates.db"),
+        "HEALORA_MODEL_RPM": "0",
+        "HEALORA_MODEL_CONCURRENCY": str(args.model_concurrency),
+        "HEALORA_ALERT_SLO": str(args.slo),
+        "GRADIO_SERVER_PORT": str(args.port)
+    })
+    return env
+
+# Dependency index of each handler, as the browser addresses them
+def fn_indexes():
+    os.environ.setdefault("HEALORA_FAKE_MODEL", "1")
+    os.environ.setdefault("HEALORA_FAKE_GMAIL", "1")
+    os.environ.setdefault("HEALORA_SESSION_DB", ":memory:")
+    os.environ.setdefault("HEALORA_OUTBOX_DB", ":memory:")
+    os.environ.setdefault("HEALORA_SLOTS_DB", ":memory:")
+    os.environ.setdefault("HEALORA_AGGREGATES_DB", ":memory:")
+    import app
+    indexes = {}
+    for index, fn in app.demo.fns.items():
+        indexes.setdefault(fn.fn.__name__, index)
+    app.outbox.stop()
+    return indexes
+
+async def wait_for_server(client, url, process):
+    for _ in range(240):
+        if process.poll() is not None:
+            raise RuntimeError("server exited")
+        try:
+            await client.get(url + "/metrics")
+            return
+        except Exception:
+            await asyncio.sleep(0.5)
+    raise RuntimeError("server did not start")
+
+# Run an event through the Gradio queue; returns its output data
+async def queued(client, url, fn_index, data, session_hash):
+    join = await client.post(url + "/queue/join", json={"data": data, "fn_index": fn_index, "session_hash": session_hash,
+                                                         "event_data": None, "trigger_id": None})
+    if join.status_code != 200:
+        raise RuntimeError(f"queue join failed: {join.status_code}")
+    event_id = join.json()["event_id"]
+    async with client.stream("GET", url + "/queue/data", params={"session_hash": session_hash}) as stream:
+        async for line in stream.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            message = json.loads(line[5:])
+            if message.get("event_id") == event_id and message.get("msg") == "process_completed":
+                if not message.get("success"):
+                    raise RuntimeError("event failed")
+                return message["output"]["data"]
+    raise RuntimeError("queue stream ended early")
+
+# Run an event directly, outside the queue
+async def direct(client, url, fn_index, data, session_hash):
+    response = await client.post(url + "/run/predict", json={"data": data, "fn_index": fn_index,
+                                                              "session_hash": session_hash})
+    response.raise_for_status()
+    return response.json()["data"]
+
+async def chat_client(client, url, fns, stop, served, rejected):
+    session_hash = uuid.uuid4().hex
+    while not stop.is_set():
+        try:
+            await queued(client, url, fns["chatbot_function_stream"],
+                         ["I keep worrying about everything lately", "Anxious", "Calm", "Global", None], session_hash)
+            served.append(time.perf_counter())
+        except Exception:
+            rejected.append(time.perf_counter())
+            await asyncio.sleep(0.2)
+
+async def probe(client, url, fns, lane):
+    call = queued if lane == "queue" else direct
+    session_hash = uuid.uuid4().hex
+    start = None
+    try:
+        await call(client, url, fns["request_emergency_meeting"],
+                   ["Dr. Jane Smith", "Alex", "Prefer not to say", "30", "alex@example.com", None], session_hash)
+        start = time.perf_counter()
+        reply = (await asyncio.wait_for(call(client, url, fns["confirm_emergency_meeting"], ["Yes", None], session_hash),
+                                        60))[0]
+    except Exception:
+        # Turned away by the full queue, or no reply within a minute
+        return None
+    return time.perf_counter() - start if reply.startswith("Emergency meeting alert sent") else None
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+# Chat load for ramp + duration seconds; prints turns served and turned away
+# after the ramp as JSON
+async def load(args, fns):
+    import httpx
+    url = f"http://127.0.0.1:{args.port}"
+    limits = httpx.Limits(max_connections=args.chat_clients, max_keepalive_connections=args.chat_clients)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        stop = asyncio.Event()
+        served, rejected = [], []
+        tasks = [asyncio.create_task(chat_client(client, url, fns, stop, served, rejected))
+                 for _ in range(args.chat_clients)]
+        await asyncio.sleep(args.ramp)
+        start, served_before, rejected_before = time.perf_counter(), len(served), len(rejected)
+        await asyncio.sleep(args.duration)
+        result = {"rate": (len(served) - served_before) / (time.perf_counter() - start),
+                  "rejected": len(rejected) - rejected_before}
+        stop.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    print(json.dumps(result))
+
+# Emergency probes, from a process of their own like a user's browser
+async def run(args, fns):
+    import httpx
+    url = f"http://127.0.0.1:{args.port}"
+    async with httpx.AsyncClient(timeout=120) as client:
+        await wait_for_server(client, url, args.server)
+        load_process = subprocess.Popen([sys.executable, __file__, "--load", json.dumps(fns)] + sys.argv[1:],
+                                        stdout=subprocess.PIPE, text=True)
+        # Let the queue fill up
+        await asyncio.sleep(args.ramp)
+        samples = {"queue": [], "priority": []}
+        failures = {"queue": 0, "priority": 0}
+        probes = []
+        end = time.perf_counter() + args.duration
+        lane_index = 0
+        while time.perf_counter() < end:
+            lane = ("queue", "priority")[lane_index % 2]
+            lane_index += 1
+
+            async def record(lane=lane):
+                latency = await probe(client, url, fns, lane)
+                if latency is None:
+                    failures[lane] += 1
+                else:
+                    samples[lane].append(latency)
+            probes.append(asyncio.create_task(record()))
+            await asyncio.sleep(args.interval)
+        await asyncio.gather(*probes)
+        metrics_text = (await client.get(url + "/metrics")).text
+        load_result = json.loads(load_process.communicate()[0].strip().splitlines()[-1])
+    return samples, failures, load_result["rate"], load_result["rejected"], metrics_text
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chat-clients", type=int, default=300)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--ramp", type=float, default=10)
+    parser.add_argument("--interval", type=float, default=0.5)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--gmail-latency", type=float, default=0.1)
+    parser.add_argument("--model-concurrency", type=int, default=16)
+    parser.add_argument("--slo", type=float, default=2.0)
+    parser.add_argument("--port", type=int, default=7873)
+    parser.add_argument("--load")
+    args = parser.parse_args()
+    if args.load:
+        asyncio.run(load(args, json.loads(args.load)))
+        return
+
+    fns = fn_indexes()
+    with tempfile.TemporaryDirectory() as tmp:
+        args.server = subprocess.Popen([sys.executable, os.path.join(ROOT, "app.py")], env=server_env(args, tmp),
+                                       cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            samples, failures, chat_rate, rejected, metrics_text = asyncio.run(run(args, fns))
+        finally:
+            args.server.terminate()
+            args.server.wait()
+
+    print(f"{args.chat_clients} chat clients, fake model {args.latency * 1000:.0f} ms/chunk, "
+          f"{args.model_concurrency} model requests at a time, Gmail {args.gmail_latency * 1000:.0f} ms")
+    print(f"chat load: {chat_rate:.1f} turns/s served, {rejected} turns turned away by the full queue")
+    print(f"{'lane':<9} {'alerts':>7} {'failed':>7} {'p50 (ms)':>9} {'p99 (ms)':>9} {'max (ms)':>9} "
+          f"{'<= ' + format(args.slo, 'g') + ' s':>8}")
+    for lane, values in samples.items():
+        if not values:
+            print(f"{lane:<9} {0:>7} {failures[lane]:>7}")
+            continue
+        within = sum(value <= args.slo for value in values) / len(values)
+        print(f"{lane:<9} {len(values):>7} {failures[lane]:>7} {statistics.median(values) * 1000:>9.0f} "
+              f"{percentile(values, 0.99) * 1000:>9.0f} {max(values) * 1000:>9.0f} {within:>8.1%}")
+    print("server alert latency (confirmation to sent, both lanes):")
+    for line in metrics_text.splitlines():
+        if line.startswith(("healora_alert_latency_seconds", "healora_alerts_total")):
+            print("  " + line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_history import append_turn, new_history
+from data_export import FORMATS, arrow_available, export_session, import_session
+from mood_analytics import MOODS, new_mood_journal
+from session_store import MemoryBackend, SessionStore, new_session_data
+
+# Export and import time and peak memory for multi-year synthetic journals.
+#
+# Each run builds a session with a journal of --per-day entries a day for the
+# given number of years (the raw entries are not capped at
+# MAX_JOURNAL_ENTRIES here, so the export has as many rows as the years
+# imply), a full conversation archive and some appointments, then exports and
+# re-imports it. Times are the best of three runs after a warm-up export.
+# Peak memory is measured in a separate run: Python allocations with
+# tracemalloc plus the Arrow memory pool's high-water mark, with every size in
+# its own process so the pool's peak is its own.
+# Usage: python benchmarks/bench_export.py [--years 1,2,4,8] [--per-day 20]
+
+def build_session(store, session_id, years, per_day, rng):
+    data = new_session_data()
+    journal = data["mood_journal"] = new_mood_journal()
+    start = 1_600_000_000 - years * 365 * 86400
+    for day in range(years * 365):
+        counts = [0] * len(MOODS)
+        for entry in range(per_day):
+            code = rng.randrange(len(MOODS))
+            journal["timestamps"].append(start + day * 86400 + entry * 600)
+            journal["codes"].append(code)
+            counts[code] += 1
+        journal["daily"][time.strftime("%Y-%m-%d", time.gmtime(start + day * 86400))] = counts
+    for conversation_id in range(100):
+        history = new_history()
+        for turn in range(20):
+            append_turn(history, f"message {turn} about sleep and exams", "sad", reply=f"reply {turn} with a coping idea")
+        store.backend.write_conversation(session_id, conversation_id, history)
+        data["conversation_archive"].append({"id": conversation_id, "timestamp": "2024-01-01 10:00:00"})
+    data["current_conversation_id"] = 100
+    data["appointments"] = [{"therapist": "Dr. Jane Smith", "time": "09:00", "date": f"2025-01-{day + 1:02d}",
+                             "user_email": "user@example.com", "appointment_note": "", "timestamp": "2024-12-01 10:00:00"}
+                            for day in range(20)]
+    return data
+
+def best_of(repeats, fn):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def arrow_peak():
+    if not arrow_available():
+        return 0
+    import pyarrow as pa
+    return pa.default_memory_pool().max_memory() or 0
+
+def child(years, per_day, fmt):
+    store = SessionStore(MemoryBackend())
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "export.zip")
+        # A running server pays for loading pyarrow once
+        export_session(store, "warm-up", build_session(store, "warm-up", 0, per_day, random.Random(0)), path, fmt)
+        data = build_session(store, "export", years, per_day, random.Random(years))
+        tracemalloc.start()
+        export_session(store, "export", data, path, fmt)
+        export_peak = tracemalloc.get_traced_memory()[1] + arrow_peak()
+        tracemalloc.stop()
+        export_seconds = best_of(3, lambda: export_session(store, "export", data, path, fmt))
+        import_seconds = best_of(3, lambda: import_session(store, "restored", new_session_data(), path))
+        print(json.dumps({"rows": len(data["mood_journal"]["codes"]), "export": export_seconds, "import": import_seconds,
+                          "peak_kib": export_peak / 1024, "size": os.path.getsize(path)}))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", default="1,2,4,8")
+    parser.add_argument("--per-day", type=int, default=20)
+    parser.add_argument("--child", nargs=2)
+    args = parser.parse_args()
+    if args.child:
+        child(int(args.child[0]), args.per_day, args.child[1])
+        return
+
+    formats = list(FORMATS) if arrow_available() else ["jsonl"]
+    print(f"{'format':<8} {'years':>5} {'rows':>8} {'export (ms)':>12} {'us/row':>7} {'import (ms)':>12} "
+          f"{'peak (MiB)':>11} {'size (KiB)':>11}")
+    for fmt in formats:
+        for years in map(int, args.years.split(",")):
+            output = subprocess.run([sys.executable, __file__, "--child", str(years), fmt, "--per-day", str(args.per_day)],
+                                    check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{fmt:<8} {years:>5} {result['rows']:>8} {result['export'] * 1000:>12.1f} "
+                  f"{result['export'] / result['rows'] * 1e6:>7.2f} {result['import'] * 1000:>12.1f} "
+                  f"{result['peak_kib'] / 1024:>11.1f} {result['size'] / 1024:>11.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tail latency of streamed chat turns with a slow primary model, with and
+# without hedging to a fallback model.
+#
+# The fake primary model starts --slow-rate of its replies only after
+# --slow-latency seconds; the rest, and every fallback reply, start after
+# --latency like every later chunk. "off" has no fallback model, "hedged"
+# sends the prompt to the fallback when the primary has not started replying
+# within --hedge-after seconds. Each mode runs in its own process, since the
+# models and timeouts are read at import. Reports time to the first reply
+# chunk and to the finished turn, the share of turns answered with the
+# fallback reply, and how often a hedge was sent and won.
+#
+# Usage: python benchmarks/bench_hedge.py [--sessions 50] [--turns 10] [--slow-rate 0.05]
+#        [--slow-latency 8] [--hedge-after 1] [--deadline 30]
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+async def run(args):
+    import app
+    from hedging import hedges
+    from language import load_detector
+    load_detector()
+
+    first_chunks, turns, fallbacks = [], [], 0
+
+    async def session(index):
+        nonlocal fallbacks
+        state = {"session_id": f"hedge-{index}"}
+        for turn in range(args.turns):
+            start = time.perf_counter()
+            first = None
+            async for _ in app.chatbot_function_stream(f"I couldn't sleep again last night ({turn})", "", "Calm",
+                                                       "Global", state):
+                if first is None:
+                    first = time.perf_counter() - start
+            turns.append(time.perf_counter() - start)
+            first_chunks.append(first)
+            fallbacks += app.get_session(state)["chat_history"]["bot"][-1].startswith(app.FALLBACK_RESPONSE)
+
+    await asyncio.gather(*(session(i) for i in range(args.sessions)))
+    return {"first_chunk": first_chunks, "turn": turns, "fallbacks": fallbacks,
+            "hedges": hedges.value("sent"), "won": hedges.value("won")}
+
+def child(args, mode):
+    os.environ.update({
+        "HEALORA_FAKE_MODEL": "1",
+        "HEALORA_FAKE_GMAIL": "1",
+        "HEALORA_SESSION_DB": ":memory:",
+        "HEALORA_OUTBOX_DB": ":memory:",
+        "HEALORA_SLOTS_DB": ":memory:",
+        "HEALORA_AGGREGATES_DB": ":memory:",
+        "HEALORA_MODEL_RPM": "0",
+        "HEALORA_MODEL_CONCURRENCY": str(args.sessions * 2),
+        "HEALORA_FAKE_LATENCY": str(args.latency),
+        "HEALORA_FAKE_FALLBACK_LATENCY": str(args.latency),
+        "HEALORA_FAKE_SLOW_RATE": str(args.slow_rate),
+        "HEALORA_FAKE_SLOW_LATENCY": str(args.slow_latency),
+        "HEALORA_FALLBACK_MODELS": "gemini-1.5-flash" if mode == "hedged" else "",
+        "HEALORA_HEDGE_AFTER": str(args.hedge_after),
+        "HEALORA_REPLY_DEADLINE": str(args.deadline)
+    })
+    print(json.dumps(asyncio.run(run(args))))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-latency", type=float, default=8.0)
+    parser.add_argument("--hedge-after", type=float, default=1.0)
+    parser.add_argument("--deadline", type=float, default=30.0)
+    parser.add_argument("--child")
+    args = parser.parse_args()
+    if args.child:
+        child(args, args.child)
+        return
+
+    print(f"{args.sessions} sessions x {args.turns} turns, {args.slow_rate:.0%} of primary replies start after "
+          f"{args.slow_latency:g}s, hedge after {args.hedge_after:g}s, deadline {args.deadline:g}s")
+    print(f"{'mode':<7} {'first p50':>10} {'first p99':>10} {'turn p50':>10} {'turn p99':>10} {'turn max':>10} "
+          f"{'fallback':>9} {'hedged':>7} {'won':>6}")
+    for mode in ("off", "hedged"):
+        output = subprocess.run([sys.executable, __file__, "--child", mode] + sys.argv[1:],
+                                check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        first, turn = result["first_chunk"], result["turn"]
+        count = len(turn)
+        won = f"{result['won'] / result['hedges']:.0%}" if result["hedges"] else "-"
+        print(f"{mode:<7} {percentile(first, 0.5) * 1000:>8.0f}ms {percentile(first, 0.99) * 1000:>8.0f}ms "
+              f"{percentile(turn, 0.5) * 1000:>8.0f}ms {percentile(turn, 0.99) * 1000:>8.0f}ms {max(turn) * 1000:>8.0f}ms "
+              f"{result['fallbacks'] / count:>9.1%} {result['hedges'] / count:>7.1%} {won:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+from functools import lru_cache
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("HEALORA_FAKE_MODEL", "1")
+os.environ.setdefault("HEALORA_FAKE_GMAIL", "1")
+os.environ.setdefault("HEALORA_SESSION_DB", ":memory:")
+os.environ.setdefault("HEALORA_OUTBOX_DB", ":memory:")
+os.environ.setdefault("HEALORA_SLOTS_DB", ":memory:")
+os.environ.setdefault("HEALORA_AGGREGATES_DB", ":memory:")
+
+# Memory, stored size, render and email formatting time of a 1,000-turn chat
+# history with a mood selected on every message: the previous list of
+# [user, bot] rows with an extra "I'm feeling ..." row per mood (kept here as
+# the baseline) against the columnar history with the mood as turn metadata.
+# Sessions are measured as loaded from the store, i.e. after json.loads.
+# Usage: python benchmarks/bench_history.py [turns]
+
+import app
+from chat_history import append_turn, new_history
+from chat_render import CHAT_HEADER, generate_chat_display, render_message
+
+MOODS = ["Happy", "Sad", "Anxious", "Stressed", "Other"]
+REPLY = ("I hear you, and I'm really glad you reached out. What you're feeling matters. "
+         "Let's take this one step at a time together.\n\n**Coping Strategy**: Take slow, deep breaths."
+         "\n\n**Recommended Resources**:\nBefrienders Worldwide: [Find a helpline](https://befrienders.org/)")
+
+def baseline_history(turns):
+    rows = []
+    for turn in range(turns):
+        rows.append([f"I'm feeling {MOODS[turn % len(MOODS)].lower()}.", None])
+        rows.append([f"Message {turn}: work has been a lot this week and I can't sleep", REPLY])
+    return rows
+
+def columnar_history(turns):
+    history = new_history()
+    for turn in range(turns):
+        append_turn(history, f"Message {turn}: work has been a lot this week and I can't sleep",
+                    MOODS[turn % len(MOODS)].lower(), reply=REPLY)
+    return history
+
+# The previous cached per-entry render, joined as the transcript cache did
+@lru_cache(maxsize=8192)
+def baseline_message(user_msg, bot_msg):
+    parts = []
+    if user_msg:
+        parts.append(f"<div class='message user-message'><strong>You</strong>: {user_msg}</div>")
+    if bot_msg:
+        parts.append(f"<div class='message bot-message'><strong>Healora</strong>: {bot_msg}</div>")
+    return "".join(parts)
+
+def baseline_render(payload):
+    baseline_message.cache_clear()
+    rows = json.loads(payload)
+    return CHAT_HEADER + "".join(baseline_message(*row) for row in rows)
+
+def baseline_email(rows):
+    chat_history_text = "Chat History:\n"
+    for user_msg, bot_msg in rows:
+        if user_msg:
+            chat_history_text += f"You: {user_msg}\n"
+        if bot_msg:
+            chat_history_text += f"Healora: {bot_msg}\n"
+    return chat_history_text
+
+# Fresh history and empty caches, as for a session just loaded from the store
+def cold_render(payload):
+    render_message.cache_clear()
+    return generate_chat_display(json.loads(payload))
+
+# Best of five runs of number calls, in ms per call
+def best_ms(fn, number=20):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1000
+
+def loaded_size(payload):
+    tracemalloc.start()
+    history = json.loads(payload)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del history
+    return size
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    before = json.dumps(baseline_history(turns))
+    after = json.dumps(columnar_history(turns))
+    before_rows, after_history = json.loads(before), json.loads(after)
+    rows = [
+        ("entries", len(before_rows), len(after_history["user"])),
+        ("memory (KiB)", loaded_size(before) / 1024, loaded_size(after) / 1024),
+        ("stored JSON (KiB)", len(before) / 1024, len(after) / 1024),
+        ("load (ms)", best_ms(lambda: json.loads(before)),
+         best_ms(lambda: json.loads(after))),
+        ("render, cold (ms)", best_ms(lambda: baseline_render(before)),
+         best_ms(lambda: cold_render(after))),
+        ("email text (ms)", best_ms(lambda: baseline_email(before_rows)),
+         best_ms(lambda: app.format_chat_history(after_history))),
+    ]
+    print(f"{turns} turns, mood selected on every message")
+    print(f"{'':<20} {'before':>10} {'after':>10}")
+    for name, old, new in rows:
+        print(f"{name:<20} {old:>10.1f} {new:>10.1f}" if isinstance(old, float) else f"{name:<20} {old:>10} {new:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langdetect import detect
+
+from language import detect_language, detect_text
+
+# Per-call language detection latency: raw langdetect.detect versus the cached layer.
+# Usage: python benchmarks/bench_language.py [turns]
+
+CONVERSATION = [
+    "hi",
+    "I've been feeling really anxious about my exams this week",
+    "ok",
+    "I can't sleep and my heart races when I think about it",
+    "thanks",
+    "Maybe I should talk to someone at the university counselling centre",
+    "Estoy muy cansada y no sé qué hacer con mi trabajo",
+    "sí",
+    "मुझे आज बहुत तनाव महसूस हो रहा है",
+]
+
+def measure(fn, turns):
+    timings = []
+    for turn in range(turns):
+        message = CONVERSATION[turn % len(CONVERSATION)]
+        start = time.perf_counter()
+        fn(message)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.99)], sum(timings) / len(timings)
+
+def run(turns):
+    detect_text("warm up the detector profiles once")
+
+    def raw(message):
+        try:
+            detect(message)
+        except Exception:
+            pass
+
+    session = {}
+    def cached(message):
+        detect_language(message, session)
+
+    def uncached(message):
+        detect_text.cache_clear()
+        detect_language(message, {})
+
+    print(f"{'variant':>22} {'p50 (us)':>10} {'p99 (us)':>10} {'mean (us)':>10}")
+    for name, fn in [("langdetect.detect", raw), ("layer, no memo", uncached), ("layer, session cache", cached)]:
+        p50, p99, mean = measure(fn, turns)
+        print(f"{name:>22} {p50 * 1e6:>10.1f} {p99 * 1e6:>10.1f} {mean * 1e6:>10.1f}")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 900)
@@ -0,0 +1,166 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Load test for the Gradio event handlers with a fake model and fake Gmail.
+#
+# "direct" mode calls the handlers in-process with one coroutine per simulated
+# session; "queue" mode launches the app and drives it through the Gradio queue
+# with one gradio_client Client (and so one Gradio session) per simulated user.
+# Reports p50/p95/p99 latency and throughput per handler, plus memory per session.
+#
+# Usage: python benchmarks/bench_load.py [--mode direct|queue|both] [--sessions 200]
+#        [--turns 5] [--latency 0.05]
+
+MESSAGES = [
+    "I've been feeling anxious about work lately",
+    "I can't sleep well and it's affecting everything",
+    "Talking to my friends helps a little",
+    "What can I do when my thoughts start racing?",
+    "Thank you, I'll try the breathing exercise",
+]
+
+def configure(args, tmp):
+    os.environ.setdefault("HEALORA_FAKE_MODEL", "1")
+    os.environ.setdefault("HEALORA_FAKE_GMAIL", "1")
+    os.environ["HEALORA_FAKE_LATENCY"] = str(args.latency)
+    os.environ.setdefault("HEALORA_SESSION_DB", ":memory:")
+    os.environ.setdefault("HEALORA_OUTBOX_DB", os.path.join(tmp, "outbox.db"))
+    os.environ.setdefault("HEALORA_SLOTS_DB", os.path.join(tmp, "slots.db"))
+    os.environ.setdefault("HEALORA_AGGREGATES_DB", os.path.join(tmp, "aggregates.db"))
+    os.environ.setdefault("HEALORA_CHAT_CONCURRENCY", str(args.sessions))
+    # The fake model has no quota, so admission control only limits concurrency
+    os.environ.setdefault("HEALORA_MODEL_RPM", "0")
+    os.environ.setdefault("HEALORA_MODEL_CONCURRENCY", str(args.sessions))
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def add(self, name, seconds):
+        with self.lock:
+            self.samples.setdefault(name, []).append(seconds)
+
+    def report(self, title, wall):
+        print(f"\n{title}")
+        print(f"{'handler':<28} {'calls':>7} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'calls/s':>10}")
+        for name, samples in self.samples.items():
+            samples = sorted(samples)
+            quantiles = statistics.quantiles(samples, n=100) if len(samples) > 1 else samples * 99
+            print(f"{name:<28} {len(samples):>7} {quantiles[49] * 1000:>10.1f} {quantiles[94] * 1000:>10.1f} "
+                  f"{quantiles[98] * 1000:>10.1f} {len(samples) / wall:>10.1f}")
+
+# One simulated user: chat turns, mood journal, conversation archive, booking
+async def direct_session(app, index, args, recorder):
+    state = {}
+    for turn in range(args.turns):
+        start = time.perf_counter()
+        first = None
+        async for _ in app.chatbot_function_stream(MESSAGES[turn % len(MESSAGES)], "Anxious", "Calm", "Global", state):
+            if first is None:
+                first = time.perf_counter() - start
+                recorder.add("chat first chunk", first)
+        recorder.add("chat turn", time.perf_counter() - start)
+    for name, fn, fn_args in [
+        ("log_mood", app.log_mood, ("Sad", "Global", state)),
+        ("show_mood_trends", app.show_mood_trends, (state,)),
+        ("new_conversation", app.new_conversation, (state,)),
+    ]:
+        start = time.perf_counter()
+        result = await asyncio.to_thread(fn, *fn_args)
+        recorder.add(name, time.perf_counter() - start)
+    dropdown = result[1]
+    start = time.perf_counter()
+    await asyncio.to_thread(app.load_conversation, dropdown["choices"][-1][1], state)
+    recorder.add("load_conversation", time.perf_counter() - start)
+    therapist = list(app.therapists)[index % len(app.therapists)]
+    time_slot = app.therapists[therapist]["times"][index % 4]
+    date = f"2030-{index // 28 % 12 + 1:02d}-{index % 28 + 1:02d}"
+    start = time.perf_counter()
+    await asyncio.to_thread(app.schedule_appointment, therapist, time_slot, date, "user@example.com", "", state)
+    recorder.add("schedule_appointment", time.perf_counter() - start)
+
+async def run_direct(app, args):
+    # One session first so lazy imports and caches are not counted as latency
+    await direct_session(app, args.sessions, args, Recorder())
+
+    recorder = Recorder()
+    start = time.perf_counter()
+    await asyncio.gather(*(direct_session(app, index, args, recorder) for index in range(args.sessions)))
+    wall = time.perf_counter() - start
+    recorder.report(f"direct: {args.sessions} sessions x {args.turns} turns, model latency {args.latency}s/chunk", wall)
+
+    # Memory is measured in a separate pass because tracemalloc distorts latency
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    offset = args.sessions + 1
+    await asyncio.gather(*(direct_session(app, offset + index, args, Recorder()) for index in range(args.sessions)))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    grown = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    print(f"memory retained: {grown / 1024:.0f} KiB total, {grown / args.sessions / 1024:.1f} KiB per session")
+
+def queue_session(client, index, args, recorder):
+    for turn in range(args.turns):
+        start = time.perf_counter()
+        client.predict(MESSAGES[turn % len(MESSAGES)], "Anxious", "Calm", "Global", api_name="/chatbot_function_stream")
+        recorder.add("chat turn (queue)", time.perf_counter() - start)
+    start = time.perf_counter()
+    client.predict("Sad", "Global", api_name="/log_mood")
+    recorder.add("log_mood (queue)", time.perf_counter() - start)
+    start = time.perf_counter()
+    client.predict(api_name="/show_mood_trends")
+    recorder.add("show_mood_trends (queue)", time.perf_counter() - start)
+    therapist = list(args.therapists)[index % len(args.therapists)]
+    start = time.perf_counter()
+    client.predict(therapist, "09:00", f"2031-{index // 28 % 12 + 1:02d}-{index % 28 + 1:02d}",
+                   "user@example.com", "", api_name="/schedule_appointment")
+    recorder.add("schedule_appointment (queue)", time.perf_counter() - start)
+
+def run_queue(app, args):
+    recorder = Recorder()
+    args.therapists = app.therapists
+    app.demo.queue(default_concurrency_limit=args.sessions)
+    _, url, _ = app.demo.launch(prevent_thread_lock=True, quiet=True)
+    try:
+        from gradio_client import Client
+        # Clients (one Gradio session each) are connected before timing starts
+        clients = [Client(url, verbose=False) for _ in range(args.sessions)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.sessions) as executor:
+            list(executor.map(lambda index: queue_session(clients[index], index, args, recorder), range(args.sessions)))
+        wall = time.perf_counter() - start
+    finally:
+        app.demo.close()
+    recorder.report(f"queue: {args.sessions} sessions x {args.turns} turns through {url}", wall)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["direct", "queue", "both"], default="direct")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        configure(args, tmp)
+        import app
+        # The queue runs first: the Gradio server must start before any other event loop has run
+        if args.mode in ("queue", "both"):
+            run_queue(app, args)
+        if args.mode in ("direct", "both"):
+            asyncio.run(run_direct(app, args))
+        app.outbox.stop()
+
+if __name__ == "__main__":
+    main()
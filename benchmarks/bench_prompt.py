@@ -0,0 +1,69 @@
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("HEALORA_FAKE_MODEL", "1")
+os.environ.setdefault("HEALORA_FAKE_GMAIL", "1")
+os.environ.setdefault("HEALORA_SESSION_DB", ":memory:")
+os.environ.setdefault("HEALORA_OUTBOX_DB", ":memory:")
+os.environ.setdefault("HEALORA_SLOTS_DB", ":memory:")
+os.environ.setdefault("HEALORA_AGGREGATES_DB", ":memory:")
+
+# Prompt building cost and prompt size per turn: the previous per-turn
+# f-string (kept here as the baseline) against the precomputed templates,
+# where the tone and region instructions travel as the system instruction.
+# Usage: python benchmarks/bench_prompt.py
+
+import app
+from context_window import estimate_tokens
+
+MESSAGE = "I've been feeling anxious about work lately and I can't sleep"
+CONTEXT = "Recent conversation:\nUser: hi\nHealora: Hello! How are you feeling today?"
+
+def baseline_prompt(message, lang, conversation_mode, region, context=""):
+    tone_instruction = {
+        "Calm": "Respond in a soothing, gentle tone to promote relaxation.",
+        "Motivational": "Use an uplifting, encouraging tone to inspire confidence.",
+        "Neutral": "Maintain a balanced, empathetic tone."
+    }.get(conversation_mode, "Maintain a balanced, empathetic tone.")
+
+    context_block = f"{context}\n    " if context else ""
+    return f"""
+    You are Healora, a compassionate mental health support chatbot. Engage in a supportive conversation with the user based on their input: {message}.
+    {context_block}- Provide empathetic, sensitive responses in the user's language (detected as {lang}).
+    - {tone_instruction}
+    - If signs of distress are detected, suggest coping strategies relevant to their mood or input.
+    - Recommend professional resources tailored to the user's region ({region}).
+    - Keep responses concise, warm, and encouraging.
+    """
+
+def baseline_resources(region):
+    region_key = region if region in app.regional_resources else "Global"
+    return "\n\n**Recommended Resources**:\n" + "\n".join(app.regional_resources[region_key])
+
+def main():
+    number = 100000
+    templates = app.templates
+    rows = [
+        ("prompt (baseline)", lambda: baseline_prompt(MESSAGE, "en", "Calm", "USA", CONTEXT)),
+        ("prompt (templates)", lambda: templates.user_prompt(MESSAGE, "en", CONTEXT)),
+        ("resources (baseline)", lambda: baseline_resources("USA")),
+        ("resources (templates)", lambda: templates.resources_markdown("USA")),
+    ]
+    print(f"{'build':<24} {'us/turn':>8}")
+    for name, fn in rows:
+        print(f"{name:<24} {timeit.timeit(fn, number=number) / number * 1e6:>8.2f}")
+
+    before = estimate_tokens(baseline_prompt(MESSAGE, "en", "Calm", "USA", CONTEXT))
+    prompt = estimate_tokens(templates.user_prompt(MESSAGE, "en", CONTEXT))
+    system = templates.system_tokens[templates.key("Calm", "USA")]
+    print(f"\nestimated tokens per turn (with {estimate_tokens(CONTEXT)} tokens of context)")
+    print(f"{'baseline prompt':<32} {before:>6}")
+    print(f"{'per-turn prompt':<32} {prompt:>6}")
+    print(f"{'system instruction':<32} {system:>6}")
+    print(f"{'total input':<32} {prompt + system:>6}  ({before - prompt - system} fewer than the baseline)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_history import append_turn, new_history, set_reply
+from chat_render import CHAT_HEADER, generate_chat_display
+
+# Per-turn chat render cost as history grows.
+# "cached" only renders the new turn; what is left is copying the transcript
+# into the output string. "delta" is the appended HTML Gradio streams as a diff.
+# Usage: python benchmarks/bench_render.py [max_messages]
+
+BOT_REPLY = ("I hear you, and I'm really glad you reached out. " * 4 +
+             "\n\n**Recommended Resources**:\nBefrienders Worldwide: [Find a helpline](https://befrienders.org/)")
+
+# Original implementation: rebuild the whole transcript with string +=
+def rebuild_chat_display(history):
+    chat_display = CHAT_HEADER
+    for user_msg, bot_msg in zip(history["user"], history["bot"]):
+        if user_msg:
+            chat_display += f"<div class='message user-message'><strong>You</strong>: {user_msg}</div>"
+        if bot_msg:
+            chat_display += f"<div class='message bot-message'><strong>Healora</strong>: {bot_msg}</div>"
+    chat_display += "</div>"
+    return chat_display
+
+def run(max_messages):
+    checkpoints = [10, 100, 1000, max_messages]
+    history = new_history()
+    results = []
+    previous = ""
+    for turn in range(max_messages):
+        append_turn(history, f"Message {turn}: I'm feeling a little overwhelmed today.")
+        set_reply(history, BOT_REPLY)
+        if turn + 1 in checkpoints:
+            start = time.perf_counter()
+            rebuild_chat_display(history)
+            rebuild = time.perf_counter() - start
+            start = time.perf_counter()
+            html = generate_chat_display(history)
+            cached = time.perf_counter() - start
+            delta = len(html) - len(previous) if html.startswith(previous) else len(html)
+            results.append((turn + 1, rebuild, cached, len(html), delta))
+        else:
+            html = generate_chat_display(history)
+        previous = html
+    print(f"{'messages':>10} {'rebuild (ms)':>14} {'cached (ms)':>12} {'html (KB)':>10} {'delta (B)':>10}")
+    for count, rebuild, cached, size, delta in results:
+        print(f"{count:>10} {rebuild * 1000:>14.3f} {cached * 1000:>12.3f} {size / 1024:>10.1f} {delta:>10}")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
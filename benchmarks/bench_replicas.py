@@ -0,0 +1,137 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Several app replicas sharing one network store (store_server.py stand-in).
+#
+# Each replica is a separate process with its own session cache, outbox worker
+# and fake Gmail client. The harness checks that a session started on one
+# replica continues on another, that a booking race between replicas books
+# every slot exactly once, and that every queued email is sent exactly once,
+# and reports chat throughput for each replica count.
+#
+# Usage: python benchmarks/bench_replicas.py [--replicas 1,2,4] [--sessions 200] [--latency 0.01]
+
+def replica(url, latency, commands, results):
+    os.environ.update({
+        "HEALORA_STORE_URL": url,
+        "HEALORA_FAKE_MODEL": "1",
+        "HEALORA_FAKE_GMAIL": "1",
+        "HEALORA_FAKE_LATENCY": str(latency),
+        "HEALORA_MODEL_RPM": "0"
+    })
+    sys.path.insert(0, ROOT)
+    import app
+    # Each replica runs its outbox worker as a server would
+    app.warm_up()
+    results.put(os.getpid())
+    while True:
+        command, items = commands.get()
+        if command == "stop":
+            app.outbox.stop()
+            return
+        start = time.perf_counter()
+        if command == "chat":
+            async def chat():
+                async def turn(session_id):
+                    async for _ in app.chatbot_function_stream("I feel a bit better today", "", "Neutral", "Global",
+                                                               {"session_id": session_id}):
+                        pass
+                await asyncio.gather(*(turn(session_id) for session_id in items))
+            asyncio.run(chat())
+            value = len(items)
+        elif command == "history":
+            value = [app.history_length(app.get_session({"session_id": session_id})["chat_history"]) for session_id in items]
+        elif command == "book":
+            # Every replica tries every slot on the given days; returns (booked, tried)
+            session_id, days = items
+            slots = [(therapist, time_slot, f"2031-01-{day:02d}")
+                     for therapist in app.therapists for time_slot in app.therapists[therapist]["times"] for day in days]
+            booked = sum(
+                app.schedule_appointment(therapist, time_slot, date, "user@example.com", "",
+                                         {"session_id": session_id})[0].startswith("Appointment booked")
+                for therapist, time_slot, date in slots
+            )
+            value = (booked, len(slots))
+        elif command == "sent":
+            value = len(app.gmail_client.sent)
+        results.put((value, time.perf_counter() - start))
+
+class Replicas:
+    def __init__(self, count, url, latency):
+        context = multiprocessing.get_context("spawn")
+        self.results = context.Queue()
+        self.commands = [context.Queue() for _ in range(count)]
+        self.processes = [
+            context.Process(target=replica, args=(url, latency, commands, self.results), daemon=True)
+            for commands in self.commands
+        ]
+        for process in self.processes:
+            process.start()
+        self.pids = [self.results.get() for _ in self.processes]
+
+    # Sends each replica its share of the work at once; returns ([values], wall seconds)
+    def run(self, command, shares):
+        start = time.perf_counter()
+        for commands, items in zip(self.commands, shares):
+            commands.put((command, items))
+        values = [self.results.get()[0] for _ in shares]
+        return values, time.perf_counter() - start
+
+    def stop(self):
+        for commands in self.commands:
+            commands.put(("stop", None))
+        for process in self.processes:
+            process.join()
+
+def run(count, args):
+    from remote_store import RemoteOutboxStore
+    from store_server import start_store_server
+    with tempfile.TemporaryDirectory() as tmp:
+        server = start_store_server(tmp)
+        replicas = Replicas(count, server.url, args.latency)
+        try:
+            sessions = [f"bench-{index}" for index in range(args.sessions)]
+            shares = [sessions[index::count] for index in range(count)]
+            _, wall = replicas.run("chat", shares)
+            # Second turn of every session on the next replica over
+            replicas.run("chat", shares[1:] + shares[:1])
+            lengths, _ = replicas.run("history", [sessions] * count)
+            continued = all(length == [2] * len(sessions) for length in lengths)
+
+            results, _ = replicas.run("book", [(sessions[index], range(1, 6)) for index in range(count)])
+            booked = sum(booked for booked, _ in results)
+            slots = results[0][1]
+            store = RemoteOutboxStore(server.url)
+            deadline = time.monotonic() + 60
+            while store.stats().get("sent", 0) < 2 * booked and time.monotonic() < deadline:
+                time.sleep(0.2)
+            sent, _ = replicas.run("sent", [None] * count)
+        finally:
+            replicas.stop()
+            server.shutdown()
+    print(f"{count:>8} {len(sessions) / wall:>12.1f} {'yes' if continued else 'NO':>10} "
+          f"{booked:>4}/{slots:<4} {sum(sent):>5}/{2 * booked:<5}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--replicas", default="1,2,4")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.01)
+    args = parser.parse_args()
+    os.environ["HEALORA_FAKE_MODEL"] = "1"
+    os.environ["HEALORA_FAKE_GMAIL"] = "1"
+    print(f"{args.sessions} sessions, 2 turns each on different replicas, fake model latency {args.latency}s/chunk")
+    print(f"{'replicas':>8} {'turns/s':>12} {'continued':>10} {'booked':>9} {'emails':>11}")
+    for count in [int(count) for count in args.replicas.split(",")]:
+        run(count, args)
+
+if __name__ == "__main__":
+    main()
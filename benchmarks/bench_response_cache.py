@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Response cache hit rate, turn latency and model requests on repeated openers.
+#
+# Each simulated user opens a new session with one of a few common first
+# messages (so the turn has no context and may come from the cache), picked
+# with a skew towards the most common ones. The run is repeated with the cache
+# off and on, each in its own process since the cache is configured at import.
+#
+# Usage: python benchmarks/bench_response_cache.py [--sessions 500] [--latency 0.05]
+
+OPENERS = [
+    "hi",
+    "Hello",
+    "I'm stressed",
+    "I feel anxious",
+    "I can't sleep",
+    "I feel sad today",
+    "I'm so tired of everything",
+    "Can you help me?",
+]
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+async def run(args):
+    import app
+    from language import load_detector
+    load_detector()
+
+    rng = random.Random(0)
+    weights = [1 / (rank + 1) for rank in range(len(OPENERS))]
+    messages = rng.choices(OPENERS, weights, k=args.sessions)
+    turns = []
+    for index, message in enumerate(messages):
+        state = {"session_id": f"cache-{index}"}
+        start = time.perf_counter()
+        async for _ in app.chatbot_function_stream(message, "", "Calm", "Global", state):
+            pass
+        turns.append(time.perf_counter() - start)
+    stats = app.response_cache.stats() if app.response_cache is not None else {"hit_rate": 0.0}
+    requests = sum(model.calls for model in app._reply_models.values())
+    return {"turn": turns, "hit_rate": stats["hit_rate"], "requests": requests}
+
+def child(args, mode):
+    os.environ.update({
+        "HEALORA_FAKE_MODEL": "1",
+        "HEALORA_FAKE_GMAIL": "1",
+        "HEALORA_SESSION_DB": ":memory:",
+        "HEALORA_OUTBOX_DB": ":memory:",
+        "HEALORA_SLOTS_DB": ":memory:",
+        "HEALORA_AGGREGATES_DB": ":memory:",
+        "HEALORA_MODEL_RPM": "0",
+        "HEALORA_FAKE_LATENCY": str(args.latency),
+        "HEALORA_FALLBACK_MODELS": "",
+        "HEALORA_RESPONSE_CACHE": "1" if mode == "on" else "0"
+    })
+    print(json.dumps(asyncio.run(run(args))))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--child")
+    args = parser.parse_args()
+    if args.child:
+        child(args, args.child)
+        return
+
+    print(f"{args.sessions} new sessions opening with one of {len(OPENERS)} common messages, "
+          f"model latency {args.latency * 1000:.0f} ms per chunk")
+    print(f"{'cache':<6} {'hit rate':>9} {'model requests':>15} {'turn p50':>10} {'turn p95':>10}")
+    for mode in ("off", "on"):
+        output = subprocess.run([sys.executable, __file__, "--child", mode] + sys.argv[1:],
+                                check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        turn = result["turn"]
+        print(f"{mode:<6} {result['hit_rate']:>9.1%} {result['requests']:>15} "
+              f"{percentile(turn, 0.5) * 1000:>8.1f}ms {percentile(turn, 0.95) * 1000:>8.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold-start import time of app.py, checked against a budget.
+# Runs `python -X importtime -c "import app"` in a fresh interpreter, reports
+# the import time of the heavy dependencies and of the app's own modules, and
+# fails if importing app takes longer than the budget or a module in
+# LAZY_MODULES was imported at startup.
+# Usage: python benchmarks/bench_startup.py [budget_seconds]
+
+DEFAULT_BUDGET = float(os.getenv("HEALORA_STARTUP_BUDGET", "6.0"))
+
+# Modules that must not be imported until first use
+LAZY_MODULES = ["google.generativeai", "googleapiclient.discovery", "plotly.express", "langdetect", "pyarrow"]
+HEAVY_MODULES = ["gradio", "pandas", "numpy", "matplotlib"] + LAZY_MODULES
+
+def parse_importtime(stderr):
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        modules[name.strip()] = int(cumulative_us)
+    return modules
+
+def timed_run(args, env):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable] + args, cwd=ROOT, env=env, capture_output=True, text=True)
+    return result, time.perf_counter() - start
+
+def run(budget):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, HEALORA_SESSION_DB=":memory:", HEALORA_OUTBOX_DB=os.path.join(tmp, "outbox.db"),
+                   HEALORA_SLOTS_DB=os.path.join(tmp, "slots.db"),
+                   HEALORA_AGGREGATES_DB=os.path.join(tmp, "aggregates.db"))
+        _, baseline = timed_run(["-c", "pass"], env)
+        result, wall = timed_run(["-X", "importtime", "-c", "import app"], env)
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        return 2
+    modules = parse_importtime(result.stderr)
+    local_modules = sorted(name[:-3] for name in os.listdir(ROOT) if name.endswith(".py"))
+
+    print(f"{'module':<30} {'cumulative (ms)':>16}")
+    for name in HEAVY_MODULES + local_modules:
+        if name in modules:
+            print(f"{name:<30} {modules[name] / 1000:>16.1f}")
+    startup = wall - baseline
+    eager = [name for name in LAZY_MODULES if name in modules]
+    print(f"\nimport app: {startup:.2f} s (interpreter start excluded), budget: {budget:.2f} s")
+    if eager:
+        print("imported eagerly: " + ", ".join(eager))
+    if startup > budget or eager:
+        print("FAIL")
+        return 1
+    print("OK")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(run(float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET))
@@ -0,0 +1,79 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Wall time of one chat turn, from the message to the final display, with a
+# fake model. The context budget is kept small so the rolling summary is
+# updated every few turns; turns that fold older turns into the summary are
+# reported separately from the rest.
+# Usage: python benchmarks/bench_turn.py [--sessions 20] [--turns 12] [--latency 0.05]
+
+MESSAGES = [
+    "I've been feeling anxious about work lately and I can't switch off in the evenings",
+    "Me siento muy cansada y no sé cómo hablar con mi familia de esto",
+    "I can't sleep well and it's affecting everything, even my friendships",
+    "Je me sens seul depuis que j'ai déménagé dans cette nouvelle ville",
+    "What can I do when my thoughts start racing before an exam?",
+    "Thank you, I'll try the breathing exercise tonight and tell you how it went",
+]
+
+def configure(args):
+    os.environ.setdefault("HEALORA_FAKE_MODEL", "1")
+    os.environ.setdefault("HEALORA_FAKE_GMAIL", "1")
+    os.environ["HEALORA_FAKE_LATENCY"] = str(args.latency)
+    os.environ.setdefault("HEALORA_SESSION_DB", ":memory:")
+    os.environ.setdefault("HEALORA_OUTBOX_DB", ":memory:")
+    os.environ.setdefault("HEALORA_SLOTS_DB", ":memory:")
+    os.environ.setdefault("HEALORA_AGGREGATES_DB", ":memory:")
+    os.environ.setdefault("HEALORA_CONTEXT_TOKENS", str(args.context_tokens))
+    os.environ.setdefault("HEALORA_MODEL_RPM", "0")
+    os.environ.setdefault("HEALORA_MODEL_CONCURRENCY", str(args.sessions * 2))
+
+async def run_session(app, index, turns, samples):
+    state = {"session_id": f"turn-{index}"}
+    for turn in range(turns):
+        session = app.get_session(state)
+        folded = session.get("context_summary", {}).get("turns", 0)
+        start = time.perf_counter()
+        async for _ in app.chatbot_function_stream(MESSAGES[(index + turn) % len(MESSAGES)], "Anxious", "Calm", "USA", state):
+            pass
+        elapsed = time.perf_counter() - start
+        folds = app.get_session(state)["context_summary"]["turns"] > folded
+        samples["summary turns" if folds else "other turns"].append(elapsed)
+        samples["all turns"].append(elapsed)
+
+def report(samples):
+    print(f"{'turns':<16} {'count':>6} {'mean (ms)':>10} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    for name, values in samples.items():
+        if not values:
+            continue
+        values = sorted(values)
+        p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+        print(f"{name:<16} {len(values):>6} {statistics.mean(values) * 1000:>10.1f} "
+              f"{statistics.median(values) * 1000:>10.1f} {p95 * 1000:>10.1f}")
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--context-tokens", type=int, default=200)
+    args = parser.parse_args()
+    configure(args)
+    import app
+    from language import load_detector
+    # A running server has loaded the language profiles before the first turn
+    load_detector()
+
+    samples = {"all turns": [], "summary turns": [], "other turns": []}
+    await asyncio.gather(*(run_session(app, i, args.turns, samples) for i in range(args.sessions)))
+    print(f"{args.sessions} sessions x {args.turns} turns, model latency {args.latency * 1000:.0f} ms per chunk")
+    report(samples)
+
+if __name__ == "__main__":
+    asyncio.run(main())
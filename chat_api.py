@@ -0,0 +1,107 @@
+import asyncio
+import hmac
+import json
+import logging
+import os
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+import metrics
+
+# JSON API for partner apps, mounted at /v1 next to the interface.
+#
+# POST /v1/chat answers one message. POST /v1/chat/batch takes many and
+# streams one NDJSON line per item as soon as it is answered, in completion
+# order and tagged with the item's index. Turns go through the same handler
+# as the chat box (screening, context, hedged model requests, saving) without
+# rendering the chat display. Every API turn, single or batched, takes a slot
+# of one shared limit of API_CONCURRENCY turns; the items of one session in a
+# batch run one after another, in order. A turn that has started is finished
+# and saved even if the client goes away. Callers choose their session IDs, so
+# the API requires "Authorization: Bearer <HEALORA_API_KEY>" and app.py only
+# serves it when HEALORA_API_KEY is set.
+
+API_CONCURRENCY = int(os.getenv("HEALORA_API_CONCURRENCY", "16"))
+API_BATCH_MAX = int(os.getenv("HEALORA_API_BATCH_MAX", "500"))
+API_KEY = os.getenv("HEALORA_API_KEY")
+MAX_MESSAGE_LENGTH = 4000
+
+logger = logging.getLogger("healora")
+
+api_turns = metrics.Counter("healora_api_turns_total", "Chat turns answered through the JSON API.", label="status")
+
+class ChatItem(BaseModel):
+    # Omit to start a new session; the reply carries its ID
+    session_id: Optional[str] = Field(None, max_length=128)
+    message: str = Field(min_length=1, max_length=MAX_MESSAGE_LENGTH)
+    mood: Optional[str] = None
+    tone: str = "Neutral"
+    region: str = "Global"
+
+class ChatBatch(BaseModel):
+    items: List[ChatItem] = Field(min_length=1, max_length=API_BATCH_MAX)
+
+def check_api_key(authorization: Optional[str] = Header(None)):
+    if not API_KEY or not hmac.compare_digest(authorization or "", f"Bearer {API_KEY}"):
+        raise HTTPException(status_code=401, detail="invalid API key")
+
+# chat_turn(session_id, message, mood, tone, region) is a coroutine returning
+# {"session_id": ..., "reply": ..., "status": ...}
+def create_chat_router(chat_turn, concurrency=API_CONCURRENCY):
+    router = APIRouter(dependencies=[Depends(check_api_key)])
+    limit = asyncio.Semaphore(concurrency)
+
+    async def turn(item):
+        try:
+            result = await chat_turn(item.session_id, item.message, item.mood, item.tone, item.region)
+        finally:
+            limit.release()
+        api_turns.inc(result["status"])
+        return result
+
+    # The turn runs shielded, so cancelling its caller never leaves a message
+    # without its reply in the session; it keeps its slot of the limit until done
+    async def run(item):
+        await limit.acquire()
+        return await asyncio.shield(turn(item))
+
+    @router.post("/chat")
+    async def chat(item: ChatItem):
+        return await run(item)
+
+    @router.post("/chat/batch")
+    async def chat_batch(batch: ChatBatch):
+        results = asyncio.Queue()
+        sessions = {}
+        for index, item in enumerate(batch.items):
+            sessions.setdefault(item.session_id or index, []).append((index, item))
+
+        async def run_session(items):
+            for index, item in items:
+                try:
+                    result = await run(item)
+                except Exception:
+                    logger.exception("API chat turn failed")
+                    metrics.errors.inc("api")
+                    api_turns.inc("error")
+                    result = {"session_id": item.session_id, "status": "error"}
+                await results.put({"index": index, **result})
+
+        tasks = [asyncio.create_task(run_session(items)) for items in sessions.values()]
+
+        async def lines():
+            try:
+                for _ in batch.items:
+                    yield json.dumps(await results.get(), ensure_ascii=False) + "\n"
+            finally:
+                # The client went away: turns not yet started are dropped,
+                # started ones finish in the background
+                for task in tasks:
+                    task.cancel()
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return router
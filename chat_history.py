@@ -0,0 +1,87 @@
+import re
+from datetime import datetime
+
+from mood_analytics import MOOD_CODES, MOODS
+
+# Chat history of a conversation, stored column-wise in the session.
+#
+# One entry per turn in parallel lists: the user's message, Healora's reply
+# (None until it arrives), the mood selected with the message as a
+# mood_analytics code (None if no mood was selected) and when the message was
+# sent, in seconds since 1970-01-01 local time like the mood journal. The mood
+# used to be stored as an extra "I'm feeling ..." row before the message; it
+# is now metadata of the turn, and old histories are converted when loaded.
+
+COLUMNS = ("user", "bot", "mood", "time")
+
+_EPOCH = datetime(1970, 1, 1)
+_MOOD_ROW = re.compile(r"I'm feeling (\w+)\.")
+
+def new_history():
+    return {column: [] for column in COLUMNS}
+
+def history_length(history):
+    return len(history["user"])
+
+# mood is a mood name ("sad") or None; the time is left empty if when is None
+def append_turn(history, message, mood=None, when=None, reply=None):
+    history["user"].append(message)
+    history["bot"].append(reply)
+    history["mood"].append(MOOD_CODES.get(mood, MOOD_CODES["other"]) if mood else None)
+    history["time"].append(int((when - _EPOCH).total_seconds()) if when else None)
+
+def set_reply(history, text):
+    history["bot"][-1] = text
+
+# (user message, reply, mood code) per turn, for turns start to stop
+def turns(history, start=0, stop=None):
+    return list(zip(history["user"][start:stop], history["bot"][start:stop], history["mood"][start:stop]))
+
+def last_turn(history):
+    return history["user"][-1], history["bot"][-1], history["mood"][-1]
+
+# Drop the oldest turns beyond limit
+def trim_history(history, limit):
+    for column in COLUMNS:
+        del history[column][:-limit]
+
+# "feeling sad" per mood code
+MOOD_LABELS = tuple(f"feeling {mood}" for mood in MOODS)
+
+# "feeling sad" for a mood code, "" for none
+def mood_label(code):
+    return MOOD_LABELS[code] if code is not None else ""
+
+# Columnar history from the old list of [user, bot] rows, folding each mood
+# row into the message after it. Also returns how many turns the first
+# `summarized` rows make up, to keep a context summary's turn count aligned.
+def history_from_rows(rows, summarized=0):
+    history = new_history()
+    mood = None
+    turns_summarized = 0
+    for index, (user_msg, bot_msg) in enumerate(rows or []):
+        match = _MOOD_ROW.fullmatch(user_msg or "") if bot_msg is None and index + 1 < len(rows) else None
+        if match and match.group(1) in MOOD_CODES:
+            mood = match.group(1)
+            continue
+        append_turn(history, user_msg, mood, reply=bot_msg)
+        mood = None
+        if index < summarized:
+            turns_summarized += 1
+    return history, turns_summarized
+
+# Columnar history for an archived conversation, converting old rows
+def ensure_history(history):
+    return history if isinstance(history, dict) else history_from_rows(history)[0]
+
+# Columnar chat history for a session, converting the old rows and the
+# context summary's count of summarized turns
+def ensure_chat_history(session):
+    history = session.get("chat_history")
+    if isinstance(history, dict):
+        return history
+    summary = session.get("context_summary")
+    session["chat_history"], summarized = history_from_rows(history, summary["turns"] if summary else 0)
+    if summary:
+        summary["turns"] = summarized
+    return session["chat_history"]
@@ -0,0 +1,95 @@
+from collections import OrderedDict
+from functools import lru_cache
+
+from chat_history import MOOD_LABELS, history_length, last_turn
+
+# Chat transcript rendering with per-message and per-transcript caches.
+#
+# The transcript HTML is prefix-stable: finished messages are never re-rendered,
+# the container is left open and a message that is still streaming is left
+# unclosed, so each update only appends to the previous one. Gradio sends
+# streamed outputs as diffs, so appended turns go over the websocket as deltas.
+
+CHAT_HEADER = """
+    <style>
+        .chat-container { max-width: 600px; margin: auto; }
+        .message { margin: 10px 0; padding: 10px; border-radius: 10px; width: 80%; color: #000000; }
+        .bot-message { background-color: #3A3B3C; float: left; clear: both; }
+        .user-message { background-color: #192734; float: right; clear: both; }
+    </style>
+    <div class='chat-container'>
+    """
+
+# Number of transcripts whose rendered prefix is kept in memory
+TRANSCRIPT_CACHE_SIZE = 1024
+
+# Opening of a user message per mood code, with the mood next to "You";
+# the last one is for messages sent without a mood
+_USER_OPENINGS = tuple(f"<div class='message user-message'><strong>You</strong> <em>({label})</em>: "
+                       for label in MOOD_LABELS) + ("<div class='message user-message'><strong>You</strong>: ",)
+
+def render_user_message(user_msg, mood):
+    return f"{_USER_OPENINGS[mood if mood is not None else -1]}{user_msg}</div>"
+
+# Render one turn, with the selected mood next to the user's message
+@lru_cache(maxsize=8192)
+def render_message(user_msg, bot_msg, mood=None):
+    user_html = f"{_USER_OPENINGS[mood if mood is not None else -1]}{user_msg}</div>" if user_msg else ""
+    if bot_msg:
+        return f"{user_html}<div class='message bot-message'><strong>Healora</strong>: {bot_msg}</div>"
+    return user_html
+
+# Render a turn whose bot reply is still streaming, leaving the reply open
+def render_partial_message(user_msg, bot_msg, mood=None):
+    html = render_user_message(user_msg, mood) if user_msg else ""
+    return html + f"<div class='message bot-message'><strong>Healora</strong>: {bot_msg or ''}"
+
+# Rendered prefix of a transcript: every turn except the last one.
+# A finished turn's reply is a string object of its own, so the cache is
+# known to still match the history while the reply it ended on is in place.
+class TranscriptCache:
+    def __init__(self, history):
+        self.history = history
+        self.count = 0
+        self.last_reply = None
+        self.html = CHAT_HEADER
+
+    def is_valid(self, history):
+        if history is not self.history or history_length(history) < self.count + 1:
+            return False
+        return self.count == 0 or history["bot"][self.count - 1] is self.last_reply
+
+    def extend(self, history):
+        # Turns before the last one no longer change, so render them once
+        done = history_length(history) - 1
+        if done <= self.count:
+            return
+        start = self.count
+        self.html += "".join(map(render_message, history["user"][start:done], history["bot"][start:done],
+                                 history["mood"][start:done]))
+        self.count = done
+        self.last_reply = history["bot"][done - 1]
+
+_transcripts = OrderedDict()
+
+def _transcript_cache(history):
+    key = id(history)
+    cache = _transcripts.get(key)
+    if cache is None or not cache.is_valid(history):
+        cache = TranscriptCache(history)
+        _transcripts[key] = cache
+        if len(_transcripts) > TRANSCRIPT_CACHE_SIZE:
+            _transcripts.popitem(last=False)
+    else:
+        _transcripts.move_to_end(key)
+    return cache
+
+# Generate chat display with left/right alignment and black text
+def generate_chat_display(history, streaming=False):
+    if not history_length(history):
+        return CHAT_HEADER
+    cache = _transcript_cache(history)
+    cache.extend(history)
+    if streaming:
+        return cache.html + render_partial_message(*last_turn(history))
+    return cache.html + render_message(*last_turn(history))
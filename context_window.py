@@ -0,0 +1,135 @@
+import logging
+import os
+import threading
+
+from chat_history import mood_label
+
+# Conversation context for the prompt: the most recent turns up to a token
+# budget, plus a rolling summary of everything older. Turns that fall out of
+# the window are folded into the summary once, so each update only covers the
+# newly evicted turns instead of the whole conversation.
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("HEALORA_CONTEXT_TOKENS", "1000"))
+SUMMARY_WORD_LIMIT = 120
+
+# Bot replies may start with crisis resources and end with the coping strategy
+# and resources; neither is sent back to the model
+CRISIS_BANNER_PREFIX = "**Crisis Support"
+FOOTER_MARKERS = ("\n\n**Coping Strategy**", "\n\n**Recommended Resources**")
+
+logger = logging.getLogger("healora")
+
+# Rough token count (about four characters per token for English text)
+def estimate_tokens(text):
+    return (len(text) + 3) // 4 if text else 0
+
+# Summary state stored in the session
+def new_context_summary():
+    return {"text": "", "turns": 0}
+
+def strip_footer(bot_msg):
+    if bot_msg.startswith(CRISIS_BANNER_PREFIX):
+        bot_msg = bot_msg.partition("\n\n")[2]
+    for marker in FOOTER_MARKERS:
+        index = bot_msg.find(marker)
+        if index != -1:
+            bot_msg = bot_msg[:index]
+    return bot_msg
+
+# Turns as (user message, reply, mood code) entries (see chat_history.turns)
+def format_turns(entries):
+    lines = []
+    for user_msg, bot_msg, mood in entries:
+        if user_msg:
+            lines.append(f"User ({mood_label(mood)}): {user_msg}" if mood is not None else f"User: {user_msg}")
+        if bot_msg:
+            lines.append(f"Healora: {strip_footer(bot_msg)}")
+    return "\n".join(lines)
+
+def entry_tokens(entry):
+    user_msg, bot_msg, _ = entry
+    return estimate_tokens(user_msg or "") + estimate_tokens(strip_footer(bot_msg) if bot_msg else "")
+
+# Split earlier turns into those to fold into the summary and those to send verbatim.
+# Once the window overflows it is cut back to half the budget, so the summary is
+# updated every few turns rather than on every turn.
+def plan_context(previous_entries, summary, budget=CONTEXT_TOKEN_BUDGET):
+    start = min(summary["turns"], len(previous_entries))
+    recent = previous_entries[start:]
+    total = sum(entry_tokens(entry) for entry in recent)
+    if total <= budget:
+        return [], recent
+    cut = 0
+    while cut < len(recent) and total > budget // 2:
+        total -= entry_tokens(recent[cut])
+        cut += 1
+    return recent[:cut], recent[cut:]
+
+# Prompt asking the model to extend the running summary with newly evicted turns
+def summary_prompt(summary, entries):
+    return f"""
+    Update the running summary of a supportive conversation between a user and Healora, a mental health chatbot.
+    Keep it under {SUMMARY_WORD_LIMIT} words and focus on the user's feelings, situation and anything they shared that matters later.
+    Current summary: {summary["text"] or "(none)"}
+    New turns:
+    {format_turns(entries)}
+    Updated summary:
+    """
+
+# Summary fallback that needs no model call: keep the gist of each user message
+def local_summary(summary, entries):
+    notes = [summary["text"]] if summary["text"] else []
+    for user_msg, _, _ in entries:
+        if user_msg:
+            notes.append(f"User said: {user_msg[:100]}")
+    words = " ".join(notes).split(" ")
+    return " ".join(words[-SUMMARY_WORD_LIMIT:])
+
+# Summary sent with the prompt while the model is still summarizing the evicted turns
+def interim_summary(summary, entries):
+    return {"text": local_summary(summary, entries), "turns": summary["turns"] + len(entries)}
+
+def apply_summary(summary, text, entries):
+    summary["text"] = text.strip()
+    summary["turns"] += len(entries)
+
+# Context block inserted into the prompt
+def format_context(summary, recent):
+    parts = []
+    if summary["text"]:
+        parts.append(f"Summary of the earlier conversation: {summary['text']}")
+    if recent:
+        parts.append("Recent conversation:\n" + format_turns(recent))
+    return "\n".join(parts)
+
+# Prompt size per request, to confirm cost stays flat on long sessions
+class PromptTokenMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.total_tokens = 0
+        self.total_system_tokens = 0
+        self.max_tokens = 0
+        self.last_tokens = 0
+
+    # system_tokens is the size of the system instruction sent with the prompt
+    def record(self, prompt, system_tokens=0):
+        tokens = estimate_tokens(prompt)
+        with self.lock:
+            self.requests += 1
+            self.total_tokens += tokens
+            self.total_system_tokens += system_tokens
+            self.max_tokens = max(self.max_tokens, tokens)
+            self.last_tokens = tokens
+        logger.debug("prompt_tokens=%d", tokens)
+        return tokens
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "mean_tokens": self.total_tokens / self.requests if self.requests else 0.0,
+                "mean_system_tokens": self.total_system_tokens / self.requests if self.requests else 0.0,
+                "max_tokens": self.max_tokens,
+                "last_tokens": self.last_tokens
+            }
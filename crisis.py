@@ -0,0 +1,70 @@
+import re
+
+# Local crisis/distress screening that runs before the model call.
+#
+# All phrases are compiled into one alternation per level and matched against
+# the lowercased message, so screening is a single regex scan. Matching favours
+# recall: a negated phrase ("I'm not suicidal") still matches, because showing
+# helplines needlessly costs far less than missing someone in crisis.
+
+CRISIS = "crisis"
+DISTRESS = "distress"
+
+# Phrases that mean the user may be at risk right now
+CRISIS_PHRASES = {
+    "en": [
+        "suicid", "kill myself", "killing myself", "end my life", "ending my life", "end it all",
+        "take my own life", "want to die", "wanna die", "wish i was dead", "wish i were dead",
+        "better off dead", "better off without me", "no reason to live", "don't want to live",
+        "dont want to live", "don't want to be alive", "can't go on", "cant go on",
+        "self harm", "self-harm", "selfharm", "harm myself", "hurt myself", "cut myself", "cutting myself",
+        "overdose"
+    ],
+    "es": ["suicidarme", "suicidio", "quiero morir", "quiero morirme", "matarme", "quitarme la vida", "no quiero vivir"],
+    "fr": ["me suicider", "suicide", "envie de mourir", "je veux mourir", "me tuer", "en finir avec la vie"],
+    "de": ["selbstmord", "suizid", "mich umbringen", "will sterben", "nicht mehr leben"],
+    "pt": ["me matar", "quero morrer", "suicídio", "tirar minha vida"],
+    "hi": [
+        "आत्महत्या", "खुदकुशी", "मरना चाहता", "मरना चाहती", "जीना नहीं चाहता", "जीना नहीं चाहती",
+        "aatmahatya", "atmahatya", "khudkushi", "marna chahta", "marna chahti", "jeena nahi chahta", "jeena nahi chahti"
+    ]
+}
+
+# Phrases that signal distress without immediate risk
+DISTRESS_PHRASES = {
+    "en": [
+        "hopeless", "worthless", "can't cope", "cant cope", "can't take it", "cant take it", "panic attack",
+        "falling apart", "breaking down", "nobody cares", "no one cares", "all alone", "so alone", "trapped"
+    ],
+    "es": ["sin esperanza", "no puedo más", "no puedo mas", "ataque de pánico"],
+    "fr": ["désespéré", "désespérée", "je n'en peux plus", "crise d'angoisse"],
+    "de": ["hoffnungslos", "ich kann nicht mehr", "panikattacke"],
+    "pt": ["sem esperança", "não aguento mais", "nao aguento mais"],
+    "hi": ["निराश", "अकेला", "अकेली", "nirash", "akela", "akeli"]
+}
+
+def _compile(phrases_by_language):
+    word_phrases = []
+    other_phrases = []
+    for phrases in phrases_by_language.values():
+        for phrase in phrases:
+            # \b only helps for Latin script; Devanagari vowel signs are not word characters
+            (word_phrases if phrase[0].isascii() else other_phrases).append(phrase.lower())
+    # Longest first, and the word boundary is checked once before trying the alternatives
+    alternatives = [r"\b(?:" + "|".join(re.escape(p) for p in sorted(word_phrases, key=len, reverse=True)) + ")"]
+    alternatives.extend(re.escape(p) for p in sorted(other_phrases, key=len, reverse=True))
+    return re.compile("|".join(alternatives))
+
+CRISIS_PATTERN = _compile(CRISIS_PHRASES)
+DISTRESS_PATTERN = _compile(DISTRESS_PHRASES)
+
+# Returns CRISIS, DISTRESS or None
+def screen_message(message):
+    if not message:
+        return None
+    text = message.lower().replace("’", "'")
+    if CRISIS_PATTERN.search(text):
+        return CRISIS
+    if DISTRESS_PATTERN.search(text):
+        return DISTRESS
+    return None
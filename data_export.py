@@ -0,0 +1,313 @@
+import importlib.util
+import json
+import os
+import tempfile
+import time
+import zipfile
+from datetime import datetime, timedelta
+
+from chat_history import append_turn, new_history, turns
+from mood_analytics import MAX_JOURNAL_ENTRIES, MOOD_CODES, MOODS, new_mood_journal
+
+# Export and import of a session's mood journal, archived conversations and
+# appointments.
+#
+# An export is a zip with one file per table, written as Parquet (or an Arrow
+# IPC stream) when pyarrow is installed and as JSON Lines otherwise. Tables are
+# produced and written in chunks of EXPORT_CHUNK_ROWS rows, and archived
+# conversations are read from the store one at a time, so memory stays bounded
+# however long the journal is. Importing an export restores those parts of a
+# session, replacing what was there. Every table is read and checked before
+# anything is replaced, so an export that cannot be read leaves the session as
+# it was.
+
+EXPORT_CHUNK_ROWS = 5000
+EXPORT_DIR = os.getenv("HEALORA_EXPORT_DIR", os.path.join(tempfile.gettempdir(), "healora-exports"))
+# Export files older than this are deleted when the next export is written
+EXPORT_TTL = 3600
+
+FORMATS = {"parquet": "parquet", "arrow": "arrows", "jsonl": "jsonl"}
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+_EPOCH = datetime(1970, 1, 1)
+
+APPOINTMENT_FIELDS = ["therapist", "date", "time", "user_email", "appointment_note", "timestamp"]
+
+# Columns of each table as (name, type) pairs. Types are "int", "str" and
+# "time" (seconds since 1970-01-01 in local time, as the mood journal keeps them)
+TABLES = {
+    "mood_entries": [("timestamp", "time"), ("mood", "str")],
+    "mood_daily": [("date", "str")] + [(mood, "int") for mood in MOODS],
+    "conversations": [("conversation_id", "int"), ("timestamp", "str"), ("turn", "int"),
+                      ("user", "str"), ("bot", "str"), ("mood", "str")],
+    "appointments": [(name, "str") for name in APPOINTMENT_FIELDS]
+}
+
+# Checked without importing pyarrow, which is loaded on first use
+def arrow_available():
+    return importlib.util.find_spec("pyarrow") is not None
+
+def default_format():
+    return "parquet" if arrow_available() else "jsonl"
+
+def _arrow_schema(columns):
+    import pyarrow as pa
+    types = {"int": pa.int64(), "str": pa.string(), "time": pa.timestamp("s")}
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+class JSONLWriter:
+    def __init__(self, stream, columns):
+        self.stream = stream
+        self.columns = columns
+
+    def write(self, chunk):
+        values = []
+        for name, kind in self.columns:
+            column = chunk[name]
+            if kind == "time":
+                # str() of a whole-second datetime is TIME_FORMAT, and much faster than strftime
+                column = [str(_EPOCH + timedelta(seconds=seconds)) for seconds in column]
+            values.append(column)
+        names = [name for name, _ in self.columns]
+        lines = [json.dumps(dict(zip(names, row)), ensure_ascii=False) + "\n" for row in zip(*values)]
+        self.stream.write("".join(lines).encode("utf-8"))
+
+    def close(self):
+        pass
+
+# Parquet file with one row group per chunk
+class ParquetWriter:
+    def __init__(self, stream, columns):
+        import pyarrow.parquet as pq
+        self.schema = _arrow_schema(columns)
+        self.writer = pq.ParquetWriter(stream, self.schema)
+
+    def write(self, chunk):
+        import pyarrow as pa
+        self.writer.write_batch(pa.record_batch([chunk[name] for name in self.schema.names], schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+# Arrow IPC stream with one record batch per chunk
+class ArrowWriter(ParquetWriter):
+    def __init__(self, stream, columns):
+        import pyarrow as pa
+        self.schema = _arrow_schema(columns)
+        self.writer = pa.ipc.new_stream(stream, self.schema)
+
+WRITERS = {"parquet": ParquetWriter, "arrow": ArrowWriter, "jsonl": JSONLWriter}
+
+# Chunks of a table as {column: values} dicts. Raises ValueError for a line
+# that is not an object of the table's columns.
+def _read_jsonl(stream, columns, chunk_rows):
+    rows = []
+    for line in stream:
+        if line.strip():
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError(f"export row is not an object: {line[:80]!r}")
+            rows.append(row)
+        if len(rows) == chunk_rows:
+            yield _columns(rows, columns)
+            rows = []
+    if rows:
+        yield _columns(rows, columns)
+
+_PYTHON_TYPES = {"int": int, "str": str}
+
+def _columns(rows, columns):
+    chunk = {}
+    for name, kind in columns:
+        values = [row.get(name) for row in rows]
+        if kind == "time":
+            if not all(isinstance(value, str) for value in values):
+                raise ValueError(f"export column {name} must hold times")
+            values = [int((datetime.fromisoformat(value) - _EPOCH).total_seconds()) for value in values]
+        elif not all(value is None or type(value) is _PYTHON_TYPES[kind] for value in values):
+            raise ValueError(f"export column {name} must hold {kind} values")
+        chunk[name] = values
+    return chunk
+
+def _arrow_columns(batch, columns):
+    import pyarrow as pa
+    chunk = {}
+    for name, kind in columns:
+        column = batch.column(name)
+        if kind == "time":
+            # Parquet stores second timestamps as milliseconds
+            column = column.cast(pa.timestamp("s")).cast(pa.int64())
+        chunk[name] = column.to_pylist()
+    return chunk
+
+def _read_parquet(stream, columns, chunk_rows):
+    import pyarrow.parquet as pq
+    for batch in pq.ParquetFile(stream).iter_batches(batch_size=chunk_rows, columns=[name for name, _ in columns]):
+        yield _arrow_columns(batch, columns)
+
+def _read_arrow(stream, columns, chunk_rows):
+    import pyarrow as pa
+    for batch in pa.ipc.open_stream(stream):
+        yield _arrow_columns(batch, columns)
+
+READERS = {"parquet": _read_parquet, "arrow": _read_arrow, "jsonl": _read_jsonl}
+
+# Group row tuples into column chunks
+def _row_chunks(rows, columns, chunk_rows):
+    names = [name for name, _ in columns]
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == chunk_rows:
+            yield dict(zip(names, map(list, zip(*batch))))
+            batch = []
+    if batch:
+        yield dict(zip(names, map(list, zip(*batch))))
+
+def _mood_entry_chunks(journal, chunk_rows):
+    timestamps, codes = journal["timestamps"], journal["codes"]
+    for start in range(0, len(codes), chunk_rows):
+        yield {"timestamp": timestamps[start:start + chunk_rows],
+               "mood": [MOODS[code] for code in codes[start:start + chunk_rows]]}
+
+def _mood_daily_rows(journal):
+    daily = journal["daily"]
+    for day in sorted(daily):
+        yield (day, *daily[day])
+
+def _conversation_rows(store, session_id, archive):
+    for conv in archive:
+        for turn, (user_msg, bot_msg, mood) in enumerate(turns(store.load_conversation(session_id, conv["id"]))):
+            yield conv["id"], conv["timestamp"], turn, user_msg, bot_msg, MOODS[mood] if mood is not None else None
+
+def _appointment_rows(appointments):
+    for appointment in appointments:
+        yield tuple(str(appointment.get(name) or "") for name in APPOINTMENT_FIELDS)
+
+# Write the session's tables to a zip at path
+def export_session(store, session_id, data, path, fmt=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    fmt = fmt or default_format()
+    journal = data["mood_journal"]
+    tables = {
+        "mood_entries": _mood_entry_chunks(journal, chunk_rows),
+        "mood_daily": _row_chunks(_mood_daily_rows(journal), TABLES["mood_daily"], chunk_rows),
+        "conversations": _row_chunks(_conversation_rows(store, session_id, data["conversation_archive"]),
+                                     TABLES["conversations"], chunk_rows),
+        "appointments": _row_chunks(_appointment_rows(data["appointments"]), TABLES["appointments"], chunk_rows)
+    }
+    # Parquet is compressed already
+    compression = zipfile.ZIP_STORED if fmt == "parquet" else zipfile.ZIP_DEFLATED
+    with zipfile.ZipFile(path, "w", compression=compression) as archive:
+        for table, chunks in tables.items():
+            with archive.open(f"{table}.{FORMATS[fmt]}", "w") as stream:
+                writer = WRITERS[fmt](stream, TABLES[table])
+                for chunk in chunks:
+                    writer.write(chunk)
+                writer.close()
+    return path
+
+# Export to a new file in EXPORT_DIR, deleting expired exports
+def export_to_file(store, session_id, data, fmt=None):
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    now = time.time()
+    for name in os.listdir(EXPORT_DIR):
+        old = os.path.join(EXPORT_DIR, name)
+        try:
+            if os.path.getmtime(old) < now - EXPORT_TTL:
+                os.remove(old)
+        except OSError:
+            pass
+    fd, path = tempfile.mkstemp(prefix=f"healora-{datetime.now():%Y%m%d}-", suffix=".zip", dir=EXPORT_DIR)
+    os.close(fd)
+    return export_session(store, session_id, data, path, fmt)
+
+# Column chunks of one table in an export, or None if the export lacks it
+def _table_chunks(archive, members, table, chunk_rows):
+    member = members.get(table)
+    if member is None:
+        return None
+    fmt = {extension: fmt for fmt, extension in FORMATS.items()}.get(member.rsplit(".", 1)[-1])
+    if fmt is None:
+        raise ValueError(f"unknown file in export: {member}")
+
+    def chunks():
+        with archive.open(member) as stream:
+            yield from READERS[fmt](stream, TABLES[table], chunk_rows)
+    return chunks()
+
+def _restore_journal(entry_chunks, daily_chunks):
+    journal = new_mood_journal()
+    rebuild_daily = daily_chunks is None
+    for chunk in entry_chunks:
+        codes = [MOOD_CODES.get(mood, MOOD_CODES["other"]) for mood in chunk["mood"]]
+        journal["timestamps"].extend(chunk["timestamp"])
+        journal["codes"].extend(codes)
+        if rebuild_daily:
+            for seconds, code in zip(chunk["timestamp"], codes):
+                day = (_EPOCH + timedelta(seconds=seconds)).strftime("%Y-%m-%d")
+                journal["daily"].setdefault(day, [0] * len(MOODS))[code] += 1
+        del journal["timestamps"][:-MAX_JOURNAL_ENTRIES]
+        del journal["codes"][:-MAX_JOURNAL_ENTRIES]
+    for chunk in daily_chunks or ():
+        for day, *counts in zip(*(chunk[name] for name, _ in TABLES["mood_daily"])):
+            journal["daily"][day] = [int(count or 0) for count in counts]
+    return journal
+
+# (timestamp, history) per conversation, from rows grouped by conversation
+def _restore_conversations(chunks):
+    current, timestamp, history = None, None, new_history()
+    for chunk in chunks:
+        for conversation_id, stamp, user_msg, bot_msg, mood in zip(chunk["conversation_id"], chunk["timestamp"],
+                                                                   chunk["user"], chunk["bot"], chunk["mood"]):
+            if conversation_id != current:
+                if current is not None:
+                    yield timestamp, history
+                current, timestamp, history = conversation_id, stamp, new_history()
+            append_turn(history, user_msg, mood, reply=bot_msg)
+    if current is not None:
+        yield timestamp, history
+
+# Restore the tables found in the export at path into the session and save it;
+# returns row counts. The tables are read in full first: the journal and
+# appointments into memory and the conversations into the store under new IDs
+# (see SessionStore.stage_archive). If book is given it is called with the
+# restored appointments once everything was read and returns those to keep,
+# e.g. the ones whose slots could be reserved; "skipped_appointments" counts
+# the others. Values of data are replaced, never changed in place, so a caller
+# passing a copy of a session keeps the original if this raises.
+def import_session(store, session_id, data, path, chunk_rows=EXPORT_CHUNK_ROWS, book=None):
+    counts = {}
+    restored = {}
+    archive = None
+    with zipfile.ZipFile(path) as export:
+        members = {name.rsplit(".", 1)[0]: name for name in export.namelist()}
+        entries = _table_chunks(export, members, "mood_entries", chunk_rows)
+        if entries is not None:
+            restored["mood_journal"] = _restore_journal(entries, _table_chunks(export, members, "mood_daily", chunk_rows))
+            counts["mood_entries"] = len(restored["mood_journal"]["codes"])
+        appointments = _table_chunks(export, members, "appointments", chunk_rows)
+        if appointments is not None:
+            restored["appointments"] = [
+                dict(zip(APPOINTMENT_FIELDS, row), email_ids=[])
+                for chunk in appointments
+                for row in zip(*(chunk[name] for name in APPOINTMENT_FIELDS))
+            ]
+        conversations = _table_chunks(export, members, "conversations", chunk_rows)
+        if conversations is not None:
+            archive = store.stage_archive(session_id, data, _restore_conversations(conversations))
+            counts["conversations"] = len(archive)
+    try:
+        if "appointments" in restored and book is not None:
+            kept = book(restored["appointments"])
+            counts["skipped_appointments"] = len(restored["appointments"]) - len(kept)
+            restored["appointments"] = kept
+    except BaseException:
+        store.discard_archive(session_id, archive or [])
+        raise
+    if "appointments" in restored:
+        counts["appointments"] = len(restored["appointments"])
+    data.update(restored)
+    if archive is None:
+        store.save(session_id, data)
+    else:
+        store.replace_archive(session_id, data, archive)
+    return counts
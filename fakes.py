@@ -0,0 +1,148 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+
+# Offline stand-ins for the external services used by app.py.
+# Set HEALORA_FAKE_MODEL=1 to run the app without a Gemini API key and
+# HEALORA_FAKE_GMAIL=1 to record emails instead of sending them.
+
+DEFAULT_FAKE_REPLY = (
+    "I hear you, and I'm really glad you reached out. "
+    "What you're feeling matters. Let's take this one step at a time together."
+)
+
+# Response object exposing the same .text attribute as a Gemini response
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+# google.api_core-like API error carrying an HTTP status code
+class FakeApiError(Exception):
+    def __init__(self, code):
+        super().__init__(f"Fake API error {code}")
+        self.code = code
+
+# Deterministic replacement for genai.GenerativeModel.
+# quota is the number of requests accepted per rolling second; requests over
+# it fail with a 429 like the real API does once the rate limit is exceeded.
+# A slow_rate fraction of requests (drawn from a seeded generator) take
+# slow_latency seconds to the first chunk. A request whose first chunk would
+# take longer than its request_options timeout fails with a 504 at the
+# timeout, as the client does.
+class FakeGenerativeModel:
+    def __init__(self, reply=DEFAULT_FAKE_REPLY, words_per_chunk=4, latency=0.0, first_chunk_latency=None, fail=False,
+                 quota=None, system_instruction=None, slow_rate=0.0, slow_latency=0.0, seed=0):
+        self.reply = reply
+        self.words_per_chunk = words_per_chunk
+        self.latency = latency
+        self.first_chunk_latency = latency if first_chunk_latency is None else first_chunk_latency
+        self.fail = fail
+        self.quota = quota
+        self.system_instruction = system_instruction
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+        self.recent = deque()
+
+    def _chunks(self):
+        words = self.reply.split(" ")
+        for i in range(0, len(words), self.words_per_chunk):
+            chunk = " ".join(words[i:i + self.words_per_chunk])
+            yield chunk if i + self.words_per_chunk >= len(words) else chunk + " "
+
+    def _check(self):
+        with self.lock:
+            self.calls += 1
+            if self.quota is not None:
+                now = time.monotonic()
+                while self.recent and self.recent[0] <= now - 1.0:
+                    self.recent.popleft()
+                if len(self.recent) >= self.quota:
+                    self.rejected += 1
+                    raise FakeApiError(429)
+                self.recent.append(now)
+        if self.fail:
+            raise RuntimeError("Fake model failure")
+
+    # Seconds to the first chunk, or (timeout, True) if the request times out first
+    def _first_latency(self, request_options):
+        with self.lock:
+            slow = self.slow_rate and self.random.random() < self.slow_rate
+        latency = self.slow_latency if slow else self.first_chunk_latency
+        timeout = (request_options or {}).get("timeout")
+        if timeout is not None and latency > timeout:
+            return timeout, True
+        return latency, False
+
+    def _stream(self, first):
+        latency, timed_out = first
+        for i, chunk in enumerate(self._chunks()):
+            time.sleep(latency if i == 0 else self.latency)
+            if timed_out:
+                raise FakeApiError(504)
+            yield FakeResponse(chunk)
+
+    async def _astream(self, first):
+        latency, timed_out = first
+        for i, chunk in enumerate(self._chunks()):
+            await asyncio.sleep(latency if i == 0 else self.latency)
+            if timed_out:
+                raise FakeApiError(504)
+            yield FakeResponse(chunk)
+
+    def generate_content(self, prompt, stream=False, request_options=None, **kwargs):
+        self._check()
+        first = self._first_latency(request_options)
+        if stream:
+            return self._stream(first)
+        time.sleep(first[0])
+        if first[1]:
+            raise FakeApiError(504)
+        return FakeResponse(self.reply)
+
+    async def generate_content_async(self, prompt, stream=False, request_options=None, **kwargs):
+        self._check()
+        first = self._first_latency(request_options)
+        if stream:
+            return self._astream(first)
+        await asyncio.sleep(first[0])
+        if first[1]:
+            raise FakeApiError(504)
+        return FakeResponse(self.reply)
+
+# HttpError-like failure carrying an HTTP status
+class FakeGmailError(Exception):
+    def __init__(self, status):
+        super().__init__(f"Fake Gmail error {status}")
+        self.resp = type("FakeResp", (), {"status": status})()
+
+# Stand-in for gmail_client.GmailClient that records messages instead of sending them
+class FakeGmailClient:
+    def __init__(self, latency=0.0, failures=0, failure_status=503):
+        self.latency = latency
+        self.failures = failures
+        self.failure_status = failure_status
+        self.sent = []
+        self.attempts = 0
+        self.lock = threading.Lock()
+
+    def get_service(self):
+        return self
+
+    def warm(self, timeout=None):
+        pass
+
+    def send(self, message):
+        time.sleep(self.latency)
+        with self.lock:
+            self.attempts += 1
+            if self.failures > 0:
+                self.failures -= 1
+                raise FakeGmailError(self.failure_status)
+            self.sent.append(message)
+            return {"id": f"fake-{len(self.sent)}"}
@@ -0,0 +1,73 @@
+import json
+import os
+import threading
+
+# Process-wide Gmail API client.
+#
+# Credentials are parsed and the service is built once per process, from the
+# discovery document bundled with googleapiclient instead of one fetched over
+# the network. Credentials are refreshed only when they expire. httplib2 is
+# not thread-safe, so every thread sends through its own authorized connection.
+# Every connection has a socket timeout, so a hung request fails instead of
+# holding its thread forever.
+# The Google client libraries are imported when the client is first used.
+
+GMAIL_ADDRESS = os.getenv("GMAIL_ADDRESS")
+GMAIL_TOKEN_JSON = os.getenv("GMAIL_TOKEN_JSON")
+# Socket timeout of Gmail requests, in seconds
+GMAIL_TIMEOUT = float(os.getenv("HEALORA_GMAIL_TIMEOUT", "30"))
+
+class GmailClient:
+    def __init__(self, token_json=GMAIL_TOKEN_JSON, timeout=GMAIL_TIMEOUT):
+        self.token_json = token_json
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.creds = None
+        self.service = None
+
+    def _credentials(self):
+        import google_auth_httplib2
+        import httplib2
+        from google.oauth2.credentials import Credentials
+        if self.creds is None:
+            self.creds = Credentials.from_authorized_user_info(json.loads(self.token_json))
+        if self.creds.expired and self.creds.refresh_token:
+            self.creds.refresh(google_auth_httplib2.Request(httplib2.Http(timeout=self.timeout)))
+        return self.creds
+
+    def get_service(self):
+        with self.lock:
+            try:
+                creds = self._credentials()
+                if self.service is None:
+                    from googleapiclient.discovery import build
+                    self.service = build("gmail", "v1", credentials=creds, static_discovery=True, cache_discovery=False)
+                return self.service
+            except Exception as e:
+                raise Exception(f"Failed to initialize Gmail API: {str(e)}")
+
+    def _http(self):
+        http = getattr(self.local, "http", None)
+        if http is None:
+            import google_auth_httplib2
+            import httplib2
+            timeout = getattr(self.local, "timeout", self.timeout)
+            http = google_auth_httplib2.AuthorizedHttp(self.creds, http=httplib2.Http(timeout=timeout))
+            self.local.http = http
+        return http
+
+    # Build the service and the calling thread's connection ahead of its first
+    # send; timeout replaces GMAIL_TIMEOUT for the thread's connection
+    def warm(self, timeout=None):
+        if timeout is not None:
+            self.local.timeout = timeout
+        self.get_service()
+        self._http()
+
+    # Send a message created by create_message
+    def send(self, message):
+        service = self.get_service()
+        return service.users().messages().send(userId="me", body=message).execute(http=self._http())
+
+gmail_client = GmailClient()
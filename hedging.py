@@ -0,0 +1,96 @@
+import asyncio
+import os
+
+import metrics
+
+# Hedged reply streams with a deadline.
+#
+# A reply is requested from the first model of a cascade. If it has not sent
+# its first chunk HEDGE_AFTER seconds later, or fails before sending one, the
+# same prompt goes to the next model (a smaller, faster one), and so on down
+# the cascade. The first stream to produce a chunk is used and the others are
+# cancelled, which also gives back their admission slots. Once a reply has
+# started nothing more is hedged. The whole reply must arrive within
+# REPLY_DEADLINE seconds; every request is started with the time left as its
+# client timeout.
+
+HEDGE_AFTER = float(os.getenv("HEALORA_HEDGE_AFTER", "3"))
+REPLY_DEADLINE = float(os.getenv("HEALORA_REPLY_DEADLINE", "30"))
+
+hedges = metrics.Counter("healora_model_hedges_total",
+                         "Hedged reply requests: sent to a later model of the cascade, and won.", label="outcome")
+
+async def _cancel(task, stream):
+    task.cancel()
+    try:
+        await task
+    except BaseException:
+        pass
+    await stream.aclose()
+
+# Text chunks of the first reply to start. starts[i](timeout) opens the
+# stream of model i with timeout seconds left. Raises TimeoutError past the
+# deadline, or the first model's error if every model failed before replying.
+async def hedged_stream(starts, hedge_after=HEDGE_AFTER, deadline=REPLY_DEADLINE):
+    loop = asyncio.get_running_loop()
+    end = loop.time() + deadline
+    pending = {}
+    errors = []
+
+    def launch(index):
+        stream = starts[index](end - loop.time()).__aiter__()
+        pending[asyncio.ensure_future(stream.__anext__())] = (index, stream)
+        if index:
+            hedges.inc("sent")
+
+    launched = 1
+    launch(0)
+    hedge_at = loop.time() + hedge_after
+    winner = None
+    try:
+        while winner is None:
+            now = loop.time()
+            if now >= end:
+                metrics.errors.inc("reply_deadline")
+                raise TimeoutError("no reply chunk before the deadline")
+            if launched < len(starts) and (now >= hedge_at or not pending):
+                launch(launched)
+                launched += 1
+                hedge_at = now + hedge_after
+                continue
+            timeout = end - now if launched == len(starts) else min(end, hedge_at) - now
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=lambda task: pending[task][0]):
+                index, stream = pending.pop(task)
+                error = task.exception()
+                if error is None and winner is None:
+                    winner = index, stream, task.result()
+                elif error is None:
+                    await stream.aclose()
+                else:
+                    errors.append((index, RuntimeError("empty reply") if isinstance(error, StopAsyncIteration) else error))
+            if winner is None and not pending and launched == len(starts):
+                raise min(errors, key=lambda error: error[0])[1]
+    finally:
+        for task, (_, stream) in list(pending.items()):
+            await _cancel(task, stream)
+
+    index, stream, chunk = winner
+    if index:
+        hedges.inc("won")
+    try:
+        while True:
+            yield chunk
+            remaining = end - loop.time()
+            if remaining <= 0:
+                metrics.errors.inc("reply_deadline")
+                raise TimeoutError("reply did not finish before the deadline")
+            try:
+                chunk = await asyncio.wait_for(stream.__anext__(), remaining)
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                metrics.errors.inc("reply_deadline")
+                raise TimeoutError("reply did not finish before the deadline")
+    finally:
+        await stream.aclose()
@@ -0,0 +1,67 @@
+import threading
+import unicodedata
+from functools import lru_cache
+
+# Language detection for the prompt.
+#
+# langdetect is probabilistic and unreliable on short inputs, so the detector
+# is seeded (deterministic results) and built once per process. Short messages
+# such as "ok" or "hi" are never detected; they keep the session's language.
+# A session also keeps its detected language while the user keeps writing in
+# the same script, and is re-detected every few turns or when the script changes.
+
+DEFAULT_LANGUAGE = "en"
+MIN_DETECT_CHARS = 20
+REDETECT_EVERY = 5
+
+_factory = None
+_factory_lock = threading.Lock()
+
+def _detector_factory():
+    global _factory
+    if _factory is None:
+        with _factory_lock:
+            if _factory is None:
+                from langdetect.detector_factory import PROFILES_DIRECTORY, DetectorFactory
+                factory = DetectorFactory()
+                factory.load_profile(PROFILES_DIRECTORY)
+                factory.seed = 0
+                _factory = factory
+    return _factory
+
+# Load the language profiles ahead of the first message that needs them
+def load_detector():
+    _detector_factory()
+
+# Seeded langdetect call, memoized on the exact text
+@lru_cache(maxsize=4096)
+def detect_text(text):
+    try:
+        detector = _detector_factory().create()
+        detector.append(text)
+        return detector.detect()
+    except Exception:
+        return DEFAULT_LANGUAGE
+
+# First script found among the letters, e.g. "ASCII", "LATIN", "DEVANAGARI"
+def script_of(text):
+    for ch in text:
+        if ord(ch) > 127 and ch.isalpha():
+            return unicodedata.name(ch, "OTHER").split(" ")[0]
+    return "ASCII"
+
+# Language of a message, using and updating the per-session cache
+def detect_language(message, session=None):
+    text = message.strip()
+    cached = session.get("language") if session is not None else None
+    letters = sum(1 for ch in text if ch.isalpha())
+    script = script_of(text)
+    if letters < MIN_DETECT_CHARS and script == "ASCII":
+        return cached["lang"] if cached else DEFAULT_LANGUAGE
+    if cached and cached["script"] == script and cached["turns"] < REDETECT_EVERY:
+        cached["turns"] += 1
+        return cached["lang"]
+    lang = detect_text(text)
+    if session is not None:
+        session["language"] = {"lang": lang, "script": script, "turns": 0}
+    return lang
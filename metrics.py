@@ -0,0 +1,148 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# In-process metrics exported in the Prometheus text format.
+#
+# Counters and histograms are plain objects updated under a lock, about a
+# microsecond per update, so they stay on in production. A metric has at most
+# one label; each label value is its own series. render() produces the text
+# served at /metrics.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_registry = []
+
+def _series_name(name, label, value, extra=""):
+    labels = [f'{label}="{value}"'] if label and value is not None else []
+    if extra:
+        labels.append(extra)
+    return f"{name}{{{','.join(labels)}}}" if labels else name
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name, help, label=None):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.lock = threading.Lock()
+        self.values = {} if label else {None: 0}
+        _registry.append(self)
+
+    def inc(self, label_value=None, amount=1):
+        with self.lock:
+            self.values[label_value] = self.values.get(label_value, 0) + amount
+
+    def value(self, label_value=None):
+        with self.lock:
+            return self.values.get(label_value, 0)
+
+    def render(self):
+        with self.lock:
+            values = sorted(self.values.items(), key=lambda item: str(item[0]))
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_value, value in values:
+            lines.append(f"{_series_name(self.name, self.label, label_value)} {_number(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help, label=None, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        # Per label value: a count per bucket, one for +Inf, then the sum
+        self.series = {}
+        _registry.append(self)
+
+    def observe(self, value, label_value=None):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(label_value)
+            if series is None:
+                series = self.series[label_value] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    # Times the body of a with block
+    @contextmanager
+    def time(self, label_value=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, label_value)
+
+    def count(self, label_value=None):
+        with self.lock:
+            series = self.series.get(label_value)
+            return sum(series[:-1]) if series else 0
+
+    def render(self):
+        with self.lock:
+            series = sorted(((key, list(values)) for key, values in self.series.items()), key=lambda item: str(item[0]))
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_value, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), values[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{_series_name(self.name + '_bucket', self.label, label_value, le)} {cumulative}")
+            lines.append(f"{_series_name(self.name + '_sum', self.label, label_value)} {_number(values[-1])}")
+            lines.append(f"{_series_name(self.name + '_count', self.label, label_value)} {cumulative}")
+        return lines
+
+# Value read when metrics are rendered; fn returns a number or a {label value: number} dict
+class Gauge:
+    def __init__(self, name, help, fn, label=None):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.fn = fn
+        _registry.append(self)
+
+    def render(self):
+        values = self.fn()
+        if not isinstance(values, dict):
+            values = {None: values}
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for label_value, value in sorted(values.items(), key=lambda item: str(item[0])):
+            lines.append(f"{_series_name(self.name, self.label, label_value)} {_number(value)}")
+        return lines
+
+# Times consecutive stages of a handler: lap(stage) records the time since the previous lap
+class StageTimer:
+    def __init__(self, histogram=None):
+        self.histogram = histogram or stage_seconds
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.histogram.observe(now - self.last, stage)
+        self.last = now
+
+def render():
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# Metrics shared by the handlers, the session store and the outbox
+stage_seconds = Histogram("healora_stage_seconds", "Time spent in each stage of a handler.", label="stage")
+model_seconds = Histogram("healora_model_seconds", "Model request latency, to the last chunk.", label="call")
+model_first_chunk_seconds = Histogram("healora_model_first_chunk_seconds", "Time to the first streamed reply chunk.")
+chat_turns = Counter("healora_chat_turns_total", "Chat turns handled.")
+fallback_responses = Counter("healora_fallback_responses_total", "Chat turns answered with the fallback reply.")
+busy_responses = Counter("healora_busy_responses_total", "Chat turns turned away by model admission control.")
+model_retries = Counter("healora_model_retries_total", "Model requests retried after a retryable error.")
+admission = Counter("healora_model_admission_total", "Model admission decisions.", label="outcome")
+admission_wait_seconds = Histogram("healora_model_admission_wait_seconds", "Time model requests waited in the admission queue.")
+errors = Counter("healora_errors_total", "Exceptions caught by a fallback path.", label="where")
+email_send_seconds = Histogram("healora_email_send_seconds", "Email send latency.", label="path")
+emails = Counter("healora_emails_total", "Email send attempts by outcome.", label="outcome")
+session_bytes = Histogram("healora_session_bytes", "Serialized session size per save.", buckets=SIZE_BUCKETS)
@@ -0,0 +1,179 @@
+import os
+import sqlite3
+import threading
+from datetime import timedelta
+
+from mood_analytics import MOODS, MOOD_SCORES, ROLLING_WINDOW, _plot_lock
+from remote_store import STORE_URL, RemoteMoodAggregates
+
+# Population mood counters for the clinical dashboard.
+#
+# Every logged mood bumps a few counters instead of being appended to a log
+# that is rescanned later: the (day, region, mood) count, and, when the
+# session was shown a coping strategy within FOLLOW_UP_SECONDS before, the
+# (strategy, mood logged next) count. Every strategy shown bumps its own
+# count. Each bump is one upsert on a primary key, so logging costs the same
+# however many moods were logged before. Rolling windows are ranges of day
+# counters, and the dashboard reads at most DASHBOARD_DAYS days of them plus
+# one row per strategy and mood, so it renders in the same time for a
+# thousand events or a billion. Only counts are kept, never session IDs.
+# With HEALORA_STORE_URL set the counters live in the network store instead,
+# shared by every replica.
+
+AGGREGATES_DB_PATH = os.getenv("HEALORA_AGGREGATES_DB", "healora_aggregates.db")
+# A mood logged this long after a coping strategy was shown counts as its outcome
+FOLLOW_UP_SECONDS = int(os.getenv("HEALORA_COPING_FOLLOW_UP", str(24 * 3600)))
+DASHBOARD_DAYS = 30
+
+class MoodAggregates:
+    def __init__(self, path=AGGREGATES_DB_PATH):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS mood_daily ("
+                "day TEXT NOT NULL, region TEXT NOT NULL, mood INTEGER NOT NULL, count INTEGER NOT NULL, "
+                "PRIMARY KEY (day, region, mood))"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS coping_shown ("
+                "mood INTEGER NOT NULL, strategy INTEGER NOT NULL, count INTEGER NOT NULL, "
+                "PRIMARY KEY (mood, strategy))"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS coping_outcomes ("
+                "mood INTEGER NOT NULL, strategy INTEGER NOT NULL, after INTEGER NOT NULL, count INTEGER NOT NULL, "
+                "PRIMARY KEY (mood, strategy, after))"
+            )
+
+    # Counts a mood logged on day (YYYY-MM-DD); follow_up is the [mood, strategy]
+    # of the coping strategy the session was shown last, if recent enough
+    def record_mood(self, day, region, mood, follow_up=None):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO mood_daily (day, region, mood, count) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT (day, region, mood) DO UPDATE SET count = count + 1",
+                (day, region, mood)
+            )
+            if follow_up:
+                self.conn.execute(
+                    "INSERT INTO coping_outcomes (mood, strategy, after, count) VALUES (?, ?, ?, 1) "
+                    "ON CONFLICT (mood, strategy, after) DO UPDATE SET count = count + 1",
+                    (follow_up[0], follow_up[1], mood)
+                )
+
+    # Counts a coping strategy (its index for the mood) shown in a reply
+    def record_strategy(self, mood, strategy):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO coping_shown (mood, strategy, count) VALUES (?, ?, 1) "
+                "ON CONFLICT (mood, strategy) DO UPDATE SET count = count + 1",
+                (mood, strategy)
+            )
+
+    # [day, region, mood, count] rows from first_day on
+    def daily(self, first_day):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT day, region, mood, count FROM mood_daily WHERE day >= ?", (first_day,)
+            ).fetchall()
+        return [list(row) for row in rows]
+
+    # [mood, strategy, count] rows of strategies shown, and
+    # [mood, strategy, after, count] rows of the moods logged next
+    def coping(self):
+        with self.lock:
+            shown = self.conn.execute("SELECT mood, strategy, count FROM coping_shown").fetchall()
+            outcomes = self.conn.execute("SELECT mood, strategy, after, count FROM coping_outcomes").fetchall()
+        return [list(row) for row in shown], [list(row) for row in outcomes]
+
+# Mood aggregates configured by HEALORA_STORE_URL or HEALORA_AGGREGATES_DB
+def create_mood_aggregates(path=AGGREGATES_DB_PATH, url=STORE_URL):
+    return RemoteMoodAggregates(url) if url else MoodAggregates(path)
+
+# [mood, strategy] to record with the next logged mood, if the session's last
+# coping strategy (session["coping_shown"]: mood, strategy, time) is recent enough
+def pop_follow_up(session, now):
+    shown = session.pop("coping_shown", None)
+    if shown and now - shown["time"] <= FOLLOW_UP_SECONDS:
+        return [shown["mood"], shown["strategy"]]
+    return None
+
+# Dashboard frames from the counters of the DASHBOARD_DAYS days up to today:
+# - distribution: share of each mood per region over the window
+# - daily: mood counts per day for region ("All" sums every region)
+# - scores: mean mood score per day and region, and its ROLLING_WINDOW-day rolling mean
+def mood_frames(rows, today, region="All"):
+    import numpy as np
+    import pandas as pd
+    days = pd.date_range(end=pd.Timestamp(today), periods=DASHBOARD_DAYS, freq="D")
+    frame = pd.DataFrame(rows, columns=["day", "region", "mood", "count"])
+    frame["day"] = pd.to_datetime(frame["day"])
+    frame["mood"] = pd.Categorical.from_codes(frame["mood"].to_numpy(dtype="int8"), categories=MOODS)
+    counts = frame.pivot_table(index=["region", "day"], columns="mood", values="count", aggfunc="sum",
+                               fill_value=0, observed=False)
+
+    by_region = counts.groupby(level="region").sum()
+    distribution = by_region.div(by_region.sum(axis=1), axis=0).round(3)
+    distribution.insert(0, "Moods logged", by_region.sum(axis=1))
+    distribution = distribution.reset_index().rename(columns={"region": "Region"})
+    distribution.columns.name = None
+
+    selected = counts if region == "All" else counts[counts.index.get_level_values("region") == region]
+    daily = selected.groupby(level="day").sum().reindex(days, fill_value=0)
+    daily.index.name = "Day"
+    daily.columns = list(daily.columns)
+
+    regions = counts.index.get_level_values("region").unique()
+    full = counts.reindex(pd.MultiIndex.from_product([regions, days], names=["region", "day"]), fill_value=0)
+    sums = pd.DataFrame({"score": full.to_numpy() @ np.array(MOOD_SCORES), "count": full.sum(axis=1)},
+                        index=full.index)
+    # Rolling window: score and count sums over the last ROLLING_WINDOW day counters
+    window = sums.groupby(level="region").rolling(ROLLING_WINDOW, min_periods=1).sum().droplevel(0)
+    scores = pd.DataFrame({"Mood score": sums["score"] / sums["count"].where(sums["count"] > 0),
+                           f"{ROLLING_WINDOW}-day average": window["score"] / window["count"].where(window["count"] > 0)},
+                          index=full.index)
+    return distribution, daily, scores.reset_index()
+
+# Outcome per coping strategy: times shown, moods logged after it, share of
+# those better than the mood it was shown for, and the mean score change
+def coping_frame(shown, outcomes, strategies):
+    import pandas as pd
+    followed = {}
+    for mood, strategy, after, count in outcomes:
+        entry = followed.setdefault((mood, strategy), [0, 0, 0])
+        change = MOOD_SCORES[after] - MOOD_SCORES[mood]
+        entry[0] += count
+        entry[1] += count * (change > 0)
+        entry[2] += count * change
+    rows = []
+    for mood, strategy, count in sorted(shown):
+        texts = strategies.get(MOODS[mood], [])
+        logged, better, change = followed.get((mood, strategy), [0, 0, 0])
+        rows.append({
+            "Mood": MOODS[mood],
+            "Strategy": texts[strategy] if strategy < len(texts) else f"#{strategy}",
+            "Shown": count,
+            "Moods logged after": logged,
+            "Better after": round(better / logged, 3) if logged else None,
+            "Mean score change": round(change / logged, 2) if logged else None
+        })
+    return pd.DataFrame(rows, columns=["Mood", "Strategy", "Shown", "Moods logged after", "Better after",
+                                       "Mean score change"])
+
+# Stacked mood counts per day, and the rolling mood score per region
+def dashboard_figures(daily, scores, region="All"):
+    import plotly.express as px
+    average = f"{ROLLING_WINDOW}-day average"
+    with _plot_lock:
+        counts_fig = px.bar(daily, y=MOODS, title=f"Moods logged per day ({region})")
+        score_fig = px.line(scores, x="day", y=average, color="region", markers=True,
+                            title=f"Mood score by region ({average})")
+    counts_fig.update_layout(xaxis_title="Day", yaxis_title="Moods logged", legend_title_text="")
+    score_fig.update_layout(xaxis_title="Day", yaxis_title="Mood score (-2 sad to 2 happy)", legend_title_text="")
+    return counts_fig, score_fig
+
+# Window start for mood_frames, as stored in mood_daily
+def first_dashboard_day(today):
+    return (today - timedelta(days=DASHBOARD_DAYS - 1)).isoformat()
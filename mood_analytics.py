@@ -0,0 +1,109 @@
+import threading
+from datetime import datetime
+
+# Mood journal analytics.
+#
+# The journal is stored column-wise in the session: parallel lists of
+# timestamps (seconds since 1970-01-01 in local time) and mood codes, plus
+# per-day mood counts that log_mood updates in O(1). Trend plots are built
+# from those columns with vectorized pandas operations and downsampled to
+# weekly or monthly buckets so figure size stays bounded. numpy, pandas and
+# plotly are only imported when a trend is plotted.
+
+MOODS = ["happy", "sad", "anxious", "stressed", "other"]
+MOOD_CODES = {mood: code for code, mood in enumerate(MOODS)}
+MOOD_SCORES = [2, -2, -1, -1, 0]
+
+MAX_JOURNAL_ENTRIES = 5000
+# Journals up to this size are plotted entry by entry, larger ones as aggregates
+MAX_RAW_POINTS = 200
+MAX_PLOT_POINTS = 180
+ROLLING_WINDOW = 7
+
+_EPOCH = datetime(1970, 1, 1)
+
+# plotly.express shares its default template between figures and is not
+# thread-safe, so concurrent show_mood_trends calls build figures one at a time
+_plot_lock = threading.Lock()
+
+def new_mood_journal():
+    return {"timestamps": [], "codes": [], "daily": {}}
+
+# Columnar journal for a session, converting the old list of {"timestamp", "mood"} dicts
+def ensure_mood_journal(session):
+    journal = session.get("mood_journal")
+    if isinstance(journal, dict):
+        return journal
+    converted = new_mood_journal()
+    for entry in journal or []:
+        when = datetime.strptime(entry["timestamp"], "%Y-%m-%d %H:%M:%S")
+        append_mood(converted, entry["mood"], when)
+    session["mood_journal"] = converted
+    return converted
+
+def journal_size(journal):
+    return len(journal["codes"])
+
+def append_mood(journal, mood, when=None):
+    when = when or datetime.now()
+    code = MOOD_CODES.get(mood, MOOD_CODES["other"])
+    journal["timestamps"].append(int((when - _EPOCH).total_seconds()))
+    journal["codes"].append(code)
+    day = journal["daily"].setdefault(when.strftime("%Y-%m-%d"), [0] * len(MOODS))
+    day[code] += 1
+    # Per-day counts are kept for the whole history; raw entries are capped
+    if len(journal["codes"]) > MAX_JOURNAL_ENTRIES:
+        del journal["timestamps"][:-MAX_JOURNAL_ENTRIES]
+        del journal["codes"][:-MAX_JOURNAL_ENTRIES]
+
+# Raw entries as a typed frame (datetime64 timestamps, categorical moods)
+def journal_frame(journal):
+    import numpy as np
+    import pandas as pd
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime(np.asarray(journal["timestamps"], dtype="int64"), unit="s"),
+        "mood": pd.Categorical.from_codes(np.asarray(journal["codes"], dtype="int8"), categories=MOODS)
+    })
+
+# Per-day mood counts indexed by date
+def daily_counts(journal):
+    import numpy as np
+    import pandas as pd
+    days = sorted(journal["daily"])
+    counts = np.array([journal["daily"][day] for day in days], dtype="int64").reshape(len(days), len(MOODS))
+    return pd.DataFrame(counts, index=pd.DatetimeIndex(days), columns=MOODS)
+
+# Mean mood score per bucket plus a rolling average, with buckets coarse enough
+# to keep at most MAX_PLOT_POINTS points
+def mood_scores(journal):
+    import numpy as np
+    import pandas as pd
+    counts = daily_counts(journal)
+    span_days = (counts.index[-1] - counts.index[0]).days + 1
+    if span_days <= MAX_PLOT_POINTS:
+        freq, label = "D", "daily"
+    elif span_days <= MAX_PLOT_POINTS * 7:
+        freq, label = "W", "weekly"
+    else:
+        freq, label = "MS", "monthly"
+    buckets = counts.resample(freq).sum()
+    totals = buckets.sum(axis=1)
+    buckets = buckets[totals > 0]
+    scores = pd.DataFrame(index=buckets.index)
+    scores["Mood score"] = buckets.to_numpy() @ np.array(MOOD_SCORES) / totals[totals > 0].to_numpy()
+    scores["Rolling average"] = scores["Mood score"].rolling(ROLLING_WINDOW, min_periods=1).mean()
+    return scores, label
+
+# Mood trend figure for the journal
+def mood_trend_figure(journal):
+    import plotly.express as px
+    if journal_size(journal) <= MAX_RAW_POINTS:
+        df = journal_frame(journal)
+        with _plot_lock:
+            return px.line(df, x="timestamp", y="mood", title="Mood Trends Over Time", markers=True)
+    scores, label = mood_scores(journal)
+    with _plot_lock:
+        fig = px.line(scores, y=["Mood score", "Rolling average"], markers=True,
+                      title=f"Mood Trends Over Time ({label} average)")
+    fig.update_layout(xaxis_title="Date", yaxis_title="Mood score (-2 sad to 2 happy)", legend_title_text="")
+    return fig
@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from remote_store import STORE_URL, RemoteOutboxStore
+
+# Durable email outbox.
+#
+# Handlers enqueue messages and return immediately. A background worker claims
+# due messages, sends them concurrently through the transport and retries
+# failures with exponential backoff. A claimed message is leased, so one left
+# in "sending" by a crashed worker is picked up again when the lease expires.
+# Messages live in an OutboxStore (a SQLite table, or the network store), so
+# the workers of several replicas can drain one outbox without double sends.
+
+OUTBOX_DB_PATH = os.getenv("HEALORA_OUTBOX_DB", "healora_outbox.db")
+OUTBOX_WORKERS = int(os.getenv("HEALORA_OUTBOX_WORKERS", "4"))
+MAX_ATTEMPTS = 6
+BASE_RETRY_DELAY = 2.0
+MAX_RETRY_DELAY = 300.0
+SEND_LEASE = 60.0
+POLL_INTERVAL = 1.0
+
+logger = logging.getLogger("healora")
+
+# Client errors other than rate limiting will not succeed on retry
+def is_permanent_error(error):
+    status = getattr(getattr(error, "resp", None), "status", None)
+    try:
+        status = int(status)
+    except (TypeError, ValueError):
+        return False
+    return 400 <= status < 500 and status != 429
+
+def retry_delay(attempts):
+    delay = min(MAX_RETRY_DELAY, BASE_RETRY_DELAY * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+# SQLite table of outbox messages; claims are atomic across processes sharing the file
+class OutboxStore:
+    def __init__(self, path=OUTBOX_DB_PATH):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, recipient TEXT NOT NULL, subject TEXT NOT NULL, "
+                "message TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, "
+                "next_attempt REAL NOT NULL, last_error TEXT, created REAL NOT NULL, sent REAL, "
+                "priority INTEGER NOT NULL DEFAULT 0)"
+            )
+            # Outboxes created before messages had a priority
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(outbox)")]
+            if "priority" not in columns:
+                self.conn.execute("ALTER TABLE outbox ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt)")
+
+    # Adds (recipient, subject, serialized message) rows; returns their IDs
+    def add(self, rows, now, priority=0):
+        with self.lock, self.conn:
+            return [
+                self.conn.execute(
+                    "INSERT INTO outbox (recipient, subject, message, next_attempt, created, priority) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (recipient, subject, message, now, now, priority)
+                ).lastrowid
+                for recipient, subject, message in rows
+            ]
+
+    # Leases up to limit due messages, higher priority first; returns [id, serialized message, attempts] rows
+    def claim(self, limit, now):
+        with self.lock, self.conn:
+            # Take the write lock first so two processes cannot claim the same rows
+            self.conn.execute("BEGIN IMMEDIATE")
+            rows = self.conn.execute(
+                "SELECT id, message, attempts FROM outbox "
+                "WHERE status IN ('pending', 'sending') AND next_attempt <= ? ORDER BY priority DESC, next_attempt LIMIT ?",
+                (now, limit)
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE outbox SET status = 'sending', next_attempt = ? WHERE id = ?",
+                [(now + SEND_LEASE, row[0]) for row in rows]
+            )
+        return [list(row) for row in rows]
+
+    # Records one send attempt; returns the outcome: "sent", "failed" or "retry"
+    def record(self, message_id, attempts, error, permanent, max_attempts, now):
+        with self.lock, self.conn:
+            if error is None:
+                outcome = "sent"
+                self.conn.execute(
+                    "UPDATE outbox SET status = 'sent', attempts = ?, last_error = NULL, sent = ? WHERE id = ?",
+                    (attempts, now, message_id)
+                )
+            elif permanent or attempts >= max_attempts:
+                outcome = "failed"
+                self.conn.execute(
+                    "UPDATE outbox SET status = 'failed', attempts = ?, last_error = ? WHERE id = ?",
+                    (attempts, error, message_id)
+                )
+            else:
+                outcome = "retry"
+                self.conn.execute(
+                    "UPDATE outbox SET status = 'pending', attempts = ?, last_error = ?, next_attempt = ? WHERE id = ?",
+                    (attempts, error, now + retry_delay(attempts), message_id)
+                )
+        return outcome
+
+    def status(self, message_ids):
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT id, status FROM outbox WHERE id IN ({','.join('?' * len(message_ids))})", message_ids
+            ).fetchall()
+        return dict(rows)
+
+    def stats(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return dict(rows)
+
+# Outbox storage configured by HEALORA_STORE_URL or HEALORA_OUTBOX_DB
+def create_outbox_store(path=OUTBOX_DB_PATH, url=STORE_URL):
+    return RemoteOutboxStore(url) if url else OutboxStore(path)
+
+class Outbox:
+    def __init__(self, transport, store=None, workers=OUTBOX_WORKERS, max_attempts=MAX_ATTEMPTS, clock=time.time):
+        self.transport = transport
+        self.store = store if store is not None else create_outbox_store()
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = None
+
+    # Queue messages built by create_message; returns their outbox IDs.
+    # Due messages of a higher priority are sent first.
+    def enqueue(self, messages, priority=0):
+        rows = [(recipient, subject, json.dumps(message)) for recipient, subject, message in messages]
+        ids = self.store.add(rows, self.clock(), priority)
+        self.start()
+        self.wakeup.set()
+        return ids
+
+    def _send(self, row):
+        message_id, message, attempts = row
+        try:
+            with metrics.email_send_seconds.time("outbox"):
+                self.transport.send(json.loads(message))
+            return message_id, attempts + 1, None, False
+        except Exception as e:
+            logger.warning("outbox send %d failed (attempt %d): %s", message_id, attempts + 1, e)
+            return message_id, attempts + 1, str(e), is_permanent_error(e)
+
+    def _record(self, message_id, attempts, error, permanent):
+        outcome = self.store.record(message_id, attempts, error, permanent, self.max_attempts, self.clock())
+        metrics.emails.inc(outcome)
+
+    # Send every due message once; returns the number of messages attempted
+    def drain_once(self, executor=None):
+        rows = self.store.claim(self.workers * 8, self.clock())
+        if not rows:
+            return 0
+        if executor is None:
+            results = [self._send(row) for row in rows]
+        else:
+            results = executor.map(self._send, rows)
+        for result in results:
+            self._record(*result)
+        return len(rows)
+
+    def _run(self):
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="outbox") as executor:
+            while not self.stopping.is_set():
+                if self.drain_once(executor):
+                    continue
+                self.wakeup.wait(POLL_INTERVAL)
+                self.wakeup.clear()
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="outbox-worker", daemon=True)
+                self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def status(self, message_ids):
+        return self.store.status(message_ids)
+
+    def stats(self):
+        return self.store.stats()
@@ -0,0 +1,61 @@
+from context_window import estimate_tokens
+
+# Prompt and resource text, built once at startup.
+#
+# The instructions that only depend on the conversation style and region go
+# into the model's system instruction, one per (tone, region) pair, so a turn
+# only formats the user message, its detected language and the conversation
+# context. The resource markdown for the chat footer and the emergency button
+# is joined once per region.
+
+TONE_INSTRUCTIONS = {
+    "Calm": "Respond in a soothing, gentle tone to promote relaxation.",
+    "Motivational": "Use an uplifting, encouraging tone to inspire confidence.",
+    "Neutral": "Maintain a balanced, empathetic tone."
+}
+DEFAULT_TONE = "Neutral"
+DEFAULT_REGION = "Global"
+
+SYSTEM_TEMPLATE = (
+    "You are Healora, a compassionate mental health support chatbot. "
+    "Engage in a supportive conversation with the user based on their input.\n"
+    "- Provide empathetic, sensitive responses in the user's language.\n"
+    "- {tone}\n"
+    "- If signs of distress are detected, suggest coping strategies relevant to their mood or input.\n"
+    "- Recommend professional resources tailored to the user's region ({region}).\n"
+    "- Keep responses concise, warm, and encouraging."
+)
+
+class PromptTemplates:
+    def __init__(self, regional_resources, tones=TONE_INSTRUCTIONS):
+        self.system = {
+            (tone, region): SYSTEM_TEMPLATE.format(tone=instruction, region=region)
+            for tone, instruction in tones.items()
+            for region in regional_resources
+        }
+        self.resources = {
+            region: "\n\n**Recommended Resources**:\n" + "\n".join(lines)
+            for region, lines in regional_resources.items()
+        }
+        self.emergency = {
+            region: f"**Crisis Support ({region})**:\n" + "\n".join(lines)
+            for region, lines in regional_resources.items()
+        }
+        self.system_tokens = {key: estimate_tokens(text) for key, text in self.system.items()}
+
+    # (tone, region) key with unknown values mapped to the defaults
+    def key(self, conversation_mode, region):
+        tone = conversation_mode if conversation_mode in TONE_INSTRUCTIONS else DEFAULT_TONE
+        return tone, region if region in self.resources else DEFAULT_REGION
+
+    def resources_markdown(self, region):
+        return self.resources.get(region, self.resources[DEFAULT_REGION])
+
+    def emergency_markdown(self, region):
+        return self.emergency.get(region, self.emergency[DEFAULT_REGION])
+
+    # Per-turn part of the prompt; mood is the mood the user selected, if any
+    def user_prompt(self, message, lang, context="", mood=None):
+        context_block = f"{context}\n" if context else ""
+        mood_line = f"User's mood (selected): {mood}\n" if mood else ""
+        return f"{context_block}User's language (detected): {lang}\n{mood_line}User message: {message}"
@@ -0,0 +1,136 @@
+import http.client
+import json
+import os
+import threading
+from urllib.parse import urlsplit
+
+# Client side of the network store shared by every replica.
+#
+# Set HEALORA_STORE_URL (e.g. http://store:8765) and sessions, booked slots and
+# the email outbox are kept in the store instead of local SQLite files, so any
+# replica behind a load balancer can serve any session. Each call is one JSON
+# POST to /<namespace>/<method>; store_server.py serves the same API from
+# local SQLite files and stands in for the store in development and tests.
+
+STORE_URL = os.getenv("HEALORA_STORE_URL")
+STORE_TIMEOUT = float(os.getenv("HEALORA_STORE_TIMEOUT", "10"))
+
+class StoreError(Exception):
+    pass
+
+# One keep-alive connection per thread
+class StoreClient:
+    def __init__(self, url, timeout=STORE_TIMEOUT):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def call(self, namespace, method, *args):
+        body = json.dumps({"args": args})
+        while True:
+            conn = getattr(self.local, "conn", None)
+            reused = conn is not None
+            if conn is None:
+                conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                conn.request("POST", f"{self.prefix}/{namespace}/{method}", body, {"Content-Type": "application/json"})
+                response = conn.getresponse()
+                payload = json.loads(response.read())
+                break
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                self.local.conn = None
+                # An idle connection the server already closed is retried once on a new one
+                if not (reused and isinstance(e, (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError))):
+                    raise StoreError(f"{namespace}.{method} failed: {e}") from e
+        if response.status != 200:
+            raise StoreError(f"{namespace}.{method} failed: {payload.get('error')}")
+        return payload["result"]
+
+# session_store backend kept in the network store
+class RemoteSessionBackend:
+    def __init__(self, url):
+        self.client = StoreClient(url)
+
+    def read_session(self, session_id):
+        return tuple(self.client.call("sessions", "read_session", session_id))
+
+    def session_version(self, session_id):
+        return self.client.call("sessions", "session_version", session_id)
+
+    def write_session(self, session_id, payload):
+        return self.client.call("sessions", "write_session", session_id, payload)
+
+    def read_conversation(self, session_id, conversation_id):
+        return self.client.call("sessions", "read_conversation", session_id, conversation_id)
+
+    def write_conversation(self, session_id, conversation_id, history):
+        self.client.call("sessions", "write_conversation", session_id, conversation_id, history)
+
+    def delete_conversations(self, session_id, conversation_ids):
+        self.client.call("sessions", "delete_conversations", session_id, conversation_ids)
+
+    def index_turn(self, session_id, conversation_id, turn, text):
+        self.client.call("sessions", "index_turn", session_id, conversation_id, turn, text)
+
+    def search(self, session_id, query):
+        return self.client.call("sessions", "search", session_id, query)
+
+# availability.SlotIndex kept in the network store
+class RemoteSlotIndex:
+    def __init__(self, url):
+        self.client = StoreClient(url)
+
+    def reserve(self, therapist, date, time_slot, session_id):
+        return self.client.call("slots", "reserve", therapist, date, time_slot, session_id)
+
+    def release(self, therapist, date, time_slot, session_id):
+        return self.client.call("slots", "release", therapist, date, time_slot, session_id)
+
+    def booked_times(self, therapist, date):
+        return set(self.client.call("slots", "booked_times", therapist, date))
+
+    def free_times(self, therapist, date, time_slots):
+        booked = self.booked_times(therapist, date)
+        return [time_slot for time_slot in time_slots if time_slot not in booked]
+
+# outbox.OutboxStore kept in the network store
+class RemoteOutboxStore:
+    def __init__(self, url):
+        self.client = StoreClient(url)
+
+    def add(self, rows, now, priority=0):
+        return self.client.call("outbox", "add", rows, now, priority)
+
+    def claim(self, limit, now):
+        return self.client.call("outbox", "claim", limit, now)
+
+    def record(self, message_id, attempts, error, permanent, max_attempts, now):
+        return self.client.call("outbox", "record", message_id, attempts, error, permanent, max_attempts, now)
+
+    def status(self, message_ids):
+        # JSON object keys are strings
+        return {int(message_id): status for message_id, status in self.client.call("outbox", "status", message_ids).items()}
+
+    def stats(self):
+        return self.client.call("outbox", "stats")
+
+# mood_aggregates.MoodAggregates kept in the network store
+class RemoteMoodAggregates:
+    def __init__(self, url):
+        self.client = StoreClient(url)
+
+    def record_mood(self, day, region, mood, follow_up=None):
+        return self.client.call("aggregates", "record_mood", day, region, mood, follow_up)
+
+    def record_strategy(self, mood, strategy):
+        return self.client.call("aggregates", "record_strategy", mood, strategy)
+
+    def daily(self, first_day):
+        return self.client.call("aggregates", "daily", first_day)
+
+    def coping(self):
+        return self.client.call("aggregates", "coping")
@@ -0,0 +1,82 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Cache of model replies for common messages, keyed on the normalized message,
+# detected language, conversation tone and region. Entries expire after a TTL
+# and the least recently used entry is evicted when the cache is full.
+
+RESPONSE_CACHE_ENABLED = os.getenv("HEALORA_RESPONSE_CACHE", "0") == "1"
+RESPONSE_CACHE_SIZE = int(os.getenv("HEALORA_RESPONSE_CACHE_SIZE", "1000"))
+RESPONSE_CACHE_TTL = float(os.getenv("HEALORA_RESPONSE_CACHE_TTL", "3600"))
+
+# Longer messages are unlikely to repeat, so they are never cached
+MAX_CACHEABLE_LENGTH = 200
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+# Lowercase, drop punctuation and collapse whitespace ("I'm  Stressed!" -> "im stressed")
+def normalize_message(message):
+    message = message.lower().replace("’", "'")
+    return _SPACES.sub(" ", _NON_WORD.sub("", message)).strip()
+
+class ResponseCache:
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def key(self, message, lang, tone, region):
+        normalized = normalize_message(message)
+        if not normalized or len(normalized) > MAX_CACHEABLE_LENGTH:
+            return None
+        return (normalized, lang, tone, region)
+
+    def get(self, key):
+        if key is None:
+            with self.lock:
+                self.bypassed += 1
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, text):
+        if key is None:
+            return
+        with self.lock:
+            self.entries[key] = (self.clock() + self.ttl, text)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    # Count a lookup that was skipped on purpose (e.g. a distress message)
+    def skip(self):
+        with self.lock:
+            self.bypassed += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "size": len(self.entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
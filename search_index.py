@@ -0,0 +1,116 @@
+import re
+import threading
+
+# Full-text search over a user's conversations.
+#
+# Every completed turn is indexed as one document keyed by (session ID,
+# conversation ID, turn). The SQLite session backend keeps the documents in an
+# FTS5 table; InvertedIndex is the in-process equivalent used by the memory
+# backend and by SQLite builds without FTS5. Queries match documents that
+# contain every query word, the last one as a prefix; the most recent
+# conversations come first.
+
+MAX_RESULTS = 10
+SNIPPET_WORDS = 12
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+def tokenize(text):
+    return _WORD.findall(text.lower())
+
+# FTS5 MATCH expression narrowing the documents to one session's. It is a
+# phrase match on the tokenized session ID, so it also matches IDs with the
+# same words in a row ("api-foo" matches "api-foo-bar"); queries must also
+# compare session_id exactly.
+def fts_session(session_id):
+    return 'session_id : "' + session_id.replace('"', '""') + '"'
+
+# FTS5 MATCH expression for a user query, restricted to one session;
+# every word is quoted so user input cannot inject FTS operators
+def fts_query(session_id, query):
+    words = tokenize(query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words[:-1]] + [f'"{words[-1]}"*']
+    return fts_session(session_id) + " AND " + " AND ".join(terms)
+
+# Matches any word starting with one of the query words
+def highlight_pattern(words):
+    return re.compile(r"\b(?:" + "|".join(map(re.escape, words)) + r")\w*", re.IGNORECASE)
+
+# Words around the first match, with the matching words in bold
+def make_snippet(text, pattern, size=SNIPPET_WORDS):
+    tokens = text.split()
+    first = pattern.search(text)
+    start = max(0, len(text[:first.start()].split()) - size // 2) if first else 0
+    shown = pattern.sub(lambda match: f"**{match.group(0)}**", " ".join(tokens[start:start + size]))
+    return ("…" if start else "") + shown + ("…" if start + size < len(tokens) else "")
+
+# [conversation ID, snippet] for the first match per conversation, in the
+# order the (conversation ID, text) matches were ranked
+def best_per_conversation(matches, words, limit=MAX_RESULTS):
+    results = {}
+    for conversation_id, text in matches:
+        if conversation_id not in results:
+            results[conversation_id] = text
+            if len(results) == limit:
+                break
+    pattern = highlight_pattern(words)
+    return [[conversation_id, make_snippet(text, pattern)] for conversation_id, text in results.items()]
+
+class InvertedIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # word -> set of document keys; document key -> text
+        self.postings = {}
+        self.documents = {}
+        # session ID -> document keys, and session ID -> {word: documents using it}
+        self.by_session = {}
+        self.vocabulary = {}
+
+    def add(self, session_id, conversation_id, turn, text):
+        key = (session_id, conversation_id, turn)
+        with self.lock:
+            if key in self.documents:
+                self._remove(key)
+            self.documents[key] = text
+            self.by_session.setdefault(session_id, set()).add(key)
+            vocabulary = self.vocabulary.setdefault(session_id, {})
+            for word in set(tokenize(text)):
+                self.postings.setdefault(word, set()).add(key)
+                vocabulary[word] = vocabulary.get(word, 0) + 1
+
+    def _remove(self, key):
+        vocabulary = self.vocabulary[key[0]]
+        for word in set(tokenize(self.documents.pop(key))):
+            keys = self.postings[word]
+            keys.discard(key)
+            if not keys:
+                del self.postings[word]
+            vocabulary[word] -= 1
+            if not vocabulary[word]:
+                del vocabulary[word]
+        self.by_session[key[0]].discard(key)
+
+    def delete(self, session_id, conversation_ids):
+        conversation_ids = set(conversation_ids)
+        with self.lock:
+            for key in [key for key in self.by_session.get(session_id, ()) if key[1] in conversation_ids]:
+                self._remove(key)
+
+    # [conversation ID, snippet] pairs, most recent conversation first
+    def search(self, session_id, query, limit=MAX_RESULTS):
+        words = tokenize(query)
+        if not words:
+            return []
+        with self.lock:
+            candidates = set(self.by_session.get(session_id, ()))
+            for word in words[:-1]:
+                candidates &= self.postings.get(word, set())
+            # The last word matches any word in the session's vocabulary it is a prefix of
+            prefixed = set()
+            for word in self.vocabulary.get(session_id, ()):
+                if word.startswith(words[-1]):
+                    prefixed |= candidates & self.postings[word]
+            matches = sorted(prefixed, key=lambda key: (-key[1], -key[2]))
+            return best_per_conversation(((key[1], self.documents[key]) for key in matches), words, limit)
@@ -0,0 +1,350 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import metrics
+from chat_history import ensure_chat_history, ensure_history, history_length, last_turn, new_history, trim_history, turns
+from context_window import new_context_summary, strip_footer
+from mood_analytics import new_mood_journal
+from remote_store import STORE_URL, RemoteSessionBackend
+from search_index import InvertedIndex, best_per_conversation, fts_query, fts_session, tokenize
+
+# Session storage for user data that used to live in gr.State.
+#
+# SessionStore keeps recently used sessions in an in-memory LRU tier and writes
+# them through to a backend keyed by session ID. Archived conversations are
+# stored separately and only loaded when a user opens one. Each completed turn
+# is added to a full-text index as it happens (see search_index.py).
+#
+# Every write bumps the session's version in the backend. A cached session is
+# used only while its version still matches, so when several replicas share a
+# backend (a SQLite file on one node, or the network store) any of them can
+# serve any session. Concurrent writes to one session are last-writer-wins.
+
+SESSION_DB_PATH = os.getenv("HEALORA_SESSION_DB", "healora_sessions.db")
+SESSION_CACHE_SIZE = int(os.getenv("HEALORA_SESSION_CACHE_SIZE", "1000"))
+
+logger = logging.getLogger("healora")
+
+# Per-session size caps; the oldest entries are dropped first.
+# The mood journal caps itself (see mood_analytics.MAX_JOURNAL_ENTRIES).
+SESSION_LIMITS = {
+    "chat_history": 500,
+    "conversation_archive": 100,
+    "appointments": 200
+}
+
+# Dropdown label of an archived conversation
+def conversation_label(conversation_id, timestamp):
+    return f"Conversation {conversation_id} ({timestamp})"
+
+# Indexed text of a turn: the user message and the reply without its footer
+def turn_text(user_msg, bot_msg):
+    return f"{user_msg}\n{strip_footer(bot_msg or '')}".strip()
+
+# Empty session record
+def new_session_data():
+    return {
+        "chat_history": new_history(),
+        "context_summary": new_context_summary(),
+        "conversation_archive": [],
+        "current_conversation_id": 0,
+        "mood_journal": new_mood_journal(),
+        "appointments": []
+    }
+
+# SQLite backend: one row per session plus one row per archived conversation,
+# and one FTS5 row per indexed turn
+class SQLiteBackend:
+    def __init__(self, path=SESSION_DB_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, data TEXT NOT NULL, version INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(sessions)")]
+            if "version" not in columns:
+                self.conn.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            try:
+                self.conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS conversation_fts USING fts5("
+                    "session_id, conversation_id UNINDEXED, turn UNINDEXED, text, "
+                    "tokenize = 'unicode61 remove_diacritics 2')"
+                )
+                self.index = None
+            except sqlite3.OperationalError:
+                # SQLite built without FTS5: turns are indexed in memory for this process only
+                logger.warning("SQLite has no FTS5; conversation search covers this process only")
+                self.index = InvertedIndex()
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS conversations ("
+                "session_id TEXT NOT NULL, conversation_id INTEGER NOT NULL, history TEXT NOT NULL, "
+                "PRIMARY KEY (session_id, conversation_id))"
+            )
+
+    # Serialized session and its version, or (None, 0)
+    def read_session(self, session_id):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT data, version FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return (row[0], row[1]) if row else (None, 0)
+
+    def session_version(self, session_id):
+        with self.lock:
+            row = self.conn.execute("SELECT version FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return row[0] if row else 0
+
+    # Stores a serialized session; returns its new version
+    def write_session(self, session_id, payload):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO sessions (session_id, data, version) VALUES (?, ?, 1) "
+                "ON CONFLICT(session_id) DO UPDATE SET data = excluded.data, version = version + 1",
+                (session_id, payload)
+            )
+            return self.conn.execute("SELECT version FROM sessions WHERE session_id = ?", (session_id,)).fetchone()[0]
+
+    def read_conversation(self, session_id, conversation_id):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT history FROM conversations WHERE session_id = ? AND conversation_id = ?",
+                (session_id, conversation_id)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def write_conversation(self, session_id, conversation_id, history):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO conversations (session_id, conversation_id, history) VALUES (?, ?, ?)",
+                (session_id, conversation_id, json.dumps(history))
+            )
+
+    # Deletes the stored histories and the indexed turns of the conversations
+    def delete_conversations(self, session_id, conversation_ids):
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "DELETE FROM conversations WHERE session_id = ? AND conversation_id = ?",
+                [(session_id, conversation_id) for conversation_id in conversation_ids]
+            )
+            if self.index is None:
+                self.conn.executemany(
+                    "DELETE FROM conversation_fts WHERE rowid IN "
+                    "(SELECT rowid FROM conversation_fts WHERE conversation_fts MATCH ?) "
+                    "AND session_id = ? AND conversation_id = ?",
+                    [(fts_session(session_id), session_id, conversation_id) for conversation_id in conversation_ids]
+                )
+        if self.index is not None:
+            self.index.delete(session_id, conversation_ids)
+
+    def index_turn(self, session_id, conversation_id, turn, text):
+        if self.index is not None:
+            self.index.add(session_id, conversation_id, turn, text)
+            return
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO conversation_fts (session_id, conversation_id, turn, text) VALUES (?, ?, ?, ?)",
+                (session_id, conversation_id, turn, text)
+            )
+
+    # [conversation ID, snippet] pairs for the best matches, one per conversation
+    def search(self, session_id, query):
+        if self.index is not None:
+            return self.index.search(session_id, query)
+        match = fts_query(session_id, query)
+        if match is None:
+            return []
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT conversation_id, text FROM conversation_fts WHERE conversation_fts MATCH ? AND session_id = ? "
+                "ORDER BY rowid DESC",
+                (match, session_id)
+            )
+            return best_per_conversation(rows, tokenize(query))
+
+# In-process backend, used when HEALORA_SESSION_DB is set to ":memory:"
+class MemoryBackend:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.conversations = {}
+        self.index = InvertedIndex()
+
+    def read_session(self, session_id):
+        return self.sessions.get(session_id, (None, 0))
+
+    def session_version(self, session_id):
+        return self.sessions.get(session_id, (None, 0))[1]
+
+    def write_session(self, session_id, payload):
+        with self.lock:
+            version = self.session_version(session_id) + 1
+            self.sessions[session_id] = (payload, version)
+        return version
+
+    def read_conversation(self, session_id, conversation_id):
+        data = self.conversations.get((session_id, conversation_id))
+        return json.loads(data) if data else None
+
+    def write_conversation(self, session_id, conversation_id, history):
+        self.conversations[(session_id, conversation_id)] = json.dumps(history)
+
+    def delete_conversations(self, session_id, conversation_ids):
+        for conversation_id in conversation_ids:
+            self.conversations.pop((session_id, conversation_id), None)
+        self.index.delete(session_id, conversation_ids)
+
+    def index_turn(self, session_id, conversation_id, turn, text):
+        self.index.add(session_id, conversation_id, turn, text)
+
+    def search(self, session_id, query):
+        return self.index.search(session_id, query)
+
+# LRU in-memory tier in front of a backend
+class SessionStore:
+    def __init__(self, backend, cache_size=SESSION_CACHE_SIZE, limits=SESSION_LIMITS):
+        self.backend = backend
+        self.cache_size = cache_size
+        self.limits = limits
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, session_id):
+        with self.lock:
+            cached = self.cache.get(session_id)
+        if cached is not None and cached[1] == self.backend.session_version(session_id):
+            with self.lock:
+                if session_id in self.cache:
+                    self.cache.move_to_end(session_id)
+            return cached[0]
+        payload, version = self.backend.read_session(session_id)
+        data = json.loads(payload) if payload else new_session_data()
+        ensure_chat_history(data)
+        with self.lock:
+            # Another thread may have loaded the same version meanwhile
+            cached = self.cache.get(session_id)
+            if cached is None or cached[1] != version:
+                cached = (data, version)
+            self._remember(session_id, cached)
+        return cached[0]
+
+    # Cache a (data, version) entry, evicting the least recently used (lock held)
+    def _remember(self, session_id, entry):
+        self.cache[session_id] = entry
+        self.cache.move_to_end(session_id)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def save(self, session_id, data):
+        for key, limit in self.limits.items():
+            entries = data.get(key)
+            if key == "chat_history":
+                if entries is not None and history_length(entries) > limit:
+                    if "context_summary" in data:
+                        # Keep the count of summarized turns aligned with the trimmed history
+                        summary = data["context_summary"]
+                        summary["turns"] = max(0, summary["turns"] - (history_length(entries) - limit))
+                    trim_history(entries, limit)
+            elif entries is not None and len(entries) > limit:
+                if key == "conversation_archive":
+                    self.backend.delete_conversations(session_id, [conv["id"] for conv in entries[:-limit]])
+                del entries[:-limit]
+        payload = json.dumps(data)
+        metrics.session_bytes.observe(len(payload))
+        version = self.backend.write_session(session_id, payload)
+        with self.lock:
+            self._remember(session_id, (data, version))
+
+    # Index the latest turn of the current conversation
+    def index_turn(self, session_id, data):
+        history = data["chat_history"]
+        user_msg, bot_msg, _ = last_turn(history)
+        self.backend.index_turn(session_id, data["current_conversation_id"], history_length(history) - 1,
+                                turn_text(user_msg, bot_msg))
+
+    def _index_history(self, session_id, conversation_id, history):
+        for turn, (user_msg, bot_msg, _) in enumerate(turns(history)):
+            self.backend.index_turn(session_id, conversation_id, turn, turn_text(user_msg, bot_msg))
+
+    # Empty the current conversation and drop its indexed turns
+    def clear_conversation(self, session_id, data):
+        data["chat_history"] = new_history()
+        data["context_summary"] = new_context_summary()
+        self.backend.delete_conversations(session_id, [data["current_conversation_id"]])
+        self.save(session_id, data)
+
+    def search(self, session_id, query):
+        return self.backend.search(session_id, query)
+
+    # Move the current chat into the archive, keeping only its metadata resident
+    def archive_conversation(self, session_id, data, timestamp):
+        conversation_id = data["current_conversation_id"]
+        self.backend.write_conversation(session_id, conversation_id, data["chat_history"])
+        data["conversation_archive"].append({
+            "id": conversation_id,
+            "timestamp": timestamp,
+            "label": conversation_label(conversation_id, timestamp)
+        })
+        data["current_conversation_id"] += 1
+        data["chat_history"] = new_history()
+        data["context_summary"] = new_context_summary()
+        self.save(session_id, data)
+
+    def load_conversation(self, session_id, conversation_id):
+        return ensure_history(self.backend.read_conversation(session_id, conversation_id) or [])
+
+    # Write (timestamp, history) pairs, e.g. from an import, as conversations
+    # under new IDs after the current conversation's; returns their archive
+    # entries for replace_archive. The session is not changed, and if reading
+    # the pairs fails the conversations written so far are deleted again.
+    def stage_archive(self, session_id, data, conversations):
+        archive = []
+        conversation_id = data["current_conversation_id"] + 1
+        try:
+            for timestamp, history in conversations:
+                self.backend.write_conversation(session_id, conversation_id, history)
+                self._index_history(session_id, conversation_id, history)
+                archive.append({
+                    "id": conversation_id,
+                    "timestamp": timestamp,
+                    "label": conversation_label(conversation_id, timestamp)
+                })
+                conversation_id += 1
+        except BaseException:
+            self.backend.delete_conversations(session_id, list(range(data["current_conversation_id"] + 1,
+                                                                     conversation_id + 1)))
+            raise
+        return archive
+
+    # Delete conversations written by stage_archive that will not be used
+    def discard_archive(self, session_id, archive):
+        self.backend.delete_conversations(session_id, [conv["id"] for conv in archive])
+
+    # Replace the archive with entries from stage_archive and save the session.
+    # The current conversation moves after them and is indexed again under its
+    # new ID; the replaced conversations are deleted once the session is saved.
+    def replace_archive(self, session_id, data, archive):
+        replaced = [conv["id"] for conv in data["conversation_archive"]] + [data["current_conversation_id"]]
+        conversation_id = (archive[-1]["id"] if archive else data["current_conversation_id"]) + 1
+        data["conversation_archive"] = archive
+        data["current_conversation_id"] = conversation_id
+        self._index_history(session_id, conversation_id, data["chat_history"])
+        self.save(session_id, data)
+        self.backend.delete_conversations(session_id, replaced)
+
+# Build the store configured by HEALORA_STORE_URL or HEALORA_SESSION_DB
+def create_session_store(path=SESSION_DB_PATH, url=STORE_URL):
+    if url:
+        backend = RemoteSessionBackend(url)
+    elif path == ":memory:":
+        backend = MemoryBackend()
+    else:
+        backend = SQLiteBackend(path)
+    return SessionStore(backend)
@@ -0,0 +1,98 @@
+import argparse
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from availability import SlotIndex
+from mood_aggregates import MoodAggregates
+from outbox import OutboxStore
+from session_store import SQLiteBackend
+
+# Stand-in for the network store (see remote_store.py).
+#
+# Serves the session, slot, outbox and mood aggregate stores from SQLite files in one
+# directory. Run one instance and point every replica at it:
+#
+#   python store_server.py --port 8765 --dir /var/lib/healora
+#   HEALORA_STORE_URL=http://127.0.0.1:8765 python app.py
+
+# Methods callable per namespace
+EXPOSED = {
+    "sessions": {"read_session", "session_version", "write_session", "read_conversation",
+                 "write_conversation", "delete_conversations", "index_turn", "search"},
+    "slots": {"reserve", "release", "booked_times"},
+    "outbox": {"add", "claim", "record", "status", "stats"},
+    "aggregates": {"record_mood", "record_strategy", "daily", "coping"}
+}
+
+class StoreRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+
+    def _reply(self, status, body):
+        payload = json.dumps(body, default=list).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._reply(200, {"result": "ok"})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        namespace, _, method = self.path.strip("/").partition("/")
+        if method not in EXPOSED.get(namespace, ()):
+            self._reply(404, {"error": f"unknown method {namespace}.{method}"})
+            return
+        try:
+            result = getattr(self.server.targets[namespace], method)(*json.loads(body)["args"])
+        except Exception as e:
+            self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        self._reply(200, {"result": result})
+
+    def log_message(self, format, *args):
+        pass
+
+class StoreServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, directory):
+        super().__init__(address, StoreRequestHandler)
+        self.targets = {
+            "sessions": SQLiteBackend(os.path.join(directory, "sessions.db")),
+            "slots": SlotIndex(os.path.join(directory, "slots.db")),
+            "outbox": OutboxStore(os.path.join(directory, "outbox.db")),
+            "aggregates": MoodAggregates(os.path.join(directory, "aggregates.db"))
+        }
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+# Serve in a background thread; port 0 picks a free port (see server.url)
+def start_store_server(directory, host="127.0.0.1", port=0):
+    server = StoreServer((host, port), directory)
+    threading.Thread(target=server.serve_forever, name="store-server", daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--dir", default=".")
+    args = parser.parse_args()
+    server = StoreServer((args.host, args.port), args.dir)
+    print(f"Healora store listening on {server.url}")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admission import ModelGate, Overloaded
+from fakes import FakeGenerativeModel
+
+def gate(**kwargs):
+    return ModelGate(**{"rpm": 0, "concurrency": 1, "queue_size": 100, **kwargs})
+
+# Let queued coroutines run up to their next wait
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_waiting_sessions_are_served_round_robin():
+    async def run():
+        model_gate = gate()
+        model = FakeGenerativeModel()
+        order = []
+
+        async def request(session_id):
+            await model_gate.acquire_async(session_id, 5)
+            try:
+                await model.generate_content_async("hi")
+                order.append(session_id)
+            finally:
+                model_gate.release()
+
+        await model_gate.acquire_async("holder", 0)
+        tasks = []
+        for session_id in ["a", "a", "b", "b", "c"]:
+            tasks.append(asyncio.create_task(request(session_id)))
+            await settle()
+        assert model_gate.stats() == {"in_flight": 1, "waiting": 5, "sessions_waiting": 3}
+        model_gate.release()
+        await asyncio.gather(*tasks)
+        return order, model_gate.stats()
+
+    order, stats = asyncio.run(run())
+    assert order == ["a", "b", "c", "a", "b"]
+    assert stats == {"in_flight": 0, "waiting": 0, "sessions_waiting": 0}
+
+def test_full_queue_is_turned_away():
+    async def run():
+        model_gate = gate(queue_size=1)
+        await model_gate.acquire_async("holder", 0)
+        waiter = asyncio.create_task(model_gate.acquire_async("a", 5))
+        await settle()
+        with pytest.raises(Overloaded):
+            await model_gate.acquire_async("b", 5)
+        model_gate.release()
+        await waiter
+        model_gate.release()
+        return model_gate.stats()
+
+    assert asyncio.run(run()) == {"in_flight": 0, "waiting": 0, "sessions_waiting": 0}
+
+def test_session_over_its_share_of_the_queue_is_turned_away():
+    async def run():
+        model_gate = gate(per_session=1)
+        await model_gate.acquire_async("holder", 0)
+        waiter = asyncio.create_task(model_gate.acquire_async("a", 5))
+        await settle()
+        with pytest.raises(Overloaded):
+            await model_gate.acquire_async("a", 5)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        model_gate.release()
+        return model_gate.stats()
+
+    assert asyncio.run(run()) == {"in_flight": 0, "waiting": 0, "sessions_waiting": 0}
+
+def test_wait_past_the_timeout_is_turned_away():
+    async def run():
+        model_gate = gate()
+        await model_gate.acquire_async("holder", 0)
+        with pytest.raises(Overloaded):
+            await model_gate.acquire_async("a", 0)
+        with pytest.raises(Overloaded):
+            await model_gate.acquire_async("a", 0.05)
+        stats = model_gate.stats()
+        model_gate.release()
+        return stats, model_gate.stats()
+
+    waiting, released = asyncio.run(run())
+    assert waiting == {"in_flight": 1, "waiting": 0, "sessions_waiting": 0}
+    assert released["in_flight"] == 0
+
+def test_sync_wait_past_the_timeout_is_turned_away():
+    model_gate = gate()
+    model_gate.acquire("holder", 0)
+    with pytest.raises(Overloaded):
+        model_gate.acquire("a", 0.05)
+    model_gate.release()
+    assert model_gate.stats() == {"in_flight": 0, "waiting": 0, "sessions_waiting": 0}
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def run():
+        model_gate = gate()
+        await model_gate.acquire_async("holder", 0)
+        waiter = asyncio.create_task(model_gate.acquire_async("a", 5))
+        await settle()
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        stats = model_gate.stats()
+        model_gate.release()
+        return stats, model_gate.stats()
+
+    waiting, released = asyncio.run(run())
+    assert waiting == {"in_flight": 1, "waiting": 0, "sessions_waiting": 0}
+    assert released == {"in_flight": 0, "waiting": 0, "sessions_waiting": 0}
+
+def test_waiter_cancelled_after_being_granted_gives_the_slot_back():
+    async def run():
+        model_gate = gate()
+        await model_gate.acquire_async("holder", 0)
+        waiter = asyncio.create_task(model_gate.acquire_async("a", 5))
+        await settle()
+        # The slot passes to the waiter, which is cancelled before it resumes
+        model_gate.release()
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return model_gate.stats()
+
+    assert asyncio.run(run()) == {"in_flight": 0, "waiting": 0, "sessions_waiting": 0}
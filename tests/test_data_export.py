@@ -0,0 +1,92 @@
+import json
+import os
+import sys
+import zipfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_history import append_turn, history_length, new_history, turns
+from data_export import FORMATS, arrow_available, export_session, import_session
+from mood_analytics import append_mood
+from session_store import MemoryBackend, SessionStore, new_session_data
+
+APPOINTMENT = {"therapist": "Dr. Jane Smith", "time": "09:00", "date": "2031-01-02", "user_email": "user@example.com",
+               "appointment_note": "", "timestamp": "2030-12-01 10:00:00"}
+
+def build_session(store, session_id, conversations=2):
+    data = new_session_data()
+    for mood in ["sad", "anxious", "happy"]:
+        append_mood(data["mood_journal"], mood)
+    for conversation_id in range(conversations):
+        history = new_history()
+        append_turn(history, f"I could not sleep ({conversation_id})", "sad", reply="That sounds hard.")
+        append_turn(history, "Exams are coming up", reply="Let's make a plan.")
+        store.backend.write_conversation(session_id, conversation_id, history)
+        data["conversation_archive"].append({"id": conversation_id, "timestamp": "2024-01-01 10:00:00"})
+    data["current_conversation_id"] = conversations
+    append_turn(data["chat_history"], "hello", reply="Hi there")
+    data["appointments"] = [dict(APPOINTMENT)]
+    store.save(session_id, data)
+    return data
+
+def archived_turns(store, session_id, data):
+    return [turns(store.load_conversation(session_id, conv["id"])) for conv in data["conversation_archive"]]
+
+@pytest.mark.parametrize("fmt", [fmt for fmt in FORMATS if fmt == "jsonl" or arrow_available()])
+def test_export_import_round_trip(tmp_path, fmt):
+    store = SessionStore(MemoryBackend())
+    data = build_session(store, "source")
+    path = export_session(store, "source", data, str(tmp_path / "export.zip"), fmt)
+
+    restored = new_session_data()
+    counts = import_session(store, "restored", restored, path)
+
+    assert counts == {"mood_entries": 3, "conversations": 2, "appointments": 1}
+    assert restored["mood_journal"]["codes"] == data["mood_journal"]["codes"]
+    assert restored["mood_journal"]["daily"] == data["mood_journal"]["daily"]
+    assert archived_turns(store, "restored", restored) == archived_turns(store, "source", data)
+    assert [dict(a, email_ids=[]) for a in data["appointments"]] == restored["appointments"]
+    assert store.search("restored", "exams")
+    assert store.get("restored") == restored
+
+def write_jsonl_export(path, conversation_lines):
+    with zipfile.ZipFile(path, "w") as export:
+        export.writestr("mood_entries.jsonl", json.dumps({"timestamp": "2024-01-01 10:00:00", "mood": "sad"}) + "\n")
+        export.writestr("conversations.jsonl", "".join(line + "\n" for line in conversation_lines))
+
+@pytest.mark.parametrize("bad_line", [
+    '{"conversation_id": 1, "timestamp": "2024-01-01',
+    '["not", "an", "object"]',
+    '{"conversation_id": "one", "timestamp": "2024-01-01 10:00:00", "turn": 0, "user": "hi", "bot": "hello"}',
+])
+def test_corrupt_import_leaves_session_unchanged(tmp_path, bad_line):
+    store = SessionStore(MemoryBackend())
+    data = build_session(store, "user")
+    before = json.loads(json.dumps(data))
+    before_turns = archived_turns(store, "user", data)
+    good_line = json.dumps({"conversation_id": 0, "timestamp": "2024-01-01 10:00:00", "turn": 0,
+                            "user": "imported", "bot": "reply", "mood": None})
+    path = str(tmp_path / "export.zip")
+    write_jsonl_export(path, [good_line, bad_line])
+
+    with pytest.raises(ValueError):
+        import_session(store, "user", dict(data), path)
+
+    assert data == before
+    assert store.get("user") == before
+    assert archived_turns(store, "user", data) == before_turns
+    assert not store.search("user", "imported")
+    assert history_length(store.load_conversation("user", data["current_conversation_id"] + 1)) == 0
+
+def test_mood_entry_without_timestamp_is_rejected(tmp_path):
+    store = SessionStore(MemoryBackend())
+    data = build_session(store, "user")
+    path = str(tmp_path / "export.zip")
+    with zipfile.ZipFile(path, "w") as export:
+        export.writestr("mood_entries.jsonl", json.dumps({"mood": "sad"}) + "\n")
+
+    with pytest.raises(ValueError):
+        import_session(store, "user", dict(data), path)
+    assert store.get("user")["mood_journal"] == data["mood_journal"]
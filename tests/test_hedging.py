@@ -0,0 +1,84 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admission import ModelGate
+from fakes import FakeGenerativeModel
+from hedging import hedged_stream
+
+# Reply stream holding a gate slot until it ends, as app.generate_stream does
+def gated(model_gate, model):
+    async def stream(timeout):
+        await model_gate.acquire_async("session", 0)
+        try:
+            response = await model.generate_content_async("hi", stream=True, request_options={"timeout": timeout})
+            async for chunk in response:
+                yield chunk.text
+        finally:
+            model_gate.release()
+    return stream
+
+async def collect(stream):
+    return "".join([chunk async for chunk in stream])
+
+def test_hedge_wins_against_a_slow_primary():
+    async def run():
+        model_gate = ModelGate(rpm=0, concurrency=2)
+        primary = FakeGenerativeModel(reply="slow primary reply", first_chunk_latency=5)
+        fallback = FakeGenerativeModel(reply="fast fallback reply", latency=0.01)
+        reply = await collect(hedged_stream([gated(model_gate, primary), gated(model_gate, fallback)],
+                                            hedge_after=0.05, deadline=2))
+        return reply, model_gate.stats()
+
+    reply, stats = asyncio.run(run())
+    assert reply == "fast fallback reply"
+    assert stats["in_flight"] == 0
+
+def test_primary_that_starts_in_time_is_not_hedged():
+    async def run():
+        primary = FakeGenerativeModel(reply="primary reply", latency=0.01)
+        fallback = FakeGenerativeModel(reply="fallback reply")
+        model_gate = ModelGate(rpm=0, concurrency=2)
+        reply = await collect(hedged_stream([gated(model_gate, primary), gated(model_gate, fallback)],
+                                            hedge_after=1, deadline=2))
+        return reply, fallback.calls
+
+    assert asyncio.run(run()) == ("primary reply", 0)
+
+def test_deadline_raises_timeout_error():
+    async def run():
+        model_gate = ModelGate(rpm=0, concurrency=2)
+        models = [FakeGenerativeModel(first_chunk_latency=5), FakeGenerativeModel(first_chunk_latency=5)]
+        with pytest.raises(TimeoutError):
+            await collect(hedged_stream([gated(model_gate, model) for model in models], hedge_after=0.05,
+                                        deadline=0.2))
+        return model_gate.stats()
+
+    assert asyncio.run(run())["in_flight"] == 0
+
+def test_reply_that_stalls_past_the_deadline_raises_timeout_error():
+    async def run():
+        model_gate = ModelGate(rpm=0, concurrency=1)
+        model = FakeGenerativeModel(latency=0.5, first_chunk_latency=0.01)
+        with pytest.raises(TimeoutError):
+            await collect(hedged_stream([gated(model_gate, model)], hedge_after=1, deadline=0.2))
+        return model_gate.stats()
+
+    assert asyncio.run(run())["in_flight"] == 0
+
+def test_no_slot_is_left_held_when_the_consumer_stops_early():
+    async def run():
+        model_gate = ModelGate(rpm=0, concurrency=2)
+        primary = FakeGenerativeModel(first_chunk_latency=5)
+        fallback = FakeGenerativeModel(latency=0.01)
+        stream = hedged_stream([gated(model_gate, primary), gated(model_gate, fallback)], hedge_after=0.05,
+                               deadline=2)
+        await stream.__anext__()
+        await stream.aclose()
+        return model_gate.stats()
+
+    assert asyncio.run(run()) == {"in_flight": 0, "waiting": 0, "sessions_waiting": 0}
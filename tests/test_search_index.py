@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_store import MemoryBackend, SQLiteBackend
+
+@pytest.fixture(params=["sqlite", "memory"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteBackend(str(tmp_path / "sessions.db"))
+    return MemoryBackend()
+
+def test_search_and_delete_stay_within_the_session(backend):
+    # The first ID's words are a prefix of the second's
+    backend.index_turn("api-foo", 0, 0, "I could not sleep before exams")
+    backend.index_turn("api-foo-bar", 0, 0, "exams make me anxious")
+    backend.index_turn("api-foo-bar", 1, 0, "sleep has been better")
+
+    assert [conversation_id for conversation_id, _ in backend.search("api-foo", "exams")] == [0]
+    assert backend.search("api-foo", "anxious") == []
+    assert [conversation_id for conversation_id, _ in backend.search("api-foo-bar", "sleep")] == [1]
+
+    backend.delete_conversations("api-foo", [0, 1])
+    assert backend.search("api-foo", "exams") == []
+    assert [conversation_id for conversation_id, _ in backend.search("api-foo-bar", "exams")] == [0]
+    assert [conversation_id for conversation_id, _ in backend.search("api-foo-bar", "sleep")] == [1]
+
+def test_search_matches_the_last_word_as_a_prefix(backend):
+    backend.index_turn("session", 0, 0, "Talking to my friends helps")
+    backend.index_turn("session", 1, 0, "I went for a walk with a friend")
+
+    assert [conversation_id for conversation_id, _ in backend.search("session", "friend")] == [1, 0]
+    assert backend.search("session", "talking fr")[0][1].startswith("**Talking**")